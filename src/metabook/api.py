@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Embeddable Python API for processing books from a long-lived program."""
+
+# Core Library modules
+import contextvars
+import os
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any, Optional, Union
+
+# Third party modules
+import requests
+
+# Local modules
+from .cache import MetadataCache
+from .catalog import Catalog
+from .config import Config, use_config
+from .metabook import BookJob, BookRun
+from .pipeline import Pipeline
+
+
+class MetaBook:
+    """A book processor with its own configuration, HTTP session and caches.
+
+    Unlike the command line, which uses the process wide configuration, each
+    MetaBook holds its own Config, so several differently configured instances
+    can be used in one process. The HTTP session, metadata cache and extraction
+    workers are created once and reused for every book.
+
+    Args:
+        settings (Config): The base configuration, by default the defaults.
+        key (str): The book API key, by default GOOGLE_BOOKS_API_KEY.
+        cache (MetadataCache): A (possibly persistent or shared) metadata cache,
+            by default an in-memory one.
+        catalog (Catalog): A catalog to record processed books in, if any.
+        **overrides: Settings overriding those of settings, e.g. DRYRUN=True.
+
+    Example:
+        with MetaBook(DRYRUN=True) as metabook:
+            for result in metabook.process_many(paths):
+                print(result.status, result.new_name)
+    """
+
+    def __init__(
+        self,
+        settings: Optional[Config] = None,
+        key: Optional[str] = None,
+        cache: Optional[MetadataCache] = None,
+        catalog: Optional[Catalog] = None,
+        **overrides: Any,
+    ) -> None:
+        self.config = (settings or Config()).copy(**overrides)
+        self.session = requests.Session()
+        self.cache = cache if cache is not None else MetadataCache()
+        self.catalog = catalog
+        self._run = BookRun(
+            catalog=catalog,
+            cache=self.cache,
+            session=self.session,
+            key=key or os.getenv("GOOGLE_BOOKS_API_KEY"),
+        )
+
+    def process(self, path: Union[str, Path]) -> BookJob:
+        """Processes one book in the calling thread.
+
+        Returns:
+            BookJob: The result; its status is "skip", "no_isbn", "no_meta",
+            "timeout", "error", "dryrun" or "renamed".
+        """
+        with use_config(self.config):
+            for job in self._run.discover([Path(path)]):
+                for _, step in self._run.steps():
+                    job = step(job)
+                self._run.measure(job)
+                return job
+        return BookJob(Path(path), status="skip")  # pragma: no cover
+
+    def process_many(self, paths: Iterable[Union[str, Path]]) -> Iterator[BookJob]:
+        """Processes books concurrently through the staged pipeline.
+
+        Args:
+            paths (Iterable): The books; consumed lazily, so it may be a
+                generator over millions of paths.
+
+        Yields:
+            BookJob: The result of each book in completion order.
+        """
+        with use_config(self.config):
+            context = contextvars.copy_context()
+            pipeline = Pipeline(self._run.stages(), self.config.QUEUE_SIZE)
+        books = (Path(path) for path in paths)
+        for job in pipeline.run(self._run.discover(books), context):
+            self._run.measure(job)
+            yield job
+
+    def close(self) -> None:
+        """Stops the extraction workers and releases the HTTP session."""
+        self._run.stop()
+        self.session.close()
+        self.cache.save()
+        if self.catalog is not None:
+            with use_config(self.config):
+                self.catalog.close()
+
+    def __enter__(self) -> "MetaBook":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
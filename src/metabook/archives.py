@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""PDF books stored inside zip and tar archives, read without unpacking them."""
+
+# Core Library modules
+import atexit
+import errno
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path, PurePosixPath
+from typing import IO, NamedTuple, Optional
+
+# Local modules
+from .config import config
+
+ARCHIVE_SUFFIXES = (
+    ".zip",
+    ".tar",
+    ".tar.gz",
+    ".tgz",
+    ".tar.bz2",
+    ".tbz2",
+    ".tar.xz",
+    ".txz",
+)
+
+
+def is_archive(path: Path) -> bool:
+    return path.name.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def archive_members(archive: Path) -> list[Path]:
+    """Returns the PDF books inside an archive.
+
+    A book inside an archive is addressed by the archive's path followed by the
+    member's name, e.g. intake/bundle.zip/python/testing.pdf, and is read with
+    open_book.
+
+    Args:
+        archive (Path): A zip or tar archive, optionally compressed.
+
+    Returns:
+        list[Path]: The paths of the PDF members. Members with absolute names
+        or '..' components are left out.
+    """
+    try:
+        if archive.name.lower().endswith(".zip"):
+            with zipfile.ZipFile(archive) as zf:
+                names = [info.filename for info in zf.infolist() if not info.is_dir()]
+        else:
+            with tarfile.open(archive) as tf:
+                names = [info.name for info in tf.getmembers() if info.isfile()]
+    except (OSError, zipfile.BadZipFile, tarfile.TarError) as e:
+        print(f"Cannot read archive {archive}: {e}")
+        return []
+    members = []
+    for name in names:
+        member = PurePosixPath(name)
+        if member.is_absolute() or ".." in member.parts:
+            continue
+        if member.suffix.lower() == ".pdf":
+            members.append(archive.joinpath(*member.parts))
+    return members
+
+
+def split_member(book: Path) -> Optional[tuple[Path, str]]:
+    """Returns the archive and member name of a book inside an archive.
+
+    Returns:
+        tuple[Path, str]: The archive and the member name, or None for a book
+        that is a file of its own.
+    """
+    for parent in book.parents:
+        if is_archive(parent) and parent.is_file():
+            return parent, book.relative_to(parent).as_posix()
+    return None
+
+
+def book_exists(book: Path) -> bool:
+    """Returns whether a book, or the archive holding it, exists."""
+    return book.exists() or split_member(book) is not None
+
+
+def book_stat(book: Path) -> os.stat_result:
+    """Returns the status of a book, or of the archive holding it."""
+    member = split_member(book)
+    return book.stat() if member is None else member[0].stat()
+
+
+@contextmanager
+def _member_stream(archive: Path, name: str) -> Iterator[IO[bytes]]:
+    try:
+        if archive.name.lower().endswith(".zip"):
+            with zipfile.ZipFile(archive) as zf, zf.open(name) as f:
+                yield f
+            return
+        with tarfile.open(archive) as tf:
+            try:
+                info = tf.getmember(name)
+            except KeyError:
+                info = tf.getmember("./" + name)
+            stream = tf.extractfile(info)
+            if stream is None:
+                raise KeyError(name)
+            with stream:
+                yield stream
+    except (KeyError, zipfile.BadZipFile, tarfile.TarError) as e:
+        raise OSError(errno.EIO, f"cannot read {name} from {archive}: {e}") from e
+
+
+class _Spool(NamedTuple):
+    """A member read out of its archive, in memory or in a temporary file."""
+
+    stamp: tuple[int, int]
+    data: Optional[bytes]
+    path: Optional[str]
+
+    def open(self) -> IO[bytes]:
+        if self.data is not None:
+            return io.BytesIO(self.data)
+        assert self.path is not None  # a spool holds either data or a file
+        return open(self.path, "rb")
+
+    def discard(self) -> None:
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+_spools: "OrderedDict[Path, _Spool]" = OrderedDict()
+_spooling: dict[Path, threading.Lock] = {}
+_spools_lock = threading.Lock()
+
+
+def _spool_member(archive: Path, name: str, stamp: tuple[int, int]) -> _Spool:
+    with _member_stream(archive, name) as source:
+        data = source.read(config.ARCHIVE_SPOOL_SIZE + 1)
+        if len(data) <= config.ARCHIVE_SPOOL_SIZE:
+            return _Spool(stamp, data, None)
+        fd, path = tempfile.mkstemp(prefix="metabook-", suffix=".pdf")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                shutil.copyfileobj(source, f)
+        except BaseException:
+            os.unlink(path)
+            raise
+    return _Spool(stamp, None, path)
+
+
+def open_book(book: Path) -> IO[bytes]:
+    """Opens a book for binary reading.
+
+    A book inside an archive is decompressed once and kept, in memory up to
+    config.ARCHIVE_SPOOL_SIZE bytes and in a temporary file beyond that, so the
+    stages reading it one after another (pre-flight, ISBN search, publisher
+    search, extraction) share one decompression. Members of compressed tar
+    archives are only reached by decompressing the archive up to them, unlike
+    zip members which are read directly. The config.ARCHIVE_SPOOL_BOOKS books
+    opened last are kept until release_book is called for them; a book whose
+    archive has changed since is read again.
+
+    Raises:
+        OSError: If the book, or its archive or member, cannot be read.
+    """
+    member = split_member(book)
+    if member is None:
+        return open(book, "rb")
+    stat = member[0].stat()
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _spools_lock:
+        lock = _spooling.setdefault(book, threading.Lock())
+    with lock:
+        with _spools_lock:
+            spool = _spools.get(book)
+            if spool is not None and spool.stamp == stamp:
+                _spools.move_to_end(book)
+                return spool.open()
+        spool = _spool_member(*member, stamp)
+        discarded = []
+        with _spools_lock:
+            if book in _spools:
+                discarded.append(_spools.pop(book))
+            _spools[book] = spool
+            while len(_spools) > max(config.ARCHIVE_SPOOL_BOOKS, 1):
+                oldest, evicted = _spools.popitem(last=False)
+                _spooling.pop(oldest, None)
+                discarded.append(evicted)
+            f = spool.open()
+    for evicted in discarded:
+        evicted.discard()
+    return f
+
+
+def release_book(book: Path) -> None:
+    """Drops the decompressed copy open_book keeps of a book, if any.
+
+    Files opened from it before stay readable.
+    """
+    with _spools_lock:
+        spool = _spools.pop(book, None)
+        _spooling.pop(book, None)
+    if spool is not None:
+        spool.discard()
+
+
+@atexit.register
+def _release_books() -> None:
+    for book in list(_spools):
+        release_book(book)
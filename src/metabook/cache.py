@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Cache of book metadata keyed by ISBN."""
+
+# Core Library modules
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+
+class MetadataCache:
+    """Least recently used cache of fetch_book_metadata results.
+
+    Args:
+        path (Path): A JSON file the cache is loaded from and saved to, or None
+            for a cache that lives only as long as the object.
+        maxsize (int): The maximum number of entries, 0 for no limit.
+    """
+
+    def __init__(self, path: Optional[Path] = None, maxsize: int = 0) -> None:
+        self.path = path
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._changed = False
+        if path is not None and path.exists():
+            try:
+                self._entries.update(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                print(f"Ignoring unreadable metadata cache: {path}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, isbn: str) -> bool:
+        return isbn in self._entries
+
+    def get(self, isbn: str) -> Optional[dict[str, Any]]:
+        """Returns a copy of the cached metadata of an ISBN, or None."""
+        with self._lock:
+            meta = self._entries.get(isbn)
+            if meta is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(isbn)
+            return dict(meta)
+
+    def put(self, isbn: str, meta: dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[isbn] = dict(meta)
+            self._entries.move_to_end(isbn)
+            if self.maxsize and len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            self._changed = True
+
+    def save(self) -> None:
+        """Writes the cache to its file, if it has one and has changed."""
+        if self.path is None or not self._changed:
+            return
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp = self.path.with_suffix(".tmp")
+            temp.write_text(json.dumps(self._entries), encoding="utf-8")
+            os.replace(temp, self.path)
+            self._changed = False
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""Library catalog of processed books and the query command."""
+
+# Core Library modules
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+# Local modules
+from .cli import _parse_query_args
+from .config import config
+
+try:
+    # Third party modules
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+FIELDS = ("TITLE", "SUBTITLE", "AUTHORS", "DATE", "PUBLISHER", "ISBN", "DESCRIPTION")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS books (
+    path TEXT PRIMARY KEY,
+    title TEXT,
+    subtitle TEXT,
+    authors TEXT,
+    date TEXT,
+    publisher TEXT COLLATE NOCASE,
+    isbn TEXT,
+    description TEXT,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS books_publisher_date ON books (publisher, date);
+CREATE INDEX IF NOT EXISTS books_date ON books (date);
+CREATE INDEX IF NOT EXISTS books_isbn ON books (isbn);
+"""
+
+
+class Catalog:
+    """SQLite catalog of every processed book's metadata keyed by file path.
+
+    Rows are buffered and written in one transaction every config.CATALOG_BATCH
+    books. When config.CATALOG_FORMAT is "parquet" and pyarrow is installed the
+    catalog is also exported to config.CATALOG_PARQUET on close.
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = path or config.CATALOG_FILE
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(SCHEMA)
+        self._buffer: list[tuple] = []
+        self._changed = False
+        self._lock = threading.RLock()
+
+    def add(self, book: Path, meta: Optional[dict[str, Any]] = None) -> None:
+        """Adds or replaces the catalog entry of a book.
+
+        Args:
+            book (Path): The current path of the book.
+            meta (dict): The book metadata as returned by fetch_book_metadata.
+                Books without an ISBN are added with no metadata.
+        """
+        meta = meta or {}
+        values = []
+        for field in FIELDS:
+            value = meta.get(field)
+            if isinstance(value, list):
+                value = "; ".join(value)
+            values.append(None if value in (None, "None", "") else value)
+        with self._lock:
+            self._buffer.append((str(book), *values, time.time()))
+            self._changed = True
+            if len(self._buffer) >= config.CATALOG_BATCH:
+                self.flush()
+
+    def __contains__(self, book: Path) -> bool:
+        with self._lock:
+            if any(row[0] == str(book) for row in self._buffer):
+                return True
+            cursor = self._db.execute(
+                "SELECT 1 FROM books WHERE path = ?", (str(book),)
+            )
+            return cursor.fetchone() is not None
+
+    def remove(self, book: Path) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM books WHERE path = ?", (str(book),))
+            self._changed = True
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._buffer:
+                return
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO books VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    self._buffer,
+                )
+            self._buffer = []
+
+    def query(
+        self,
+        publisher: Optional[str] = None,
+        year: Optional[str] = None,
+        isbn: Optional[str] = None,
+        title: Optional[str] = None,
+        author: Optional[str] = None,
+        missing_isbn: bool = False,
+        missing_meta: bool = False,
+    ) -> list[dict[str, Any]]:
+        """Returns the catalog entries matching all the given criteria.
+
+        Publisher, year and ISBN lookups are served from indexes; title and
+        author are case-insensitive substring matches.
+        """
+        self.flush()
+        clauses, params = [], []
+        if publisher:
+            clauses.append("publisher = ?")
+            params.append(publisher)
+        if year:
+            clauses.append("date = ?")
+            params.append(year)
+        if isbn:
+            clauses.append("isbn = ?")
+            params.append(isbn)
+        if title:
+            clauses.append("(title LIKE ? OR subtitle LIKE ?)")
+            params.extend([f"%{title}%"] * 2)
+        if author:
+            clauses.append("authors LIKE ?")
+            params.append(f"%{author}%")
+        if missing_isbn:
+            clauses.append("isbn IS NULL")
+        if missing_meta:
+            clauses.append("isbn IS NOT NULL AND title IS NULL")
+        sql = "SELECT * FROM books"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY publisher, date, title"
+        with self._lock:
+            return [dict(row) for row in self._db.execute(sql, params)]
+
+    def export_parquet(self, path: Path) -> None:
+        """Writes the whole catalog to a Parquet file (requires pyarrow)."""
+        rows = self.query()
+        columns = rows[0].keys() if rows else ["path", *[f.lower() for f in FIELDS]]
+        table = pyarrow.table({c: [row[c] for row in rows] for c in columns})
+        pyarrow.parquet.write_table(table, path)
+
+    def close(self) -> None:
+        self.flush()
+        if self._changed and config.CATALOG_FORMAT == "parquet":
+            if pyarrow is None:
+                print("pyarrow is not installed, the catalog was kept in SQLite only")
+            else:
+                self.export_parquet(config.CATALOG_PARQUET)
+        self._db.close()
+
+
+def query(args: list[str]) -> None:
+    """Entry point of the 'metabook query' command."""
+    options, parser = _parse_query_args(args)
+    if not (options.catalog or config.CATALOG_FILE).exists():
+        print("No catalog found, process some books first")
+        return
+    catalog = Catalog(options.catalog)
+    started = time.perf_counter()
+    rows = catalog.query(
+        publisher=options.publisher,
+        year=options.year,
+        isbn=options.isbn,
+        title=options.title,
+        author=options.author,
+        missing_isbn=options.missing_isbn,
+        missing_meta=options.missing_meta,
+    )
+    elapsed = (time.perf_counter() - started) * 1000
+    catalog.close()
+    if options.json:
+        for row in rows:
+            print(json.dumps(row))
+        return
+    for row in rows:
+        print(row["path"])
+    print(f"{len(rows)} books found in {elapsed:.1f} ms")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Run checkpoint allowing an interrupted run to be resumed."""
+
+# Core Library modules
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+# Local modules
+from .config import config
+
+
+class Checkpoint:
+    """Append-only JSON lines record of a run's discovered books and progress.
+
+    The first record holds the folder and the discovered books, every following
+    record marks a stage a book has completed together with that stage's result,
+    e.g. {"book": "...", "stage": "isbn", "data": [...]}. Records are buffered and
+    flushed every config.CHECKPOINT_BATCH records, so a crash loses at most one
+    batch of progress, which is simply redone when the run is resumed.
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = path or config.CHECKPOINT_FILE
+        self.folder: Optional[Path] = None
+        self.books: list[Path] = []
+        self.stages: dict[str, dict[str, Any]] = {}
+        self._buffer: list[str] = []
+        self._lock = threading.RLock()
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def start(self, folder: Path, books: list[Path]) -> None:
+        """Begins a new checkpoint, discarding any previous one."""
+        self.folder = folder
+        self.books = list(books)
+        self.stages = {}
+        self._buffer = []
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        header = {"folder": str(folder), "books": [str(b) for b in self.books]}
+        with open(self.path, mode="w", encoding="utf-8") as f:
+            f.write(json.dumps(header) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def load(self) -> None:
+        """Reads the books and completed stages of the previous run.
+
+        A torn final line left by a crash mid-write is cut off the file, so the
+        records the resumed run appends start on a line of their own.
+        """
+        with open(self.path, "rb+") as f:
+            header = json.loads(f.readline())
+            self.folder = Path(header["folder"])
+            self.books = [Path(b) for b in header["books"]]
+            self.stages = {}
+            end = f.tell()
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("unterminated line")
+                    record = json.loads(line)
+                except ValueError:
+                    # a torn final line from a crash mid-write
+                    f.truncate(end)
+                    break
+                self.stages.setdefault(record["book"], {})[record["stage"]] = record[
+                    "data"
+                ]
+                end += len(line)
+
+    def get(self, book: Path, stage: str) -> Any:
+        """Returns the recorded result of a stage for a book, or None."""
+        return self.stages.get(str(book), {}).get(stage)
+
+    def done(self, book: Path) -> bool:
+        return self.get(book, "done") is not None
+
+    def record(self, book: Path, stage: str, data: Any = True) -> None:
+        """Marks a stage as complete for a book, flushing in batches."""
+        line = json.dumps({"book": str(book), "stage": stage, "data": data})
+        with self._lock:
+            self.stages.setdefault(str(book), {})[stage] = data
+            self._buffer.append(line)
+            if len(self._buffer) >= config.CHECKPOINT_BATCH:
+                self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._buffer:
+                return
+            with open(self.path, mode="a", encoding="utf-8") as f:
+                f.write("\n".join(self._buffer) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._buffer = []
+
+    def finish(self) -> None:
+        """Removes the checkpoint once every book has been processed."""
+        with self._lock:
+            self._buffer = []
+        if self.path.exists():
+            self.path.unlink()
@@ -1,5 +1,6 @@
 # Core Library modules
 import argparse
+from pathlib import Path
 
 
 def _parse_args(args: list) -> tuple[argparse.Namespace, argparse.ArgumentParser]:
@@ -12,6 +13,8 @@ def _parse_args(args: list) -> tuple[argparse.Namespace, argparse.ArgumentParser
     parser = argparse.ArgumentParser(
         prog="metabook",
         description="Find a pdf book metadata and update filename and file metadata ",
+        epilog="other commands: metabook query --help, metabook serve --help, "
+        "metabook stub --help, metabook scan/resolve/apply --help",
     )
     parser.add_argument(
         "folder",
@@ -25,23 +28,384 @@ def _parse_args(args: list) -> tuple[argparse.Namespace, argparse.ArgumentParser
         action="store_true",
         help="process all pdf files",
     )
+    parser.add_argument(
+        "--api-url",
+        metavar="URL",
+        help="send book API requests to this URL, e.g. a 'metabook stub'",
+    )
+    parser.add_argument(
+        "--background",
+        action="store_true",
+        help="run at low CPU and I/O priority, capping the CPU and read rate of "
+        "the extraction and pausing while the host is busy",
+    )
     parser.add_argument(
         "-d",
         "--dryrun",
         action="store_true",
         help="process the pdf files but do not write to the files",
     )
+    parser.add_argument(
+        "--distributed",
+        action="store_true",
+        help="share the books with other metabook processes working on the folder",
+    )
+    parser.add_argument(
+        "--extract-to",
+        type=Path,
+        metavar="DIR",
+        help="write the renamed and re-tagged books found in zip and tar archives "
+        "to DIR (by default they are only looked up)",
+    )
     parser.add_argument(
         "-l",
         "--log",
         action="store_true",
         help="create a file to record the file changes",
     )
+    parser.add_argument(
+        "--memprofile",
+        action="store_true",
+        help="trace the memory used by the extraction workers and write a report",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        metavar="PORT",
+        help="serve Prometheus metrics at http://127.0.0.1:PORT/metrics",
+    )
+    parser.add_argument(
+        "--metrics-textfile",
+        action="store_true",
+        help="write Prometheus metrics to reports/metabook.prom during the run",
+    )
+    parser.add_argument(
+        "--node",
+        help="name of this process in distributed mode (default: host-pid)",
+    )
+    parser.add_argument(
+        "-p",
+        "--page-budget",
+        type=int,
+        metavar="PAGES",
+        help="maximum number of pages to extract per book (0 for no limit)",
+    )
+    parser.add_argument(
+        "--page-workers",
+        type=int,
+        metavar="N",
+        help="search the pages of books over 100MB with N processes each",
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        metavar="BOOKS",
+        help="number of books read ahead of the ISBN extraction (0 to disable)",
+    )
+    parser.add_argument(
+        "--record",
+        type=Path,
+        metavar="CASSETTE",
+        help="record the book API responses into this cassette file",
+    )
+    parser.add_argument(
+        "-r",
+        "--recurse",
+        action="store_true",
+        help="recurse through subdirectories",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="resume the last interrupted run from its checkpoint",
+    )
+    parser.add_argument(
+        "--schedule",
+        choices=("largest", "smallest", "interleave", "found"),
+        help="order of processing by estimated cost: most expensive first "
+        "(default), cheapest first, alternating, or as found",
+    )
+    parser.add_argument(
+        "--sidecar",
+        choices=("json", "opf", "index"),
+        help="write metadata to a .json or .opf file next to each book, or to a "
+        "single index file, instead of into the PDF",
+    )
+    parser.add_argument(
+        "-t",
+        "--timeout",
+        type=float,
+        metavar="SECONDS",
+        help="wall-clock budget per book, 0 to disable the supervised worker",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        metavar="N",
+        help="number of PDF extraction workers",
+    )
+
+    return parser.parse_args(args), parser
+
+
+def _parse_query_args(
+    args: list,
+) -> tuple[argparse.Namespace, argparse.ArgumentParser]:
+    """Function to return the ArgumentParser object of the query command.
+
+    Args:
+        args:   A list of arguments following 'query' on the commandline
+                e.g. ['--publisher', 'Packt', '--year', '2021']
+    """
+    parser = argparse.ArgumentParser(
+        prog="metabook query",
+        description="Query the catalog of processed books",
+    )
+    parser.add_argument("--publisher", help="books from this publisher")
+    parser.add_argument("--year", help="books published in this year")
+    parser.add_argument("--isbn", help="the book with this ISBN")
+    parser.add_argument("--title", help="books whose title contains this text")
+    parser.add_argument("--author", help="books with an author containing this text")
+    parser.add_argument(
+        "--missing-isbn",
+        action="store_true",
+        help="books where no ISBN could be found",
+    )
+    parser.add_argument(
+        "--missing-meta",
+        action="store_true",
+        help="books with an ISBN but no metadata",
+    )
+    parser.add_argument(
+        "--catalog",
+        type=Path,
+        help="the catalog file to query (default: data/catalog.sqlite)",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="print each matching book as a JSON object",
+    )
+
+    return parser.parse_args(args), parser
+
+
+def _parse_serve_args(
+    args: list,
+) -> tuple[argparse.Namespace, argparse.ArgumentParser]:
+    """Function to return the ArgumentParser object of the serve command.
+
+    Args:
+        args:   A list of arguments following 'serve' on the commandline
+                e.g. ['--port', '8421', '--concurrency', '4']
+    """
+    parser = argparse.ArgumentParser(
+        prog="metabook serve",
+        description="Serve book lookups over a local HTTP/JSON API",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8421, help="port to listen on")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="number of books processed at the same time",
+    )
+    parser.add_argument(
+        "--root",
+        type=Path,
+        help="only allow lookups of paths inside this directory",
+    )
+
+    return parser.parse_args(args), parser
+
+
+def _parse_stub_args(
+    args: list,
+) -> tuple[argparse.Namespace, argparse.ArgumentParser]:
+    """Function to return the ArgumentParser object of the stub command.
+
+    Args:
+        args:   A list of arguments following 'stub' on the commandline
+                e.g. ['--cassette', 'api.json.gz', '--latency', '0.2']
+    """
+    parser = argparse.ArgumentParser(
+        prog="metabook stub",
+        description="Replay recorded book API responses from a local server",
+    )
+    parser.add_argument(
+        "--cassette",
+        type=Path,
+        required=True,
+        help="the cassette recorded with 'metabook --record'",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8422, help="port to listen on")
+    parser.add_argument(
+        "--latency",
+        type=float,
+        metavar="SECONDS",
+        help="delay of every response (default: the recorded delays)",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="share of requests answered with 503",
+    )
+    parser.add_argument(
+        "--burst-every",
+        type=int,
+        default=0,
+        metavar="N",
+        help="start a burst of 429 responses every N requests",
+    )
+    parser.add_argument(
+        "--burst-length",
+        type=int,
+        default=1,
+        metavar="N",
+        help="number of 429 responses in a burst",
+    )
+    parser.add_argument(
+        "--retry-after",
+        type=int,
+        default=1,
+        metavar="SECONDS",
+        help="Retry-After of the 429 responses",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed of the errors")
+
+    return parser.parse_args(args), parser
+
+
+def _parse_scan_args(
+    args: list,
+) -> tuple[argparse.Namespace, argparse.ArgumentParser]:
+    """Function to return the ArgumentParser object of the scan command.
+
+    Args:
+        args:   A list of arguments following 'scan' on the commandline
+                e.g. ['books', '--output', 'scan.jsonl', '--workers', '8']
+    """
+    parser = argparse.ArgumentParser(
+        prog="metabook scan",
+        description="Find the ISBNs of pdf books and write them to a file for "
+        "'metabook resolve'",
+    )
+    parser.add_argument("folder", help="The directory to search for pdf books")
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        help="the file to write (default: data/scan.jsonl)",
+    )
+    parser.add_argument(
+        "-a",
+        "--all",
+        action="store_true",
+        help="process all pdf files",
+    )
+    parser.add_argument(
+        "--background",
+        action="store_true",
+        help="run at low CPU and I/O priority, capping the CPU and read rate of "
+        "the extraction and pausing while the host is busy",
+    )
     parser.add_argument(
         "-r",
         "--recurse",
         action="store_true",
         help="recurse through subdirectories",
     )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        metavar="N",
+        help="number of PDF extraction workers",
+    )
+
+    return parser.parse_args(args), parser
+
+
+def _parse_resolve_args(
+    args: list,
+) -> tuple[argparse.Namespace, argparse.ArgumentParser]:
+    """Function to return the ArgumentParser object of the resolve command.
+
+    Args:
+        args:   A list of arguments following 'resolve' on the commandline
+                e.g. ['scan.jsonl', '--workers', '2']
+    """
+    parser = argparse.ArgumentParser(
+        prog="metabook resolve",
+        description="Look up the metadata of the books of a 'metabook scan' file",
+    )
+    parser.add_argument("file", type=Path, help="the file written by 'metabook scan'")
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        help="the file to write (default: update the scan file)",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        metavar="N",
+        help="number of concurrent lookups",
+    )
+
+    return parser.parse_args(args), parser
+
+
+def _parse_apply_args(
+    args: list,
+) -> tuple[argparse.Namespace, argparse.ArgumentParser]:
+    """Function to return the ArgumentParser object of the apply command.
+
+    Args:
+        args:   A list of arguments following 'apply' on the commandline
+                e.g. ['scan.jsonl', '--folder', '/mnt/books']
+    """
+    parser = argparse.ArgumentParser(
+        prog="metabook apply",
+        description="Write the metadata of a 'metabook resolve' file to the books "
+        "and rename them",
+    )
+    parser.add_argument(
+        "file", type=Path, help="the file written by 'metabook resolve'"
+    )
+    parser.add_argument(
+        "--background",
+        action="store_true",
+        help="run at low CPU and I/O priority, capping the CPU and read rate of "
+        "the extraction and pausing while the host is busy",
+    )
+    parser.add_argument(
+        "--folder",
+        type=Path,
+        help="where the scanned folder is found on this machine",
+    )
+    parser.add_argument(
+        "-d",
+        "--dryrun",
+        action="store_true",
+        help="process the pdf files but do not write to the files",
+    )
+    parser.add_argument(
+        "--extract-to",
+        type=Path,
+        metavar="DIR",
+        help="write the books found in zip and tar archives to DIR",
+    )
+    parser.add_argument(
+        "--sidecar",
+        choices=("json", "opf", "index"),
+        help="write metadata to a .json or .opf file next to each book, or to a "
+        "single index file, instead of into the PDF",
+    )
 
     return parser.parse_args(args), parser
@@ -1,7 +1,11 @@
 #!/usr/bin/env python3
 
 # Core Library modules
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
+from typing import Any, Optional
 
 # Third party modules
 from jinja2 import Template
@@ -10,19 +14,94 @@
 class Config:
     ALLOW_SPACE: bool = True
     API: str = "google"
+    API_BURST: int = 5
+    API_DAILY_QUOTA: int = 1000
+    API_QUOTA_RESET_HOUR: int = 8
+    API_RATE: float = 1.0
+    API_RETRIES: int = 5
+    API_URL: str = ""
+    ARCHIVES: bool = True
+    ARCHIVE_SPOOL_BOOKS: int = 4
+    ARCHIVE_SPOOL_SIZE: int = 64 * 1024 * 1024
+    BACKGROUND: bool = False
+    BACKGROUND_CPU: float = 0.5
+    BACKGROUND_MAX_LOAD: float = 0.0
+    BACKGROUND_NICE: int = 10
+    BACKGROUND_POLL: float = 5.0
+    BACKGROUND_READ_RATE: float = 20.0
+    BOOK_TIMEOUT: float = 120.0
+    BOOTSTRAP_NAMES: bool = True
+    CATALOG_BATCH: int = 50
+    CATALOG_FORMAT: str = "sqlite"
+    CHECKPOINT_BATCH: int = 25
+    DATA_DIR: Path = Path("data")
+    CATALOG_FILE: Path = DATA_DIR / "catalog.sqlite"
+    CATALOG_PARQUET: Path = DATA_DIR / "catalog.parquet"
+    CHECKPOINT_FILE: Path = DATA_DIR / "checkpoint.jsonl"
+    COSTS_FILE: Path = DATA_DIR / "book_costs.json"
+    DISTRIBUTED_DIR: str = ".metabook"
     DRYRUN: bool = False
     ENGINE: str = "PyPDF2"
+    EXTRACT_TO: Optional[Path] = None
+    FAST_SCAN: bool = True
     GET_DESCRIPTION: bool = False
     HARDCOPY: bool = False
     HARDCOPY_FILE: Path = Path("hardcopy.txt")
+    LEASE_TIMEOUT: float = 900.0
     LINE_LENGTH: int = 80
     LOWERCASE_ONLY: bool = False
     MAX_FILEPATH_LENGTH: int = 255
+    MEMORY_POLL_INTERVAL: float = 0.2
+    MEMPROFILE: bool = False
+    MEMPROFILE_FILE: Path = Path("reports") / "memprofile.txt"
+    METRICS_HOST: str = "127.0.0.1"
+    METRICS_INTERVAL: float = 15.0
+    METRICS_TEXTFILE: Path = Path("reports") / "metabook.prom"
+    METADATA_CACHE_FILE: Path = DATA_DIR / "metadata_cache.json"
+    PAGE_BUDGET: int = 100
+    PAGE_PROFILES: bool = True
+    PAGE_PROFILES_FILE: Path = DATA_DIR / "isbn_pages.json"
+    PAGE_PROFILES_MIN_COUNT: int = 3
+    PAGE_WORKERS: int = 0
+    PAGE_WORKERS_MIN_SIZE: int = 100 * 1024 * 1024
+    PHASE_FILE: Path = DATA_DIR / "scan.jsonl"
+    PREFETCH_AHEAD: int = 4
+    PREFETCH_BUDGET: int = 64 * 1024 * 1024
+    PREFETCH_HEAD: int = 1024 * 1024
+    PREFETCH_TAIL: int = 256 * 1024
+    PREFIX_CONFIDENCE: float = 0.9
+    PREFIX_INDEX: bool = True
+    PREFIX_INDEX_FILE: Path = DATA_DIR / "isbn_prefixes.json"
+    PREFIX_MIN_COUNT: int = 3
+    PREFLIGHT: bool = True
+    PUBLISHER_FUZZY_THRESHOLD: float = 0.8
+    QUARANTINE_FILE: Path = DATA_DIR / "quarantine.json"
+    QUEUE_SIZE: int = 8
+    RATE_LIMIT_FILE: Path = DATA_DIR / "ratelimit.json"
     RECURSE: bool = False
+    SCHEDULE: str = "largest"
     SEARCH_PAGES_ISBN: int = 40
     SEARCH_PAGES_PUB: int = 5
+    SERVE_ACCESS_LOG: bool = False
+    SERVE_MAX_UPLOAD: int = 512 * 1024 * 1024
+    SERVE_QUEUE_TIMEOUT: float = 30.0
+    SIDECAR: str = ""
+    SIDECAR_INDEX_FILE: Path = DATA_DIR / "metadata_index.jsonl"
     SKIP_EXISTING: bool = True
+    STAGE_WORKERS: dict[str, int] = {
+        "prefetch": 1,
+        "isbn": 2,
+        "lookup": 2,
+        "publisher": 1,
+        "render": 1,
+        "write": 1,
+    }
+    TIMEOUT_FILE: Path = DATA_DIR / "timeouts.txt"
     TITLE_LEN_MAX: int = 130
+    UNMATCHED_PUBLISHERS_FILE: Path = DATA_DIR / "unmatched_publishers.json"
+    WORKER_MAX_BOOKS: int = 200
+    WORKER_RECYCLE_RSS: int = 768 * 1024 * 1024
+    WORKER_RSS_LIMIT: int = 2048 * 1024 * 1024
     TEMPLATE1: Template = Template(
         r"[{{ PUBLISHER }}] - {{ TITLE }} - {{ SUBTITLE }}  [{{ DATE }}] [{{ ISBN }}]"
     )
@@ -30,5 +109,72 @@ class Config:
         r"[{{ PUBLISHER }}] - {{ TITLE }} [{{ DATE }}] [{{ ISBN }}]"
     )
 
+    def __init__(self, **settings: Any) -> None:
+        self.update(settings)
 
-config = Config()
+    def update(self, settings: dict[str, Any]) -> None:
+        """Overrides settings, rejecting names that are not settings."""
+        for name, value in settings.items():
+            if not hasattr(Config, name) or name.startswith("_"):
+                raise AttributeError(f"Unknown setting: {name}")
+            setattr(self, name, value)
+
+    def settings(self) -> dict[str, Any]:
+        """Returns the settings overridden on this instance."""
+        return dict(vars(self))
+
+    def copy(self, **settings: Any) -> "Config":
+        """Returns a new Config with this one's overrides plus settings."""
+        return Config(**{**self.settings(), **settings})
+
+
+_default = Config()
+_active: ContextVar[Config] = ContextVar("metabook_config")
+
+
+class ActiveConfig:
+    """The Config in effect for the current thread or task.
+
+    This is the Config made active by use_config(), or the process wide
+    default one. Attributes are read from and written to that Config, so
+    modules can keep using the module level `config` while several
+    configurations are used side by side in one process.
+    """
+
+    def _target(self) -> Config:
+        return _active.get(_default)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._target(), name, value)
+
+    def __delattr__(self, name: str) -> None:
+        delattr(self._target(), name)
+
+    def settings(self) -> dict[str, Any]:
+        return self._target().settings()
+
+    def load(self, settings: dict[str, Any]) -> None:
+        """Replaces all overrides of the active Config with settings."""
+        target = self._target()
+        vars(target).clear()
+        target.update(settings)
+
+
+@contextmanager
+def use_config(settings: Config) -> Iterator[Config]:
+    """Makes settings the active Config within the block.
+
+    Threads started by the pipeline inherit the Config active when the
+    pipeline is run.
+    """
+    token = _active.set(settings)
+    try:
+        yield settings
+    finally:
+        _active.reset(token)
+
+
+config = ActiveConfig()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""Coordinator-free work sharing between hosts processing one library."""
+
+# Core Library modules
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Optional
+
+# Local modules
+from .config import config
+
+
+def default_node() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class Coordinator:
+    """Shares the books of a library folder between several metabook processes.
+
+    Every process (node) works through the same list of books and claims each
+    one before processing it by creating a lease file with O_CREAT | O_EXCL in
+    <folder>/.metabook/leases, which succeeds for exactly one node. A lease
+    holds an expiry time that the owner renews from a heartbeat thread; a lease
+    that has expired (its node crashed) is removed so it can be claimed again.
+    Renewing, removing and releasing a lease happen under a lock file next to
+    it, so only the node that owns a lease can extend it. Finished books are
+    appended to a shared manifest, written under a lock file, so no node
+    processes them again.
+
+    Leases are keyed by the path relative to the folder, so hosts may mount the
+    share at different places. Expiry times assume the hosts' clocks are in sync.
+
+    Args:
+        folder (Path): The library folder shared by all nodes.
+        node (str): A name unique to this process, default host-pid.
+    """
+
+    def __init__(self, folder: Path, node: Optional[str] = None) -> None:
+        self.folder = Path(folder)
+        self.node = node or default_node()
+        self.root = self.folder / config.DISTRIBUTED_DIR
+        self.leases = self.root / "leases"
+        self.manifest = self.root / "manifest.jsonl"
+        self.leases.mkdir(parents=True, exist_ok=True)
+        self._held: dict[str, str] = {}
+        self._done: set[str] = set()
+        self._offset = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def _key(self, book: Path) -> str:
+        try:
+            name = Path(book).relative_to(self.folder).as_posix()
+        except ValueError:
+            name = Path(book).as_posix()
+        return name
+
+    def _lease_path(self, key: str) -> Path:
+        return self.leases / (hashlib.sha1(key.encode()).hexdigest() + ".lease")
+
+    def _lease_body(self, key: str, token: str) -> bytes:
+        lease = {
+            "book": key,
+            "node": self.node,
+            "token": token,
+            "expires": time.time() + config.LEASE_TIMEOUT,
+        }
+        return json.dumps(lease).encode()
+
+    @staticmethod
+    def _read_lease(path: Path) -> Optional[dict[str, Any]]:
+        try:
+            return json.loads(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # a lease being written; treat it as live until it is old
+            try:
+                return {"expires": path.stat().st_mtime + config.LEASE_TIMEOUT}
+            except FileNotFoundError:
+                return None
+
+    def _create(self, path: Path, body: bytes) -> bool:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+        return True
+
+    def _break_expired(self, path: Path) -> None:
+        """Removes an expired lease so that it can be claimed again."""
+        with self._file_lock(self._guard(path)):
+            lease = self._read_lease(path)
+            if lease is not None and lease["expires"] <= time.time():
+                path.unlink(missing_ok=True)
+
+    def claim(self, book: Path) -> bool:
+        """Tries to take the lease of a book.
+
+        Returns:
+            bool: True if this node now owns the book and it is not finished.
+        """
+        key = self._key(book)
+        self.refresh()
+        if key in self._done:
+            return False
+        path = self._lease_path(key)
+        token = uuid.uuid4().hex
+        if not self._create(path, self._lease_body(key, token)):
+            self._break_expired(path)
+            if not self._create(path, self._lease_body(key, token)):
+                return False
+        # the book may have finished while we were claiming it
+        self.refresh()
+        if key in self._done:
+            self._release(key, path, token)
+            return False
+        with self._lock:
+            self._held[key] = token
+        return True
+
+    def renew(self) -> None:
+        """Extends the expiry of every lease held by this node.
+
+        The owner is read again under the guard of the lease, so a lease that
+        expired and was broken and claimed by another node is dropped rather
+        than overwritten.
+        """
+        with self._lock:
+            held = dict(self._held)
+        for key, token in held.items():
+            path = self._lease_path(key)
+            with self._file_lock(self._guard(path)):
+                lease = self._read_lease(path)
+                if lease is not None and lease.get("token") == token:
+                    temp = path.with_name(f"{path.name}.{token}.tmp")
+                    temp.write_bytes(self._lease_body(key, token))
+                    os.replace(temp, path)
+                    continue
+            with self._lock:
+                self._held.pop(key, None)
+
+    def _release(self, key: str, path: Path, token: str) -> None:
+        with self._file_lock(self._guard(path)):
+            lease = self._read_lease(path)
+            if lease is not None and lease.get("token") == token:
+                path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _guard(path: Path) -> Path:
+        """Returns the lock file under which a lease is renewed or removed."""
+        return path.with_name(f"{path.name}.lock")
+
+    @contextmanager
+    def _file_lock(self, lock: Path) -> Iterator[None]:
+        while not self._create(lock, self.node.encode()):
+            try:
+                if time.time() - lock.stat().st_mtime > config.LEASE_TIMEOUT:
+                    lock.unlink(missing_ok=True)
+            except FileNotFoundError:
+                pass
+            time.sleep(0.01)
+        try:
+            yield
+        finally:
+            lock.unlink(missing_ok=True)
+
+    def refresh(self) -> None:
+        """Reads the manifest records added since the last refresh."""
+        with self._lock:
+            try:
+                with open(self.manifest, "rb") as f:
+                    f.seek(self._offset)
+                    data = f.read()
+            except FileNotFoundError:
+                return
+            end = data.rfind(b"\n") + 1
+            for line in data[:end].splitlines():
+                try:
+                    self._done.add(json.loads(line)["book"])
+                except (ValueError, KeyError):
+                    continue
+            self._offset += end
+
+    def complete(self, book: Path, status: str, result: Any = None) -> None:
+        """Records a book in the shared manifest and releases its lease."""
+        key = self._key(book)
+        record = {
+            "book": key,
+            "node": self.node,
+            "status": status,
+            "result": result,
+            "time": time.time(),
+        }
+        with self._file_lock(self.root / "manifest.lock"):
+            with open(self.manifest, "ab") as f:
+                f.write(json.dumps(record).encode() + b"\n")
+                f.flush()
+                os.fsync(f.fileno())
+        with self._lock:
+            self._done.add(key)
+            token = self._held.pop(key, None)
+        if token is not None:
+            self._release(key, self._lease_path(key), token)
+
+    def release(self, book: Path) -> None:
+        """Gives up the lease of a claimed book without recording it as done."""
+        key = self._key(book)
+        with self._lock:
+            token = self._held.pop(key, None)
+        if token is not None:
+            self._release(key, self._lease_path(key), token)
+
+    def done(self, book: Path) -> bool:
+        self.refresh()
+        return self._key(book) in self._done
+
+    def _beat(self) -> None:
+        while not self._stop.wait(config.LEASE_TIMEOUT / 3):
+            self.renew()
+
+    def start(self) -> None:
+        """Starts the heartbeat thread renewing this node's leases."""
+        self._heartbeat = threading.Thread(
+            target=self._beat, name="metabook-heartbeat", daemon=True
+        )
+        self._heartbeat.start()
+
+    def stop(self) -> None:
+        """Stops the heartbeat and releases the leases of unfinished books."""
+        self._stop.set()
+        with self._lock:
+            held, self._held = self._held, {}
+        for key, token in held.items():
+            self._release(key, self._lease_path(key), token)
+
+    def records(self) -> list[dict[str, Any]]:
+        """Returns every record of the shared manifest."""
+        try:
+            with open(self.manifest, encoding="utf-8") as f:
+                return [json.loads(line) for line in f if line.endswith("\n")]
+        except FileNotFoundError:
+            return []
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Resource governor keeping a run in the background of other workloads."""
+
+# Core Library modules
+import ctypes
+import os
+import platform
+import threading
+import time
+
+# Local modules
+from .config import config
+from .memory import MB
+from .metrics import BACKGROUND_WAIT
+
+# the number of the ioprio_set system call, which Python does not wrap
+IOPRIO_SET = {"x86_64": 251, "i686": 289, "aarch64": 30, "armv7l": 314}
+IOPRIO_WHO_PROCESS = 1
+IOPRIO_CLASS_SHIFT = 13
+IOPRIO_CLASS_BE = 2
+IOPRIO_LOWEST = 7
+
+REASONS = ("cpu", "read", "load")
+
+
+def lower_priority() -> list[str]:
+    """Lowers the CPU and I/O priority of the calling thread.
+
+    Threads and processes started afterwards inherit both, so this is called
+    before the pipeline and the extraction workers start. The nice value is
+    raised to config.BACKGROUND_NICE. The I/O priority becomes the lowest
+    best-effort one rather than the idle class, whose requests can wait
+    without limit on a busy disk and run into the book timeout.
+
+    Returns:
+        list[str]: The priorities that were set, for the user.
+    """
+    changes = []
+    try:
+        nice = os.getpriority(os.PRIO_PROCESS, 0)
+        if nice < config.BACKGROUND_NICE:
+            os.setpriority(os.PRIO_PROCESS, 0, config.BACKGROUND_NICE)
+            nice = config.BACKGROUND_NICE
+        changes.append(f"nice {nice}")
+    except (AttributeError, OSError):
+        pass
+    number = IOPRIO_SET.get(platform.machine())
+    if number is not None:
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            priority = IOPRIO_CLASS_BE << IOPRIO_CLASS_SHIFT | IOPRIO_LOWEST
+            if libc.syscall(number, IOPRIO_WHO_PROCESS, 0, priority) == 0:
+                changes.append(f"best-effort I/O priority {IOPRIO_LOWEST}")
+        except (AttributeError, OSError):
+            pass
+    return changes
+
+
+def load_limit() -> float:
+    """Returns the load average above which extraction pauses."""
+    return config.BACKGROUND_MAX_LOAD or float(os.cpu_count() or 1)
+
+
+class Governor:
+    """Paces extraction so that a run leaves the host to its other workloads.
+
+    With config.BACKGROUND set, each extraction call first waits
+        - until the CPU time of the previous call of its stage thread has been
+          balanced by rest, keeping every worker under config.BACKGROUND_CPU
+          of one core: a call using c seconds of CPU is followed by
+          c * (1 / BACKGROUND_CPU - 1) seconds of rest; large books are then
+          searched in the calling thread rather than by the page workers, so
+          that all of their CPU time is counted (see pages.use_page_workers),
+        - until the bytes read from storage so far by all workers, the
+          prefetcher and the rewriting of books have been paid for at
+          config.BACKGROUND_READ_RATE MB/s,
+        - while the one minute load average, which includes the run itself, is
+          above config.BACKGROUND_MAX_LOAD (by default the number of CPUs),
+          checking every config.BACKGROUND_POLL seconds.
+    Reads are measured after the fact, so a single call can read faster than
+    the cap, but the run as a whole cannot. The time waited for each reason is
+    counted, and its share of the workers' time is the throughput the run gave
+    up for its neighbours.
+    """
+
+    def __init__(self) -> None:
+        self.busy = 0.0
+        self.waited = dict.fromkeys(REASONS, 0.0)
+        self._read_until = 0.0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _pause(self, reason: str, seconds: float) -> float:
+        if seconds <= 0:
+            return 0.0
+        time.sleep(seconds)
+        with self._lock:
+            self.waited[reason] += seconds
+        BACKGROUND_WAIT.labels(reason).inc(seconds)
+        return seconds
+
+    def wait(self) -> float:
+        """Waits until the calling thread may start its next extraction call.
+
+        Returns:
+            float: The seconds waited, e.g. to extend the deadline of the book.
+        """
+        if not config.BACKGROUND:
+            return 0.0
+        waited = self._pause("cpu", getattr(self._local, "rest", 0.0))
+        self._local.rest = 0.0
+        with self._lock:
+            reading = self._read_until - time.monotonic()
+        waited += self._pause("read", reading)
+        while os.getloadavg()[0] > load_limit():
+            waited += self._pause("load", config.BACKGROUND_POLL)
+        return waited
+
+    def record(self, wall: float, cpu: float, read: int) -> None:
+        """Charges an extraction call of the calling thread.
+
+        Args:
+            wall (float): The wall-clock seconds of the call.
+            cpu (float): Its CPU seconds.
+            read (int): The bytes it read from storage.
+        """
+        if not config.BACKGROUND:
+            return
+        if 0 < config.BACKGROUND_CPU < 1:
+            rest = cpu * (1 / config.BACKGROUND_CPU - 1)
+            self._local.rest = getattr(self._local, "rest", 0.0) + rest
+        with self._lock:
+            self.busy += wall
+        self.charge(read)
+
+    def charge(self, read: int) -> None:
+        """Charges bytes read from storage to the read rate of the run."""
+        if not config.BACKGROUND or not config.BACKGROUND_READ_RATE or read <= 0:
+            return
+        with self._lock:
+            self._read_until = max(self._read_until, time.monotonic())
+            self._read_until += read / (config.BACKGROUND_READ_RATE * MB)
+
+    def report(self) -> str:
+        """Returns the time waited and the throughput given up by waiting."""
+        with self._lock:
+            waited = sum(self.waited.values())
+            total = waited + self.busy
+            reasons = ", ".join(
+                f"{self.waited[reason]:.1f}s {reason}" for reason in REASONS
+            )
+        share = waited / total if total else 0.0
+        return (
+            f"background: extraction waited {waited:.1f}s of {total:.1f}s "
+            f"({reasons}), giving up {share:.0%} of its throughput"
+        )
+
+
+governor = Governor()
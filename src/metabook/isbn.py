@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Single pass tokenizer finding ISBN candidates in the text of a page."""
+
+# Core Library modules
+import re
+from collections.abc import Iterator
+from typing import NamedTuple
+
+# a word, a run of digits with single separators, or something to skip; no
+# alternative can match what another does, so nothing is ever tried twice
+TOKEN = re.compile(
+    r"(?P<word>[A-Za-z](?:[A-Za-z]|-(?=[A-Za-z]))*)"
+    r"|(?P<number>[0-9](?:[- \u00a0\u2010-\u2013]?[0-9])*"
+    r"(?:[- \u00a0\u2010-\u2013]?[Xx](?![A-Za-z0-9]))?)"
+)
+GROUP_SEPARATORS = re.compile(r"[ \u00a0]")
+HYPHENS = dict.fromkeys(map(ord, "-\u2010\u2011\u2012\u2013"))
+
+LABELS = {"isbn": "ISBN", "eisbn": "eISBN", "e-isbn": "eISBN"}
+QUALIFIERS = {
+    **dict.fromkeys(
+        ("print", "pbk", "paperback", "hardback", "hardcover", "hbk", "softcover"),
+        "print",
+    ),
+    **dict.fromkeys(
+        ("ebook", "e-book", "electronic", "epdf", "epub", "pdf", "mobi", "online"),
+        "eISBN",
+    ),
+}
+# characters a label or qualifier may be away from the number it describes,
+# e.g. "ISBN-13 (pbk): " or "Print ISBN "
+LABEL_REACH = 24
+
+
+class Candidate(NamedTuple):
+    """A number in the text that may be an ISBN.
+
+    Attributes:
+        digits (str): The ten or thirteen digits without separators, the last
+            of an ISBN-10 possibly "X".
+        label (str): "ISBN", "eISBN" or "print" if the number is labelled as
+            one, e.g. by "ISBN-13 (pbk):" or a trailing "(ePDF)", otherwise "".
+        start (int): The index of its first digit in the text.
+    """
+
+    digits: str
+    label: str
+    start: int
+
+    @property
+    def isbn13(self) -> str:
+        """The candidate as an ISBN-13, converting an ISBN-10."""
+        if len(self.digits) == 13:
+            return self.digits
+        body = "978" + self.digits[:9]
+        return body + str(
+            -sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(body)) % 10
+        )
+
+
+def isbn10_valid(digits: str) -> bool:
+    if len(digits) != 10 or not digits[:9].isdigit():
+        return False
+    values = [int(d) for d in digits[:9]] + [
+        10 if digits[9] in "Xx" else int(digits[9])
+    ]
+    return sum(value * (10 - i) for i, value in enumerate(values)) % 11 == 0
+
+
+def isbn13_valid(digits: str) -> bool:
+    if len(digits) != 13 or not digits.isdigit():
+        return False
+    return sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(digits)) % 10 == 0
+
+
+def _candidates(groups: list[tuple[str, int]], label: str) -> Iterator[tuple[str, int]]:
+    """Yields the ISBNs among the space separated groups of digits of a number.
+
+    The whole number is an ISBN-13 if it has thirteen digits starting with 978
+    or 979. Otherwise an ISBN-13 or a labelled ISBN-10 with a valid check digit
+    is looked for in consecutive groups, as in "2015 978 1 4302 6451 4". A
+    window spans at most thirteen digits, so this stays linear in the groups.
+    """
+    digits = "".join(group for group, _ in groups)
+    if len(digits) == 13 and digits.isdigit() and digits[:3] in ("978", "979"):
+        yield digits, groups[0][1]
+        return
+    first = 0
+    while first < len(groups):
+        size = 0
+        for last in range(first, len(groups)):
+            size += len(groups[last][0])
+            if size > 13:
+                break
+            if size not in (10, 13):
+                continue
+            window = "".join(group for group, _ in groups[first : last + 1])
+            if (window[:3] in ("978", "979") and isbn13_valid(window)) or (
+                label and isbn10_valid(window)
+            ):
+                yield window, groups[first][1]
+                first = last
+                break
+        first += 1
+
+
+def iter_candidates(text: str) -> Iterator[Candidate]:
+    """Yields the ISBN candidates of a text in the order they appear.
+
+    The text is tokenized once, left to right, without backtracking, so the
+    time taken grows linearly with its length however many digits, separators
+    and "ISBN" labels it holds, unlike the regular expressions that were used
+    before on dense index pages.
+
+    A number is labelled if it follows "ISBN" or "eISBN" by at most
+    LABEL_REACH characters. A qualifier such as "pbk" or "ePDF" just before the
+    label or in parentheses right after the number makes the label "print" or
+    "eISBN". Thirteen digits starting with 978 or 979 are a candidate whether
+    labelled or not, ten digits only if labelled and with a valid check digit.
+    """
+    label, label_end = "", -LABEL_REACH - 1
+    qualifier, qualifier_end = "", -LABEL_REACH - 1
+    last: list[Candidate] = []
+    last_end = listed_end = -LABEL_REACH
+    for token in TOKEN.finditer(text):
+        start = token.start()
+        word = token.group("word")
+        if word is not None:
+            word = word.lower()
+            if word in LABELS:
+                label, label_end = LABELS[word], token.end()
+                if start - qualifier_end > LABEL_REACH:
+                    qualifier = ""
+            elif word in QUALIFIERS:
+                if (
+                    last
+                    and start - last_end <= 3
+                    and text[last_end:start].strip() == "("
+                ):
+                    # "978-1-119-01793-6 (ePDF)" qualifies the number before
+                    for candidate in last:
+                        yield candidate._replace(label=QUALIFIERS[word])
+                    last = []
+                else:
+                    qualifier, qualifier_end = QUALIFIERS[word], token.end()
+            continue
+        yield from last
+        last = []
+        # "ISBN 978-1-119-01792-9, 978-1-119-01793-6" labels both numbers
+        listed = start - listed_end <= 3 and not text[listed_end:start].strip(",; ")
+        current = label if start - label_end <= LABEL_REACH or listed else ""
+        if current == "ISBN" and qualifier and start - qualifier_end <= 2 * LABEL_REACH:
+            current = qualifier
+        number = token.group("number")
+        last_end = token.end()
+        if len(number) < 10:
+            continue
+        groups = []
+        offset = start
+        for group in GROUP_SEPARATORS.split(number):
+            groups.append((group.translate(HYPHENS).upper(), offset))
+            offset += len(group) + 1
+        for digits, begin in _candidates(groups, current):
+            last.append(Candidate(digits, current, begin))
+        if last:
+            listed_end = token.end() if current else -LABEL_REACH
+            qualifier = ""
+    yield from last
+
+
+def find_isbns(text: str, labelled: bool = False) -> list[str]:
+    """Returns the ISBNs in a text as ISBN-13 digits.
+
+    Args:
+        text (str): The text of a page.
+        labelled (bool): Only return numbers labelled as ISBNs.
+    """
+    return [
+        candidate.isbn13
+        for candidate in iter_candidates(text)
+        if candidate.label or not labelled
+    ]
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Profiles of the pages on which each publisher prints the ISBN."""
+
+# Core Library modules
+import json
+import os
+import re
+import threading
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Optional
+
+# Local modules
+from .config import config
+from .publishers import publishers
+
+
+def probe_order(num_pages: int, first: Sequence[int] = ()) -> list[int]:
+    """Returns the pages of a book in the order they are searched.
+
+    Args:
+        num_pages (int): The number of pages from the start to search.
+        first (Sequence[int]): Pages to search before the others, in order.
+            Pages beyond num_pages are left out.
+
+    Returns:
+        list[int]: Every page below num_pages once, those of first before the
+        rest, which follow from the front.
+    """
+    pages = [page for page in dict.fromkeys(first) if 0 <= page < num_pages]
+    chosen = set(pages)
+    return pages + [page for page in range(num_pages) if page not in chosen]
+
+
+def _squash(name: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+class PageProfiles:
+    """Counts of the pages the ISBN was found on, per publisher.
+
+    Publishers put the copyright page in a consistent spot, e.g. Packt on page
+    2 or 3 and Wiley on the first pages. Once the publisher of a book is
+    resolved, the page its ISBN was found on is counted for that publisher. A
+    new book is then searched on the pages most often counted first, followed
+    by the others from the front, so the pages extracted per book fall as more
+    books are profiled.
+
+    The publisher of a new book is guessed from its filename and folder. When
+    none is guessed, or its publisher has fewer than
+    config.PAGE_PROFILES_MIN_COUNT books counted, the counts of all publishers
+    together are used, and with fewer than that the book is searched from the
+    front.
+
+    Args:
+        path (Path): A JSON file the counts are loaded from and saved to, or
+            None to keep them in memory only.
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = path
+        self._counts: dict[str, dict[int, int]] = {}
+        self._lock = threading.Lock()
+        self._changed = False
+        if path is not None and path.exists():
+            try:
+                saved = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                print(f"Ignoring unreadable ISBN page profiles: {path}")
+            else:
+                for publisher, pages in saved.items():
+                    self._counts[publisher] = {
+                        int(page): count for page, count in pages.items()
+                    }
+
+    def predict(self, book: Path) -> Optional[str]:
+        """Returns the publisher named in a book's filename or folder, if any.
+
+        Known publishers and those profiled are matched ignoring case and
+        punctuation, e.g. "OReilly" for O'Reilly. The longest name found wins.
+        """
+        name = _squash(f"{book.parent.name} {book.name}")
+        with self._lock:
+            candidates = set(publishers) | set(self._counts)
+        found = [p for p in candidates if len(_squash(p)) > 2 and _squash(p) in name]
+        return max(found, key=lambda p: len(_squash(p))) if found else None
+
+    def order(self, book: Path) -> list[int]:
+        """Returns the pages to search a book on first, most likely first.
+
+        Returns:
+            list[int]: The pages, to be completed with probe_order, or an empty
+            list if too few books have been profiled to tell.
+        """
+        if not config.PAGE_PROFILES:
+            return []
+        publisher = self.predict(book)
+        with self._lock:
+            counts = self._counts.get(publisher or "", {})
+            if sum(counts.values()) < config.PAGE_PROFILES_MIN_COUNT:
+                counts = {}
+                for pages in self._counts.values():
+                    for page, count in pages.items():
+                        counts[page] = counts.get(page, 0) + count
+            if sum(counts.values()) < config.PAGE_PROFILES_MIN_COUNT:
+                return []
+        return sorted(counts, key=lambda page: (-counts[page], page))
+
+    def learn(self, publisher: str, page: Optional[int]) -> None:
+        """Counts the page the ISBN of a book of a publisher was found on."""
+        if page is None or publisher == "None":
+            return
+        with self._lock:
+            pages = self._counts.setdefault(publisher, {})
+            pages[page] = pages.get(page, 0) + 1
+            self._changed = True
+
+    def save(self) -> None:
+        """Writes the counts to the profiles file, if they have changed."""
+        if self.path is None or not self._changed:
+            return
+        with self._lock:
+            saved = {
+                publisher: {str(page): count for page, count in sorted(pages.items())}
+                for publisher, pages in sorted(self._counts.items())
+            }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp = self.path.with_suffix(".tmp")
+            temp.write_text(json.dumps(saved), encoding="utf-8")
+            os.replace(temp, self.path)
+            self._changed = False
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Memory measurement of the extraction workers."""
+
+# Core Library modules
+import os
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Any, Optional
+
+# Local modules
+from .config import config
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+MB = 1024 * 1024
+TOP_SITES = 10
+
+
+def rss(pid: Optional[int] = None) -> Optional[int]:
+    """Returns the resident set size of a process in bytes.
+
+    Args:
+        pid (int): The process, by default the calling one.
+
+    Returns:
+        int: The RSS, or None where /proc is not available.
+    """
+    try:
+        with open(f"/proc/{pid or 'self'}/statm", "rb") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def read_bytes() -> Optional[int]:
+    """Returns the bytes the calling thread has caused to be read from storage.
+
+    Reads served from the page cache are not counted.
+
+    Returns:
+        int: The count, or None where /proc is not available.
+    """
+    try:
+        with open("/proc/thread-self/io", "rb") as f:
+            for line in f:
+                if line.startswith(b"read_bytes:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def read_bytes_since(start: Optional[int]) -> int:
+    """Returns the bytes read by the calling thread since read_bytes() gave start."""
+    end = read_bytes()
+    return end - start if start is not None and end is not None else 0
+
+
+class CallTracer:
+    """Measures the memory and time used by one extraction call in the worker.
+
+    The RSS after the call, the wall-clock and CPU time of the call and the
+    bytes it read from storage are always recorded. When config.MEMPROFILE is set
+    tracemalloc also records the peak and retained Python allocations of the
+    call and the source lines whose allocations grew the most.
+    """
+
+    def __init__(self) -> None:
+        self.stats: dict[str, Any] = {}
+        self._before: Optional[tracemalloc.Snapshot] = None
+        self._start = 0
+        self._started = 0.0
+        self._cpu = 0.0
+        self._read: Optional[int] = None
+
+    def __enter__(self) -> "CallTracer":
+        self._started = time.perf_counter()
+        self._cpu = time.thread_time()
+        self._read = read_bytes()
+        if config.MEMPROFILE:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            self._start = tracemalloc.get_traced_memory()[0]
+            self._before = tracemalloc.take_snapshot()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stats = {
+            "rss": rss(),
+            "wall": time.perf_counter() - self._started,
+            "cpu": time.thread_time() - self._cpu,
+            "read": read_bytes_since(self._read),
+        }
+        if self._before is None or not tracemalloc.is_tracing():
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        ignore = (tracemalloc.Filter(False, tracemalloc.__file__),)
+        after = tracemalloc.take_snapshot().filter_traces(ignore)
+        grown = after.compare_to(self._before.filter_traces(ignore), "lineno")
+        self.stats.update(
+            peak=peak - self._start,
+            retained=current - self._start,
+            sites=[
+                (str(stat.traceback[0]), stat.size_diff)
+                for stat in grown[:TOP_SITES]
+                if stat.size_diff > 0
+            ],
+        )
+        self._before = None
+
+
+class MemoryProfile:
+    """Memory used per extraction function, collected from all workers."""
+
+    def __init__(self) -> None:
+        self.functions: dict[str, dict[str, int]] = {}
+        self.sites: Counter[str] = Counter()
+        self.recycles: Counter[str] = Counter()
+        self.peak_rss = 0
+        self._lock = threading.Lock()
+
+    def add(self, name: str, stats: dict[str, Any]) -> None:
+        with self._lock:
+            self.peak_rss = max(self.peak_rss, stats.get("rss") or 0)
+            if "peak" not in stats:
+                return
+            entry = self.functions.setdefault(
+                name, {"calls": 0, "peak_total": 0, "peak_max": 0, "retained": 0}
+            )
+            entry["calls"] += 1
+            entry["peak_total"] += stats["peak"]
+            entry["peak_max"] = max(entry["peak_max"], stats["peak"])
+            entry["retained"] += stats["retained"]
+            for site, size in stats["sites"]:
+                self.sites[site] += size
+
+    def recycled(self, reason: str) -> None:
+        with self._lock:
+            self.recycles[reason] += 1
+
+    def report(self) -> str:
+        """Returns the profile as a text report."""
+        lines = [
+            f"{'function':<24} {'calls':>7} {'mean peak':>10} {'max peak':>10}"
+            f" {'retained':>10}"
+        ]
+        for name, entry in sorted(self.functions.items()):
+            mean = entry["peak_total"] / entry["calls"]
+            lines.append(
+                f"{name:<24} {entry['calls']:>7} {mean / MB:>8.1f}MB"
+                f" {entry['peak_max'] / MB:>8.1f}MB {entry['retained'] / MB:>8.1f}MB"
+            )
+        lines.append("")
+        lines.append(f"largest worker RSS: {self.peak_rss / MB:.1f}MB")
+        recycles = ", ".join(f"{n} {reason}" for reason, n in self.recycles.items())
+        lines.append(f"worker recycles: {recycles or 'none'}")
+        if self.sites:
+            lines.append("")
+            lines.append("allocations retained by source line:")
+            for site, size in self.sites.most_common(TOP_SITES):
+                if size < MB / 10:
+                    break
+                lines.append(f"{size / MB:>8.1f}MB  {site}")
+        return "\n".join(lines)
+
+    def write(self, path: Optional[Path] = None) -> Path:
+        """Writes the report, by default to config.MEMPROFILE_FILE."""
+        path = path or config.MEMPROFILE_FILE
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.report() + "\n", encoding="utf-8")
+        return path
+
+
+memory_profile = MemoryProfile()
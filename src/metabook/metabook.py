@@ -3,8 +3,12 @@
 import os
 import re
 import sys
+import threading
+import time
+from collections.abc import Iterable, Iterator, Sequence
+from functools import partial
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Optional
 
 # Third party modules
 import pdfplumber
@@ -12,13 +16,61 @@
 from dotenv import load_dotenv
 from pdfrw import PdfDict, PdfReader, PdfWriter
 from PyPDF2 import PdfReader as Reader
-from PyPDF2.errors import PdfReadError
+from PyPDF2.errors import PdfReadError, WrongPasswordError
 from requests import RequestException
 
 # Local modules
+from .archives import (
+    ARCHIVE_SUFFIXES,
+    archive_members,
+    book_exists,
+    open_book,
+    release_book,
+    split_member,
+)
+from .cache import MetadataCache
+from .catalog import Catalog, query
+from .checkpoint import Checkpoint
 from .cli import _parse_args
 from .config import config
-from .publishers import publisher_mapping, publishers
+from .distributed import Coordinator
+from .governor import governor, lower_priority
+from .isbn import find_isbns
+from .locations import PageProfiles, probe_order
+from .memory import memory_profile
+from .metrics import (
+    API_LATENCY,
+    API_REQUESTS,
+    BYTES_WRITTEN,
+    MetricsExporter,
+    record_book,
+    record_cache_lookup,
+)
+from .pages import (
+    publisher_in_text,
+    search_pages,
+    stop_page_workers,
+    use_page_workers,
+)
+from .pipeline import Pipeline, Stage, format_stats
+from .prefetch import Prefetcher
+from .prefixes import PrefixIndex
+from .preflight import DECRYPT, SKIP, Quarantine, classify
+from .publishers import publishers
+from .ratelimit import rate_limiter
+from .replay import Cassette, RecordingAdapter, stub
+from .resolver import publisher_resolver
+from .scanner import locate_isbn
+from .scheduler import CostModel, schedule
+from .sidecar import SidecarWriter
+from .supervisor import (
+    BookBudget,
+    BookTimeout,
+    Supervisor,
+    WorkerError,
+    page_budget,
+    record_timeout,
+)
 
 book_apis = {
     "google": "https://www.googleapis.com/books/v1/volumes",
@@ -38,25 +90,36 @@ def find_books(directory: Path) -> list[Path]:
 
     Returns:
         List[Path]: A list of Path objects representing the matching PDF files.
+
+    Notes:
+        When config.ARCHIVES is set the PDF files inside zip and tar archives are
+        included as well, addressed by the archive's path followed by their name
+        in the archive (see archives.archive_members).
     """
     directory_path = Path(directory)
     matching_files = []
-    if config.RECURSE:
-        for file_path in directory_path.rglob("*" + ".pdf"):
-            matching_files.append(file_path)
-    else:
-        for file_path in directory_path.glob("*" + ".pdf"):
-            matching_files.append(file_path)
+    glob = directory_path.rglob if config.RECURSE else directory_path.glob
+    for file_path in glob("*" + ".pdf"):
+        matching_files.append(file_path)
+    if config.ARCHIVES:
+        for suffix in ARCHIVE_SUFFIXES:
+            for archive in glob("*" + suffix):
+                if archive.is_file():
+                    matching_files.extend(archive_members(archive))
     return matching_files
 
 
-def update_filename(book: Path, new_name: str) -> None:
+def update_filename(book: Path, new_name: str) -> Path:
     """Updates the filename of a PDF file.
 
     Args:
         book (Path): The original path to the PDF file.
         new_name (str): The new name for the PDF file (without extension).
 
+    Returns:
+        Path: The new path of the file, or the original path if it could not be
+        renamed.
+
     Raises:
         FileExistsError: If the file with the new name already exists.
 
@@ -72,6 +135,8 @@ def update_filename(book: Path, new_name: str) -> None:
         book.rename(new_path)
     except FileExistsError:
         print(f"Cannot rename file. File: {new_name} already exists")
+        return book
+    return new_path
 
 
 def write_metadata(book: Path, new_name: str) -> None:
@@ -91,7 +156,17 @@ def write_metadata(book: Path, new_name: str) -> None:
         Producer) of the provided PDF file with the new title. If any errors occur
         during the process, it catches and prints an error message.
     """
-    metadata = PdfDict(
+    try:
+        pdf_reader = PdfReader(book)
+        pdf_reader.Info.update(_info(new_name))
+        PdfWriter().write(book, pdf_reader)
+        BYTES_WRITTEN.labels("pdf").inc(book.stat().st_size)
+    except (ValueError, AttributeError, PermissionError):
+        print("An error occurred writing metadata")
+
+
+def _info(new_name: str) -> PdfDict:
+    return PdfDict(
         Title=new_name,
         Subject="",
         Author="",
@@ -99,12 +174,45 @@ def write_metadata(book: Path, new_name: str) -> None:
         Creator="",
         Producer="",
     )
-    try:
-        pdf_reader = PdfReader(book)
-        pdf_reader.Info.update(metadata)
-        PdfWriter().write(book, pdf_reader)
-    except (ValueError, AttributeError, PermissionError):
-        print("An error occurred writing metadata")
+
+
+def extract_book(book: Path, directory: Path, new_name: str, retag: bool) -> Path:
+    """Writes a book stored inside an archive to a directory under a new name.
+
+    Args:
+        book (Path): The book inside an archive.
+        directory (Path): The directory receiving the book.
+        new_name (str): The new name for the PDF file (without extension).
+        retag (bool): Write the new title into the PDF's metadata as
+            write_metadata does; otherwise the book is copied unchanged.
+
+    Returns:
+        Path: The path of the written book, or the original path if a file with
+        the new name already exists.
+    """
+    target = directory / "".join([new_name, ".pdf"])
+    if target.exists():
+        print(f"Cannot extract file. File: {target.name} already exists")
+        return book
+    with open_book(book) as f:
+        data = f.read()
+    directory.mkdir(parents=True, exist_ok=True)
+    temp = target.with_name(target.name + ".tmp")
+    if retag:
+        try:
+            pdf_reader = PdfReader(fdata=data)
+            if pdf_reader.Info is None:
+                pdf_reader.Info = PdfDict()
+            pdf_reader.Info.update(_info(new_name))
+            PdfWriter().write(temp, pdf_reader)
+        except (ValueError, AttributeError):
+            print("An error occurred writing metadata")
+            retag = False
+    if not retag:
+        temp.write_bytes(data)
+    os.replace(temp, target)
+    BYTES_WRITTEN.labels("pdf").inc(target.stat().st_size)
+    return target
 
 
 def render_template(meta: dict[str, str]) -> str:
@@ -133,6 +241,85 @@ def render_template(meta: dict[str, str]) -> str:
     return config.TEMPLATE2.render(meta)
 
 
+TEMPLATE_FIELDS = ("PUBLISHER", "TITLE", "SUBTITLE", "DATE", "ISBN")
+FIELD_PATTERNS = {"DATE": r"\d{4}|None", "ISBN": r"97[89]\d{10}"}
+_filename_patterns: dict[tuple, list[re.Pattern]] = {}
+
+
+def filename_patterns() -> list[re.Pattern]:
+    """Returns regular expressions matching the names the templates produce.
+
+    Each template is rendered with a marker for every field and normalised like
+    a real filename, then the literal text between the markers is escaped and
+    the markers become named groups. The patterns are built once per set of
+    templates and naming settings.
+
+    Returns:
+        list[re.Pattern]: The patterns of TEMPLATE1 and TEMPLATE2, in the order
+        they should be tried.
+    """
+    key = (
+        id(config.TEMPLATE1),
+        id(config.TEMPLATE2),
+        config.ALLOW_SPACE,
+        config.LOWERCASE_ONLY,
+    )
+    patterns = _filename_patterns.get(key)
+    if patterns is not None:
+        return patterns
+    markers = {field: f"\x00{n}\x00" for n, field in enumerate(TEMPLATE_FIELDS)}
+    patterns = []
+    for template in (config.TEMPLATE1, config.TEMPLATE2):
+        skeleton = normalize_filename(template.render(markers))
+        parts = re.split("\x00(\\d)\x00", skeleton)
+        regex, seen = "", set()
+        for index, part in enumerate(parts):
+            if index % 2 == 0:
+                regex += re.escape(part)
+                continue
+            field = TEMPLATE_FIELDS[int(part)]
+            if field in seen:
+                regex += f"(?P={field})"
+            else:
+                seen.add(field)
+                regex += f"(?P<{field}>{FIELD_PATTERNS.get(field, '.+?')})"
+        patterns.append(re.compile(f"^{regex}$"))
+    _filename_patterns[key] = patterns
+    return patterns
+
+
+def parse_filename(name: str) -> Optional[dict[str, Any]]:
+    """Recovers the metadata of a book from a name rendered by the templates.
+
+    Args:
+        name (str): The filename, with or without the .pdf suffix.
+
+    Returns:
+        dict: The metadata in the form returned by fetch_book_metadata, without
+        authors, or None if the name was not produced by either template.
+
+    Notes:
+        Characters removed or replaced by normalize_filename (e.g. ':' becomes
+        '-') cannot be restored, and neither can case with LOWERCASE_ONLY.
+    """
+    stem = name[:-4] if name.lower().endswith(".pdf") else name
+    for pattern in filename_patterns():
+        match = pattern.match(stem)
+        if match is None:
+            continue
+        fields = match.groupdict()
+        meta: dict[str, Any] = {}
+        for field in ("TITLE", "SUBTITLE", "AUTHORS", "DATE", "PUBLISHER", "ISBN"):
+            value = fields.get(field, "None")
+            if field == "AUTHORS":
+                value = []
+            elif not config.ALLOW_SPACE and field != "ISBN":
+                value = value.replace("_", " ")
+            meta[field] = value
+        return meta
+    return None
+
+
 def sanitize_isbn(isbn_list: list[str]) -> list[str]:
     """Cleans and sanitises a list of ISBN (International Standard Book Number) strings.
 
@@ -206,6 +393,8 @@ def output(
     new_name: Optional[str] = None,
     no_meta: bool = False,
     no_isbn: bool = False,
+    timeout: bool = False,
+    quarantined: Optional[str] = None,
 ) -> None:
     """Generates output based on specified parameters."""
 
@@ -228,6 +417,12 @@ def the_end():  # type: ignore
     if no_isbn:
         print("isbn ids cannot be found")
         the_end()
+    if timeout:
+        print("...skipping book that exceeded its time budget")
+        the_end()
+    if quarantined:
+        print(f"...skipping quarantined file: {quarantined}")
+        the_end()
 
 
 def text_block(string: str) -> str:
@@ -263,73 +458,97 @@ def text_block(string: str) -> str:
     return final_result.lstrip()
 
 
-def find_isbn_in_pdf(pdf_file: Path) -> list[str]:
-    """Extracts ISBNs from a PDF file using multiple regex patterns.
+def find_isbn_in_pdf(pdf_file: Path, encrypted: bool = False) -> list[str]:
+    """Extracts ISBNs from a PDF file.
 
     Args:
         pdf_file (Path): The Path object representing the PDF file.
+        encrypted (bool): The file is encrypted; its content streams are only
+            readable once decrypted with the empty password.
 
     Returns:
         List[str]: A list of ISBNs found in the PDF.
 
     Note:
-        This function uses two regex patterns to search for ISBNs in the PDF.
-        It stops searching after a specified number of pages
-        (config.SEARCH_PAGES_ISBN).
-    """
-    isbn_list = []
-    pattern1 = re.compile(r"(?i)ISBN(?:-13)?\D*(\d(?:\W*\d){12})", re.M)
-    pattern2 = re.compile(
-        r"(?:ISBN(?:-13)?:? )?(?=[0-9]{13}$|(?=(?:[0-9]+[- ]){4})[- 0-9]"
-        r"{17}$)97[89][- ]?[0-9]{1,5}[- ]?[0-9]+[- ]?[0-9]+[- ]?[0-9]",
-        re.M,
-    )
+        When config.FAST_SCAN is set the raw content streams are scanned first
+        (see scanner.scan_isbn) and the full text extraction is only used when
+        that finds nothing. The full extraction looks for numbers labelled as
+        ISBNs in the text of the pages, then for bare ones (see
+        isbn.iter_candidates). It stops searching after a specified number of pages
+        (config.SEARCH_PAGES_ISBN). The pages of large books are searched by
+        several processes at once when config.PAGE_WORKERS is set (see
+        pages.search_pages).
 
-    patterns = (pattern1, pattern2)
+    Raises:
+        WrongPasswordError: If an encrypted file needs a password.
     """
-    def get_isbn(pat):
-        isbns = []
-        try:
-            with pdfplumber.open(pdf_file) as pdf:
-                for count, page in enumerate(pdf.pages):
-                    print(f"page: {count}", end='')
-                    text = page.extract_text()
-                    matches = pat.findall(text)
-                    if matches:
-                        isbns.extend(matches)
-                        break
-                    if count > config.SEARCH_PAGES:
-                        break
-        except (ValueError, TypeError, KeyError):
-            print("An error has occurred whilst trying to find the ISBN")
-        return isbns
+    return locate_isbn_in_pdf(pdf_file, encrypted)[0]
+
+
+def locate_isbn_in_pdf(
+    pdf_file: Path, encrypted: bool = False, order: Sequence[int] = ()
+) -> tuple[list[str], Optional[int]]:
+    """Extracts ISBNs from a PDF file and the page they were found on.
+
+    Args:
+        pdf_file (Path): The Path object representing the PDF file.
+        encrypted (bool): The file is encrypted.
+        order (Sequence[int]): The pages to search first, e.g. those where
+            the ISBN of the publisher's books is usually printed (see
+            locations.PageProfiles).
+
+    Returns:
+        tuple[list[str], Optional[int]]: The ISBNs found and the page they were
+        found on, or ([], None).
+
+    Raises:
+        WrongPasswordError: If an encrypted file needs a password.
     """
+    if config.FAST_SCAN and not encrypted:
+        isbn_list, found_on = locate_isbn(pdf_file, order)
+        if isbn_list:
+            return isbn_list, found_on
 
-    def get_isbn(pat) -> list[str]:  # type: ignore
-        isbns = []
+    isbn_list, found_on = [], None
+    # numbers labelled as ISBNs on any page are preferred to bare ones
+    matchers = (partial(find_isbns, labelled=True), find_isbns)
+
+    def get_isbn(match: Callable[[str], list[str]]) -> tuple[list[str], Optional[int]]:
         try:
-            with open(pdf_file, "rb") as pdf:
-                pdf_reader = Reader(pdf)
-                num_pages = len(pdf_reader.pages)
-                for page_number in range(num_pages):
+            with open_book(pdf_file) as pdf:
+                pdf_reader = Reader(pdf, password="" if encrypted else None)
+                num_pages = min(len(pdf_reader.pages), config.SEARCH_PAGES_ISBN + 2)
+                pages = probe_order(num_pages, order)
+                if parallel:
+                    isbns, used, page_number = search_pages(
+                        pdf_file,
+                        pages[: page_budget.remaining(len(pages))],
+                        match,
+                        password="" if encrypted else None,
+                    )
+                    page_budget.spend(used)
+                    return isbns, page_number
+                for page_number in pages:
+                    if not page_budget.spend():
+                        break
                     page = pdf_reader.pages[page_number]
                     text = page.extract_text()
-                    matches = pat.findall(text)
+                    matches = match(text)
                     if matches:
-                        isbns.extend(matches)
-                        break
-                    if page_number > config.SEARCH_PAGES_ISBN:
-                        break
+                        return matches, page_number
+        except WrongPasswordError:
+            raise
         except (ValueError, TypeError, KeyError, IndexError, PdfReadError):
             print("An error has occurred whilst trying to find the ISBN")
-        return isbns
+        return [], None
 
-    for index, pattern in enumerate(patterns):
-        isbn_list = get_isbn(pattern)
+    parallel = use_page_workers(pdf_file)
+    for match in matchers:
+        isbn_list, found_on = get_isbn(match)
         if isbn_list:
             break
 
-    return isbn_list
+    return isbn_list, found_on
 
 
 def publisher_find(book: Path) -> Optional[str]:
@@ -345,7 +564,8 @@ def publisher_find(book: Path) -> Optional[str]:
         This function attempts to find the publisher of the provided PDF book.
         It first checks if any known publishers' names are in the book's filename.
         If not found, it searches through the text content of the book's pages
-        using pdfplumber, returning the first identified publisher.
+        using pdfplumber, returning the first identified publisher. Like the ISBN
+        search, large books are searched by config.PAGE_WORKERS processes.
 
         If an error occurs during the search process, such as ValueError,
         TypeError, or KeyError, it prints an error message indicating the issue.
@@ -354,8 +574,23 @@ def publisher_find(book: Path) -> Optional[str]:
         if publisher in book.name:
             return publisher
     try:
-        with pdfplumber.open(book) as pdf:
+        with open_book(book) as f, pdfplumber.open(f) as pdf:
+            if use_page_workers(book):
+                found, used, _ = search_pages(
+                    book,
+                    range(
+                        page_budget.remaining(
+                            min(len(pdf.pages), config.SEARCH_PAGES_PUB + 2)
+                        )
+                    ),
+                    publisher_in_text,
+                    engine="pdfplumber",
+                )
+                page_budget.spend(used)
+                return found[0] if found else None
             for count, page in enumerate(pdf.pages):
+                if not page_budget.spend():
+                    break
                 text = page.extract_text()
                 for publisher in publishers:
                     if publisher in text:
@@ -367,11 +602,17 @@ def publisher_find(book: Path) -> Optional[str]:
     return None
 
 
-def fetch_book_metadata(isbn: str) -> dict:
+def fetch_book_metadata(
+    isbn: str, session: Optional[requests.Session] = None, key: Optional[str] = None
+) -> dict:
     """Fetches book metadata from the Google Books API based on the provided ISBN.
 
     Args:
         isbn (str): The ISBN (International Standard Book Number) of the book.
+        session (requests.Session): A session whose pooled connections are
+            reused, by default a new connection is made.
+        key (str): The API key, by default the GOOGLE_BOOKS_API_KEY environment
+            variable.
 
     Returns:
         dict: A dictionary containing the fetched book metadata. The keys include:
@@ -385,14 +626,39 @@ def fetch_book_metadata(isbn: str) -> dict:
 
     Note:
         This function queries the Google Books API using the provided ISBN to
-        retrieve book metadata. The "PUBLISHER" field may undergo mapping based on
-        the `publisher_mapping` dictionary.
+        retrieve book metadata. The "PUBLISHER" field is resolved to its canonical
+        name by the publisher resolver, which also matches variants missing
+        from the `publisher_mapping` dictionary.
+
+        Requests go through the shared rate limiter, so the call waits for the
+        configured rate and daily quota. A 429 response makes every process back
+        off (honouring Retry-After) and is retried up to config.API_RETRIES times.
+        config.API_URL, if set, replaces the API's URL, e.g. with a local
+        'metabook stub' replaying recorded responses.
     """
     meta = {}
-    base_url = book_apis[config.API]
-    params = {"q": f"isbn:{isbn}", "key": api_key}
+    base_url = config.API_URL or book_apis[config.API]
+    params = {"q": f"isbn:{isbn}", "key": key or api_key}
     try:
-        response = requests.get(base_url, params=params, timeout=10)
+        for attempt in range(config.API_RETRIES + 1):
+            rate_limiter.acquire()
+            started = time.perf_counter()
+            try:
+                response = (session or requests).get(
+                    base_url, params=params, timeout=10
+                )
+            except RequestException:
+                API_REQUESTS.labels("error").inc()
+                raise
+            finally:
+                API_LATENCY.observe(time.perf_counter() - started)
+            API_REQUESTS.labels(str(response.status_code)).inc()
+            if response.status_code != 429 or attempt == config.API_RETRIES:
+                break
+            retry_after = response.headers.get("Retry-After", "")
+            rate_limiter.backoff(
+                float(retry_after) if retry_after.isdigit() else 2.0**attempt
+            )
         if response.status_code == 200:
             data = response.json()
             if "items" in data and len(data["items"]) > 0:
@@ -407,10 +673,7 @@ def fetch_book_metadata(isbn: str) -> dict:
                     meta["AUTHORS"] = metadata.get("authors", [])
                     meta["DATE"] = metadata.get("publishedDate", "None")[:4]
                     publisher = metadata.get("publisher", "None")
-                    if publisher in publisher_mapping:
-                        meta["PUBLISHER"] = publisher_mapping[publisher]
-                    else:
-                        meta["PUBLISHER"] = publisher
+                    meta["PUBLISHER"] = publisher_resolver.resolve(publisher)
                     meta["ISBN"] = isbn
         else:
             print(f"Error {response.status_code}: {response.reason}")
@@ -419,65 +682,598 @@ def fetch_book_metadata(isbn: str) -> dict:
     return meta
 
 
+class BookJob:
+    """A book travelling through the processing pipeline.
+
+    Attributes:
+        book (Path): The path of the book.
+        budget (BookBudget): The time and page budget, started when the book
+            reaches its first extraction stage.
+        isbns (list[str]): The sanitised ISBNs found in the book.
+        meta (dict): The metadata of the first ISBN.
+        new_name (str): The rendered and normalised new filename.
+        status (str): Why the book left the pipeline early, or how it finished.
+        encrypted (bool): The pre-flight check found the book encrypted.
+        seconds (float): The time spent in extraction calls for the book.
+        digest (str): The SHA-256 of the book, set by the scan phase.
+        isbn_page (int): The page the ISBNs were found on, if known.
+        written (Path): The path of the book once renamed or extracted.
+    """
+
+    def __init__(self, book: Path, status: Optional[str] = None) -> None:
+        self.book = book
+        self.budget: Optional[BookBudget] = None
+        self.isbns: list[str] = []
+        self.meta: dict = {}
+        self.new_name: Optional[str] = None
+        self.status = status
+        self.error = ""
+        self.encrypted = False
+        self.seconds = 0.0
+        self.digest = ""
+        self.isbn_page: Optional[int] = None
+        self.written: Optional[Path] = None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Returns the outcome of the job as plain data."""
+        return {
+            "book": str(self.book),
+            "status": self.status,
+            "isbns": self.isbns,
+            "meta": self.meta,
+            "new_name": self.new_name,
+            "error": self.error,
+        }
+
+
+class BookRun:
+    """The pipeline stages of a run and the resources they share.
+
+    Each stage takes a BookJob, does one step and returns it. A job whose
+    status is set has finished and is passed through the remaining stages
+    untouched. Extraction runs in supervised workers, each used by one stage
+    thread at a time and kept for reuse.
+
+    Args:
+        checkpoint (Checkpoint): Records each completed stage. Stages already
+            recorded by a previous run are not repeated.
+        catalog (Catalog): Receives the metadata and final path of each book.
+        coordinator (Coordinator): In distributed mode, only books whose lease
+            this process wins are processed.
+        cache (MetadataCache): Metadata already fetched, keyed by ISBN.
+        session (requests.Session): The HTTP session used for lookups.
+        key (str): The book API key, by default GOOGLE_BOOKS_API_KEY.
+        prefixes (PrefixIndex): Resolves publishers from ISBN prefixes before
+            falling back to searching the book.
+        quarantine (Quarantine): Books known to be unprocessable, which are
+            skipped; books failing the pre-flight check are added to it.
+        costs (CostModel): Receives the extraction time of each book, from
+            which the next runs are scheduled.
+        profiles (PageProfiles): The pages each publisher prints the ISBN on,
+            searched first; learns from every book whose publisher is known.
+    """
+
+    def __init__(
+        self,
+        checkpoint: Optional[Checkpoint] = None,
+        catalog: Optional[Catalog] = None,
+        coordinator: Optional[Coordinator] = None,
+        cache: Optional[MetadataCache] = None,
+        session: Optional[requests.Session] = None,
+        key: Optional[str] = None,
+        prefixes: Optional[PrefixIndex] = None,
+        quarantine: Optional[Quarantine] = None,
+        costs: Optional[CostModel] = None,
+        profiles: Optional[PageProfiles] = None,
+    ) -> None:
+        self.checkpoint = checkpoint
+        self.catalog = catalog
+        self.coordinator = coordinator
+        self.cache = cache if cache is not None else MetadataCache()
+        self.session = session
+        self.key = key
+        self.prefixes = prefixes if prefixes is not None else PrefixIndex()
+        self.sidecars = SidecarWriter()
+        self.prefetcher = Prefetcher()
+        self.quarantine = quarantine if quarantine is not None else Quarantine()
+        self.costs = costs if costs is not None else CostModel()
+        self.profiles = profiles if profiles is not None else PageProfiles()
+        self._supervisors: list[Supervisor] = []
+        self._idle: list[Supervisor] = []
+        self._lock = threading.Lock()
+
+    def discover(self, books: Iterable[Path]) -> Iterator[BookJob]:
+        """Yields a job for every book, marking those that need no processing.
+
+        In distributed mode books claimed by another process are left out, and
+        the lease of a claimed book that turns out to need no processing is
+        released at once. Books already renamed by metabook are skipped; their
+        metadata is read back from their names (see bootstrap).
+        """
+        for book in books:
+            if config.SKIP_EXISTING and book.name.startswith("["):
+                if config.BOOTSTRAP_NAMES:
+                    self.bootstrap(book)
+                yield BookJob(book, status="skip")
+            elif self.coordinator is not None and not self.coordinator.claim(book):
+                continue
+            elif self._get(book, "done") is not None or not book_exists(book):
+                if self.coordinator is not None:
+                    self.coordinator.release(book)
+                yield BookJob(book, status="skip")
+            else:
+                yield BookJob(book)
+
+    def bootstrap(self, book: Path) -> None:
+        """Seeds the cache, catalog and prefix index from a renamed book's name.
+
+        Existing entries are kept, as they come from the book API and hold
+        more than the name does.
+        """
+        meta = parse_filename(book.name)
+        if meta is None:
+            return
+        if meta["ISBN"] not in self.cache:
+            self.cache.put(meta["ISBN"], meta)
+            self.prefixes.learn(meta["ISBN"], meta["PUBLISHER"])
+        if self.catalog is not None and book not in self.catalog:
+            self.catalog.add(book, meta)
+
+    def finish(self, job: BookJob) -> None:
+        """Publishes the outcome of a job leaving the pipeline."""
+        report(job)
+        self.measure(job)
+        if self.coordinator is not None and job.status != "skip":
+            self.coordinator.complete(job.book, job.status or "", job.new_name)
+
+    def measure(self, job: BookJob) -> None:
+        """Counts a job leaving the pipeline in the metrics and its timings.
+
+        The timings are recorded under the path the book has after the write
+        stage, as the old one no longer exists once it is renamed. The copy
+        open_book kept of a book inside an archive is dropped here, as no stage
+        reads the book again.
+        """
+        record_book(job.status or "", job.budget.pages_used if job.budget else 0)
+        if job.seconds:
+            self.costs.record(job.written or job.book, job.seconds)
+        release_book(job.book)
+
+    def _get(self, book: Path, stage: str) -> Any:
+        if self.checkpoint is None:
+            return None
+        return self.checkpoint.get(book, stage)
+
+    def _record(self, book: Path, stage: str, data: Any = True) -> None:
+        if self.checkpoint is not None:
+            self.checkpoint.record(book, stage, data)
+
+    def _catalog(self, book: Path, meta: Optional[dict] = None) -> None:
+        if self.catalog is not None:
+            self.catalog.add(book, meta)
+
+    def _extract(self, job: BookJob, func: Callable) -> Any:
+        """Runs an extraction function for a job in this thread's supervisor."""
+        with self._lock:
+            if self._idle:
+                supervisor = self._idle.pop()
+            else:
+                supervisor = Supervisor()
+                self._supervisors.append(supervisor)
+        if job.budget is None:
+            job.budget = BookBudget()
+        started = time.perf_counter()
+        try:
+            return supervisor.call(job.budget, func, job.book)
+        except BookTimeout:
+            record_timeout(job.book)
+            job.status = "timeout"
+            self._record(job.book, "done", "timeout")
+        except WorkerError as e:
+            job.status = "error"
+            job.error = str(e)
+        finally:
+            job.seconds += time.perf_counter() - started
+            with self._lock:
+                self._idle.append(supervisor)
+        return None
+
+    def preflight(self, job: BookJob) -> BookJob:
+        """Skips quarantined books and books failing the pre-flight check."""
+        reason = self.quarantine.get(job.book)
+        if reason is None and config.PREFLIGHT:
+            verdict, reason = classify(job.book)
+            if verdict == SKIP:
+                self.quarantine.add(job.book, reason)
+            else:
+                job.encrypted = verdict == DECRYPT
+                reason = None
+        if reason is not None:
+            job.status = "quarantined"
+            job.error = reason
+            self._record(job.book, "done", "quarantined")
+        return job
+
+    def prefetch(self, job: BookJob) -> BookJob:
+        """Reads ahead the start and end of a book the ISBN stage will open."""
+        if not job.status and self._get(job.book, "isbn") is None:
+            self.prefetcher.prefetch(job.book)
+        return job
+
+    def extract_isbn(self, job: BookJob) -> BookJob:
+        try:
+            return self._extract_isbn(job)
+        finally:
+            self.prefetcher.release(job.book)
+
+    def _extract_isbn(self, job: BookJob) -> BookJob:
+        if job.status:
+            return job
+        self.preflight(job)
+        if job.status:
+            return job
+        isbns = self._get(job.book, "isbn")
+        if isbns is None:
+            located = self._extract(
+                job,
+                partial(
+                    locate_isbn_in_pdf,
+                    encrypted=job.encrypted,
+                    order=self.profiles.order(job.book),
+                ),
+            )
+            if job.status:
+                if job.encrypted and job.status == "error":
+                    self.quarantine.add(job.book, "encrypted with a password")
+                return job
+            found, job.isbn_page = located
+            isbns = sanitize_isbn(found)
+            self._record(job.book, "isbn", isbns)
+        job.isbns = isbns
+        if not isbns:
+            job.status = "no_isbn"
+            self._catalog(job.book)
+            self._record(job.book, "done", "no_isbn")
+        return job
+
+    def fetch(self, isbn: str) -> dict:
+        """Returns the metadata of an ISBN from the cache or the book API."""
+        meta = self.cache.get(isbn)
+        record_cache_lookup(meta is not None)
+        if meta is None:
+            meta = fetch_book_metadata(isbn, self.session, self.key)
+            if meta:
+                self.cache.put(isbn, meta)
+        return meta
+
+    def lookup(self, job: BookJob) -> BookJob:
+        if job.status:
+            return job
+        job.meta = self._get(job.book, "meta") or self.fetch(job.isbns[0])
+        if not job.meta:
+            job.status = "no_meta"
+            self._catalog(job.book, {"ISBN": job.isbns[0]})
+            self._record(job.book, "done", "no_meta")
+        return job
+
+    def find_publisher(self, job: BookJob) -> BookJob:
+        if job.status:
+            return job
+        if self._get(job.book, "meta") is not None:
+            return job
+        isbn = job.isbns[0]
+        if job.meta["PUBLISHER"] != "None":
+            self.prefixes.learn(isbn, job.meta["PUBLISHER"])
+        else:
+            found_publisher = None
+            if config.PREFIX_INDEX:
+                found_publisher = self.prefixes.resolve(isbn)
+            if found_publisher is None:
+                found_publisher = self._extract(job, publisher_find)
+                if job.status:
+                    return job
+                if found_publisher is not None:
+                    self.prefixes.learn(isbn, found_publisher)
+            job.meta["PUBLISHER"] = (
+                found_publisher if found_publisher is not None else "None"
+            )
+        self.profiles.learn(job.meta["PUBLISHER"], job.isbn_page)
+        self._record(job.book, "meta", job.meta)
+        return job
+
+    def render(self, job: BookJob) -> BookJob:
+        if job.status:
+            return job
+        job.new_name = normalize_filename(render_template(job.meta))
+        return job
+
+    def write(self, job: BookJob) -> BookJob:
+        if job.status:
+            return job
+        assert job.new_name is not None  # set by render for every such job
+        if config.HARDCOPY:
+            hardcopy(job.book.name, job.isbns, job.new_name)
+        if config.DRYRUN:
+            job.status = "dryrun"
+            self._catalog(job.book, job.meta)
+            self._record(job.book, "done", "dryrun")
+            return job
+        # pdfrw cannot rewrite encrypted files, so these are only renamed
+        retag = not (config.SIDECAR or job.encrypted)
+        member = split_member(job.book) is not None
+        if member:
+            if config.EXTRACT_TO is None:
+                # archives are never modified, so their books are only looked up
+                job.status = "dryrun"
+                self._catalog(job.book, job.meta)
+                self._record(job.book, "done", "dryrun")
+                return job
+            governor.wait()
+            new_path = extract_book(job.book, config.EXTRACT_TO, job.new_name, retag)
+            governor.charge(new_path.stat().st_size)
+        else:
+            if retag and not self._get(job.book, "written"):
+                # rewriting reads the whole book
+                governor.wait()
+                write_metadata(job.book, job.new_name)
+                governor.charge(job.book.stat().st_size)
+                self._record(job.book, "written")
+            new_path = update_filename(job.book, job.new_name)
+        if config.SIDECAR and not (member and new_path == job.book):
+            self.sidecars.write(new_path, job.meta)
+        self._catalog(new_path, job.meta)
+        self._record(job.book, "done", job.new_name)
+        job.written = new_path
+        job.status = "renamed"
+        return job
+
+    def steps(self) -> list[tuple[str, Callable[[BookJob], BookJob]]]:
+        """Returns the named processing steps in order."""
+        return [
+            ("prefetch", self.prefetch),
+            ("isbn", self.extract_isbn),
+            ("lookup", self.lookup),
+            ("publisher", self.find_publisher),
+            ("render", self.render),
+            ("write", self.write),
+        ]
+
+    def stages(
+        self, steps: Optional[list[tuple[str, Callable[[BookJob], BookJob]]]] = None
+    ) -> list[Stage]:
+        """Returns pipeline stages with their configured worker counts.
+
+        Args:
+            steps (list): The named steps to run, by default all of steps().
+        """
+        self.prefetcher.reset()
+        aborts = {"prefetch": self.prefetcher.abort}
+        return [
+            Stage(
+                name,
+                func,
+                config.STAGE_WORKERS.get(name, 1),
+                config.QUEUE_SIZE,
+                aborts.get(name),
+            )
+            for name, func in (steps or self.steps())
+        ]
+
+    def warm(self, workers: int) -> None:
+        """Starts extraction workers before the first book arrives."""
+        for _ in range(workers):
+            supervisor = Supervisor()
+            # sanitize_isbn is cheap and makes the worker import this module
+            supervisor.start(sanitize_isbn, [])
+            with self._lock:
+                self._supervisors.append(supervisor)
+                self._idle.append(supervisor)
+
+    def save(self) -> None:
+        """Writes the stores of the run, e.g. the cache and the timings."""
+        if self.checkpoint is not None:
+            self.checkpoint.flush()
+        if self.catalog is not None:
+            self.catalog.close()
+        self.cache.save()
+        self.prefixes.save()
+        self.profiles.save()
+        self.quarantine.save()
+        self.costs.save()
+
+    def stop(self) -> None:
+        for supervisor in self._supervisors:
+            supervisor.stop()
+        stop_page_workers()
+        if self.coordinator is not None:
+            self.coordinator.stop()
+
+
+def report(job: BookJob) -> None:
+    """Prints the outcome of a book leaving the pipeline."""
+    output(old_name=job.book.name)
+    if job.status == "skip":
+        output(skip=True)
+        return
+    if job.isbns:
+        output(isbn_list=job.isbns)
+    if job.status == "timeout":
+        output(timeout=True)
+    elif job.status == "error":
+        print(f"An error occurred whilst processing the book: {job.error}")
+    elif job.status == "no_isbn":
+        output(no_isbn=True)
+    elif job.status == "no_meta":
+        output(no_meta=True)
+    elif job.status == "quarantined":
+        output(quarantined=job.error)
+    else:
+        output(new_name=job.new_name)
+
+
+def serve(args: list[str]) -> None:
+    """Entry point of the 'metabook serve' command."""
+    # imported here as the service builds on this module
+    # Local modules
+    from .server import serve as run_server
+
+    run_server(args)
+
+
+def phase(name: str) -> Callable[[list[str]], None]:
+    """Returns the entry point of the 'metabook scan/resolve/apply' commands."""
+
+    def command(args: list[str]) -> None:
+        # imported here as the phases build on this module
+        # Local modules
+        from . import phases
+
+        getattr(phases, name)(args)
+
+    return command
+
+
+commands = {
+    "apply": phase("apply"),
+    "query": query,
+    "resolve": phase("resolve"),
+    "scan": phase("scan"),
+    "serve": serve,
+    "stub": stub,
+}
+
+
+# flags of the run commands and the setting and value each one sets
+FLAG_SETTINGS: dict[str, tuple[str, Any]] = {
+    "all": ("SKIP_EXISTING", False),
+    "dryrun": ("DRYRUN", True),
+    "log": ("HARDCOPY", True),
+    "memprofile": ("MEMPROFILE", True),
+    "recurse": ("RECURSE", True),
+}
+# options of the run commands and the setting given their value
+VALUE_SETTINGS = {
+    "api_url": "API_URL",
+    "extract_to": "EXTRACT_TO",
+    "page_budget": "PAGE_BUDGET",
+    "page_workers": "PAGE_WORKERS",
+    "prefetch": "PREFETCH_AHEAD",
+    "schedule": "SCHEDULE",
+    "sidecar": "SIDECAR",
+    "timeout": "BOOK_TIMEOUT",
+}
+
+
+def apply_options(
+    options: Any, worker_stages: Sequence[str] = ("isbn", "publisher")
+) -> None:
+    """Sets the configuration from the command line options of a run.
+
+    Args:
+        options (Namespace): The parsed options. Those a command does not have
+            leave their settings alone.
+        worker_stages (Sequence[str]): The stages whose number of workers
+            --workers sets.
+    """
+    for option, (setting, value) in FLAG_SETTINGS.items():
+        if getattr(options, option, False):
+            setattr(config, setting, value)
+    for option, setting in VALUE_SETTINGS.items():
+        if getattr(options, option, None) is not None:
+            setattr(config, setting, getattr(options, option))
+    if getattr(options, "background", False):
+        config.BACKGROUND = True
+        print(f"running in the background: {', '.join(lower_priority())}")
+    if getattr(options, "workers", None) is not None:
+        config.STAGE_WORKERS = {
+            **config.STAGE_WORKERS,
+            **dict.fromkeys(worker_stages, options.workers),
+        }
+
+
+def _open_run(
+    args: Any, folder: Path, checkpoint: Checkpoint
+) -> tuple[BookRun, Optional[Cassette]]:
+    """Opens the stores a run reads and updates and the run working on them.
+
+    Returns:
+        tuple[BookRun, Optional[Cassette]]: The run, and the cassette the book
+        API responses are recorded into with --record.
+    """
+    coordinator = None
+    if args.distributed:
+        coordinator = Coordinator(folder, args.node)
+        coordinator.start()
+    session = requests.Session()
+    cassette = None
+    if args.record:
+        cassette = Cassette(args.record)
+        recorder = RecordingAdapter(cassette)
+        session.mount("https://", recorder)
+        session.mount("http://", recorder)
+    run = BookRun(
+        checkpoint,
+        Catalog(),
+        coordinator,
+        MetadataCache(config.METADATA_CACHE_FILE),
+        session,
+        prefixes=PrefixIndex(config.PREFIX_INDEX_FILE),
+        quarantine=Quarantine(config.QUARANTINE_FILE),
+        costs=CostModel(config.COSTS_FILE),
+        profiles=PageProfiles(config.PAGE_PROFILES_FILE),
+    )
+    return run, cassette
+
+
 def main():  # type: ignore
+    if len(sys.argv) > 1 and sys.argv[1] in commands:
+        return commands[sys.argv[1]](sys.argv[2:])
     args, parser = _parse_args(sys.argv[1:])
 
     if args.folder[0] == ".":
         folder = Path(os.getcwd())
     else:
         folder = Path(args.folder[0])
-    if args.recurse:
-        config.RECURSE = True
-    if args.all:
-        config.SKIP_EXISTING = False
-    if args.dryrun:
-        config.DRYRUN = True
-    if args.log:
-        config.HARDCOPY = True
+    apply_options(args)
+    exporter = MetricsExporter(
+        config.METRICS_TEXTFILE if args.metrics_textfile else None, args.metrics_port
+    )
 
     if config.HARDCOPY_FILE.exists():
         config.HARDCOPY_FILE.unlink()
+    checkpoint = Checkpoint()
+    run, cassette = _open_run(args, folder, checkpoint)
+    pipeline = Pipeline(run.stages(), config.QUEUE_SIZE)
+    exporter.start()
     try:
-        books: list[Path] = find_books(folder)
+        if args.resume and checkpoint.exists():
+            checkpoint.load()
+            books: list[Path] = checkpoint.books
+            print(f"resuming run over {checkpoint.folder}")
+        else:
+            books = schedule(find_books(folder), run.costs)
+            checkpoint.start(folder, books)
         if books:
-            for book in books:
-                output(old_name=book.name)
-                if config.SKIP_EXISTING and book.name.startswith("["):
-                    output(skip=True)
-                    continue
-                else:
-                    isbn_numbers: list[str] = find_isbn_in_pdf(book)
-                    isbn_numbers = sanitize_isbn(isbn_numbers)
-                    if isbn_numbers:
-                        output(isbn_list=isbn_numbers)
-                        isbn_number: str = isbn_numbers[0]
-                        meta: dict[str, str] = fetch_book_metadata(isbn_number)
-                        if meta:
-                            if meta["PUBLISHER"] == "None":
-                                found_publisher = publisher_find(book)
-                                meta["PUBLISHER"] = (
-                                    found_publisher
-                                    if found_publisher is not None
-                                    else "None"
-                                )
-                            new_name: str = render_template(meta)
-                            new_name = normalize_filename(new_name)
-                            output(new_name=new_name)
-                            if config.HARDCOPY:
-                                hardcopy(book.name, isbn_numbers, new_name)
-                            if config.DRYRUN and meta:
-                                continue
-                            else:
-                                write_metadata(book, new_name)
-                                update_filename(book, new_name)
-                        else:
-                            output(no_meta=True)
-                    else:
-                        output(no_isbn=True)
+            for job in pipeline.run(run.discover(books)):
+                run.finish(job)
+            print(format_stats(pipeline.stats()))
+            print(run.prefetcher.report())
+            if config.BACKGROUND:
+                print(governor.report())
+            if config.MEMPROFILE:
+                print(f"memory profile written to {memory_profile.write()}")
         else:
             print("No books found")
+        checkpoint.finish()
     except KeyboardInterrupt:
         pass
+    finally:
+        run.save()
+        exporter.stop()
+        if cassette is not None:
+            cassette.save()
+        publisher_resolver.save()
+        run.stop()
 
 
 if __name__ == "__main__":
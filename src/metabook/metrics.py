@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""Metrics collected while processing books."""
+
+# Core Library modules
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Optional
+
+# Local modules
+from .config import config
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Cumulative histogram of observed values, e.g. request latencies.
+
+    Args:
+        buckets (tuple): The upper bounds of the buckets, in ascending order. An
+            implicit +Inf bucket holds every observation.
+    """
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Returns the upper bound of the bucket holding the q-quantile."""
+        with self._lock:
+            target = q * self.count
+            seen = 0
+            for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+                seen += count
+                if count and seen >= target:
+                    return bound
+        return 0.0
+
+    def snapshot(self) -> dict[str, Any]:
+        """Returns the cumulative bucket counts, count and sum."""
+        with self._lock:
+            cumulative, total = {}, 0
+            for bound, count in zip(self.buckets, self.counts):
+                total += count
+                cumulative[str(bound)] = total
+            cumulative["+Inf"] = self.count
+            return {"buckets": cumulative, "count": self.count, "sum": self.sum}
+
+
+class Counter:
+    """A value that only goes up, e.g. the number of books processed."""
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    """A value that goes up and down, e.g. the current throughput."""
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Metric:
+    """A named metric holding one Counter, Gauge or Histogram per label values.
+
+    Args:
+        kind (str): "counter", "gauge" or "histogram".
+        name (str): The exported name, e.g. metabook_books_total.
+        documentation (str): The help text.
+        labelnames (tuple): The names of the labels, if any.
+    """
+
+    def __init__(
+        self, kind: str, name: str, documentation: str, labelnames: tuple = ()
+    ) -> None:
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> Any:
+        """Returns the value of one combination of label values."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}")
+        with self._lock:
+            value = self._values.get(values)
+            if value is None:
+                factory = {"counter": Counter, "gauge": Gauge, "histogram": Histogram}
+                value = self._values[values] = factory[self.kind]()
+            return value
+
+    def total(self) -> float:
+        """Returns the sum of a counter over all label values."""
+        with self._lock:
+            return sum(value.value for value in self._values.values())
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def render(self) -> list[str]:
+        """Returns the metric in the Prometheus text exposition format."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            labels = dict(zip(self.labelnames, label_values))
+            if self.kind != "histogram":
+                lines.append(f"{self.name}{_labels(labels)} {value.value:g}")
+                continue
+            snapshot = value.snapshot()
+            for bound, count in snapshot["buckets"].items():
+                bucket = _labels({**labels, "le": bound})
+                lines.append(f"{self.name}_bucket{bucket} {count}")
+            lines.append(f"{self.name}_sum{_labels(labels)} {snapshot['sum']:g}")
+            lines.append(f"{self.name}_count{_labels(labels)} {snapshot['count']}")
+        return lines
+
+
+def _labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"))
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class Registry:
+    """The metrics of the process, rendered together for Prometheus."""
+
+    def __init__(self) -> None:
+        self.metrics: list[Metric] = []
+
+    def metric(
+        self, kind: str, name: str, documentation: str, labelnames: tuple = ()
+    ) -> Metric:
+        metric = Metric(kind, name, documentation, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+RUN_STARTED = registry.metric(
+    "gauge", "metabook_run_start_time_seconds", "Unix time the run started."
+)
+BACKGROUND_WAIT = registry.metric(
+    "counter",
+    "metabook_background_wait_seconds_total",
+    "Time extraction waited in background mode, by reason.",
+    ("reason",),
+)
+BOOKS = registry.metric(
+    "counter", "metabook_books_total", "Books processed by outcome.", ("status",)
+)
+BOOKS_PER_SECOND = registry.metric(
+    "gauge", "metabook_books_per_second", "Books processed per second this run."
+)
+PAGES = registry.metric(
+    "counter", "metabook_pages_extracted_total", "PDF pages extracted."
+)
+API_REQUESTS = registry.metric(
+    "counter",
+    "metabook_api_requests_total",
+    "Book API requests by HTTP status code.",
+    ("code",),
+)
+API_LATENCY = registry.metric(
+    "histogram", "metabook_api_request_seconds", "Book API request latency."
+)
+CACHE_LOOKUPS = registry.metric(
+    "counter",
+    "metabook_metadata_cache_lookups_total",
+    "Metadata cache lookups by result.",
+    ("result",),
+)
+CACHE_HIT_RATIO = registry.metric(
+    "gauge", "metabook_metadata_cache_hit_ratio", "Share of cache lookups that hit."
+)
+BYTES_WRITTEN = registry.metric(
+    "counter",
+    "metabook_bytes_written_total",
+    "Bytes written to books and sidecar files.",
+    ("kind",),
+)
+EXTRACT_SECONDS = registry.metric(
+    "counter",
+    "metabook_extract_seconds_total",
+    "Time spent by PDF extraction calls on CPU and waiting, mostly on I/O.",
+    ("kind",),
+)
+PREFETCH_BYTES = registry.metric(
+    "counter",
+    "metabook_prefetch_bytes_total",
+    "Bytes of upcoming books read ahead into the page cache.",
+)
+STAGE_LATENCY = registry.metric(
+    "histogram",
+    "metabook_stage_seconds",
+    "Time spent on one book by each pipeline stage.",
+    ("stage",),
+)
+
+
+def record_book(status: str, pages: int = 0) -> None:
+    """Counts a finished book and updates the throughput gauge."""
+    BOOKS.labels(status).inc()
+    if pages:
+        PAGES.inc(pages)
+    started = RUN_STARTED.labels().value
+    if started:
+        elapsed = max(time.time() - started, 1e-9)
+        BOOKS_PER_SECOND.set(BOOKS.total() / elapsed)
+
+
+def record_cache_lookup(hit: bool) -> None:
+    CACHE_LOOKUPS.labels("hit" if hit else "miss").inc()
+    hits = CACHE_LOOKUPS.labels("hit").value
+    CACHE_HIT_RATIO.set(hits / (hits + CACHE_LOOKUPS.labels("miss").value))
+
+
+def record_extraction(wall: float, cpu: float) -> None:
+    """Splits the wall-clock time of an extraction call into CPU and waiting."""
+    EXTRACT_SECONDS.labels("cpu").inc(cpu)
+    EXTRACT_SECONDS.labels("wait").inc(max(wall - cpu, 0.0))
+
+
+def write_textfile(path: Optional[Path] = None) -> Path:
+    """Writes the metrics for the node exporter textfile collector.
+
+    The file is replaced atomically, so the collector never reads a partial
+    one. Point the collector's --collector.textfile.directory at its folder.
+    """
+    path = path or config.METRICS_TEXTFILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    temp.write_text(registry.render(), encoding="utf-8")
+    os.replace(temp, path)
+    return path
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Serves the metrics at GET /metrics."""
+
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        data = registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        pass
+
+
+class MetricsExporter:
+    """Exports the metrics while a run is in progress.
+
+    Args:
+        textfile (Path): Rewrite this textfile every config.METRICS_INTERVAL
+            seconds and when the exporter stops.
+        port (int): Serve GET /metrics on this local port.
+    """
+
+    def __init__(self, textfile: Optional[Path] = None, port: Optional[int] = None):
+        self.textfile = textfile
+        self.server = None
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        if port is not None:
+            self.server = ThreadingHTTPServer(
+                (config.METRICS_HOST, port), MetricsHandler
+            )
+
+    def _write_periodically(self) -> None:
+        while not self._stop.wait(config.METRICS_INTERVAL):
+            write_textfile(self.textfile)
+
+    def start(self) -> None:
+        RUN_STARTED.set(time.time())
+        if self.textfile is not None:
+            write_textfile(self.textfile)
+            self._threads.append(
+                threading.Thread(target=self._write_periodically, daemon=True)
+            )
+        if self.server is not None:
+            self._threads.append(
+                threading.Thread(target=self.server.serve_forever, daemon=True)
+            )
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        if self.textfile is not None:
+            write_textfile(self.textfile)
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Text extraction of the pages of one book split across several processes."""
+
+# Core Library modules
+import multiprocessing
+import os
+import re
+import threading
+import time
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+# Third party modules
+import pdfplumber
+from PyPDF2 import PdfReader as Reader
+
+# Local modules
+from .archives import book_stat, open_book, split_member
+from .config import config
+from .publishers import publishers
+
+# the earliest position in the probe order with a match so far, shared by the
+# page workers of a search
+_first_match: Any = None
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+
+def use_page_workers(book: Path) -> bool:
+    """Returns whether the pages of a book should be searched in parallel.
+
+    Only books of at least config.PAGE_WORKERS_MIN_SIZE bytes are split across
+    config.PAGE_WORKERS processes, as each of them parses the whole document
+    before extracting its pages. Books inside archives are never split, nor
+    are books in background mode, where the governor paces extraction by the
+    CPU time and reads of the calling thread, which would not include those
+    of the page workers.
+    """
+    if config.PAGE_WORKERS < 2 or config.BACKGROUND or split_member(book) is not None:
+        return False
+    try:
+        return book_stat(book).st_size >= config.PAGE_WORKERS_MIN_SIZE
+    except OSError:
+        return False
+
+
+def find_pattern(pattern: re.Pattern, text: str) -> list[str]:
+    return pattern.findall(text)
+
+
+def publisher_in_text(text: str) -> list[str]:
+    for publisher in publishers:
+        if publisher in text:
+            return [publisher]
+    return []
+
+
+def _exit_with_owner(owner: int) -> None:
+    # a killed extraction worker cannot stop its pool, so its page workers
+    # leave once their owner is gone
+    while True:
+        time.sleep(1.0)
+        try:
+            os.kill(owner, 0)
+        except ProcessLookupError:
+            os._exit(0)
+        except PermissionError:
+            pass
+
+
+def _init_worker(first_match: Any, owner: int) -> None:
+    global _first_match
+    _first_match = first_match
+    threading.Thread(target=_exit_with_owner, args=(owner,), daemon=True).start()
+
+
+def _search(
+    book: Path,
+    pages: list[tuple[int, int]],
+    match: Callable[[str], list[str]],
+    engine: str,
+    password: Optional[str],
+) -> tuple[Optional[int], list[str], int]:
+    """Extracts pages in order until one matches or an earlier one has matched.
+
+    Args:
+        pages (list): The pages to extract with their position in the order
+            of the whole search.
+
+    Returns:
+        tuple: The position of the matching page or None, its matches and the
+        number of pages extracted.
+    """
+    used = 0
+    with open_book(book) as f:
+        if engine == "pdfplumber":
+            document = pdfplumber.open(f)
+            doc_pages = document.pages
+        else:
+            document = None
+            doc_pages = Reader(f, password=password).pages
+        try:
+            for position, page_number in pages:
+                if position >= _first_match.value:
+                    break
+                text = doc_pages[page_number].extract_text() or ""
+                used += 1
+                matches = match(text)
+                if matches:
+                    with _first_match.get_lock():
+                        _first_match.value = min(_first_match.value, position)
+                    return position, matches, used
+        finally:
+            if document is not None:
+                document.close()
+    return None, [], used
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _first_match, _pool, _pool_size
+    if _pool is None or _pool_size != config.PAGE_WORKERS:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context(
+            "forkserver" if "forkserver" in methods else "spawn"
+        )
+        _first_match = context.Value("i", 0)
+        _pool_size = config.PAGE_WORKERS
+        _pool = ProcessPoolExecutor(
+            _pool_size,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(_first_match, os.getpid()),
+        )
+    return _pool
+
+
+def search_pages(
+    book: Path,
+    pages: Sequence[int],
+    match: Callable[[str], list[str]],
+    engine: str = "PyPDF2",
+    password: Optional[str] = None,
+) -> tuple[list[str], int, Optional[int]]:
+    """Searches pages of a book for a match using several processes.
+
+    The pages are dealt round-robin to config.PAGE_WORKERS processes, each
+    opening the book itself, so all of them start at the first pages of the
+    order, usually the front matter. A worker stops at the first page after
+    one where any worker found a match, and the matches of the matching page
+    earliest in the order are returned, as a search page by page would.
+    Searches in one process take turns using the pool.
+
+    Args:
+        book (Path): The book.
+        pages (Sequence[int]): The pages to search in order, e.g. range(10)
+            or the result of locations.probe_order.
+        match (Callable): A picklable function returning the matches in the
+            text of a page, e.g. partial(find_pattern, pattern).
+        engine (str): "PyPDF2" or "pdfplumber", the library extracting text.
+        password (str): The password to decrypt the book with, if any.
+
+    Returns:
+        tuple[list[str], int, Optional[int]]: The matches of the first matching
+        page, empty if none matched, the number of pages extracted by all
+        workers and the matching page, or None.
+
+    Raises:
+        Exception: Whatever a worker raised reading the book, e.g. PdfReadError.
+    """
+    if not pages:
+        return [], 0, None
+    positions = list(enumerate(pages))
+    with _pool_lock:
+        pool = _get_pool()
+        workers = min(config.PAGE_WORKERS, len(positions))
+        _first_match.value = len(positions)
+        futures = [
+            pool.submit(_search, book, positions[n::workers], match, engine, password)
+            for n in range(workers)
+        ]
+        try:
+            results = [future.result() for future in futures]
+        finally:
+            # stops the other workers if one failed
+            _first_match.value = -1
+            wait(futures)
+    used = sum(result[2] for result in results)
+    found = [(first, matches) for first, matches, _ in results if first is not None]
+    if not found:
+        return [], used, None
+    position, matches = min(found, key=lambda result: result[0])
+    return matches, used, positions[position][1]
+
+
+def stop_page_workers() -> None:
+    """Stops the page workers of this process."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
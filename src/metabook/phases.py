@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""Scan, resolve and apply phases of a run, connected by an intermediate file.
+
+'metabook scan' extracts the ISBNs of a folder's books, which needs the books
+and CPU. 'metabook resolve' looks up their metadata, which needs the API quota
+and network but not the books. 'metabook apply' writes the metadata and renames
+the books. Each phase reads the file written by the previous one, so they can
+run at different times, on different machines and with their own number of
+workers.
+"""
+
+# Core Library modules
+import json
+import os
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from hashlib import sha256
+from pathlib import Path, PurePosixPath
+from typing import Any, Optional
+
+# Third party modules
+import requests
+
+# Local modules
+from .archives import open_book
+from .cache import MetadataCache
+from .catalog import Catalog
+from .cli import _parse_apply_args, _parse_resolve_args, _parse_scan_args
+from .config import config
+from .governor import governor
+from .locations import PageProfiles
+from .metabook import BookJob, BookRun, apply_options, find_books
+from .pipeline import Pipeline, format_stats
+from .prefixes import PrefixIndex
+from .preflight import Quarantine
+from .resolver import publisher_resolver
+from .scheduler import CostModel, schedule
+
+FORMAT = "metabook-phases/1"
+CHUNK_SIZE = 1024 * 1024
+
+
+def digest(book: Path) -> str:
+    """Returns the SHA-256 of a book's content as a hex string."""
+    hasher = sha256()
+    with open_book(book) as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class PhaseFile:
+    """The JSON lines file passing books from one phase to the next.
+
+    The first line is a header holding the format and the folder that was
+    scanned. Every other line is one book, with its path relative to that
+    folder, so the file stays valid where the folder is mounted elsewhere:
+
+        {"path": "python/testing.pdf", "sha256": "...", "isbns": [...],
+         "page": 3, "status": null, "error": "", "encrypted": false,
+         "meta": {}}
+
+    A status other than null means the book has left the run, e.g. "no_isbn".
+
+    Args:
+        path (Path): The file.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.header: dict[str, Any] = {}
+
+    @property
+    def folder(self) -> Path:
+        """The folder the paths of the books are relative to."""
+        if not self.header:
+            self.read_header()
+        return Path(self.header["folder"])
+
+    def read_header(self) -> dict[str, Any]:
+        """Reads the header of the file.
+
+        Raises:
+            ValueError: If the file was not written by a metabook phase.
+        """
+        with open(self.path, encoding="utf-8") as f:
+            header = json.loads(f.readline() or "{}")
+        if header.get("format") != FORMAT:
+            raise ValueError(f"Not a metabook phase file: {self.path}")
+        self.header = header
+        return header
+
+    def read(self) -> Iterator[dict[str, Any]]:
+        """Yields the books of the file."""
+        self.read_header()
+        with open(self.path, encoding="utf-8") as f:
+            f.readline()
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def write(self, header: dict[str, Any], records: Iterable[dict[str, Any]]) -> int:
+        """Writes a header and books, replacing the file once all are written.
+
+        Returns:
+            int: The number of books written.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_name(self.path.name + ".tmp")
+        count = 0
+        with open(temp, mode="w", encoding="utf-8") as f:
+            f.write(json.dumps({**header, "format": FORMAT}) + "\n")
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+                count += 1
+        os.replace(temp, self.path)
+        self.header = {**header, "format": FORMAT}
+        return count
+
+
+def to_record(job: BookJob, folder: Path) -> dict[str, Any]:
+    return {
+        "path": job.book.relative_to(folder).as_posix(),
+        "sha256": job.digest,
+        "isbns": job.isbns,
+        "page": job.isbn_page,
+        "status": job.status,
+        "error": job.error,
+        "encrypted": job.encrypted,
+        "meta": job.meta,
+    }
+
+
+def to_job(record: dict[str, Any], folder: Path) -> BookJob:
+    job = BookJob(folder.joinpath(*PurePosixPath(record["path"]).parts))
+    job.digest = record["sha256"]
+    job.isbns = record["isbns"]
+    job.isbn_page = record.get("page")
+    job.status = record["status"]
+    job.error = record["error"]
+    job.encrypted = record["encrypted"]
+    job.meta = record["meta"]
+    return job
+
+
+def _hash(job: BookJob) -> BookJob:
+    if not job.status:
+        job.digest = digest(job.book)
+    return job
+
+
+def _verify(job: BookJob) -> BookJob:
+    """Leaves out books that are missing or have changed since the scan."""
+    if job.status:
+        return job
+    try:
+        changed = digest(job.book) != job.digest
+    except OSError as e:
+        job.status, job.error = "error", f"cannot read the book: {e}"
+        return job
+    if changed:
+        job.status, job.error = "error", "the book has changed since it was scanned"
+    return job
+
+
+def _run_pipeline(
+    run: BookRun, steps: list, jobs: Iterable[BookJob]
+) -> Iterator[BookJob]:
+    pipeline = Pipeline(run.stages(steps), config.QUEUE_SIZE)
+    yield from pipeline.run(jobs)
+    print(format_stats(pipeline.stats()))
+    if config.BACKGROUND:
+        print(governor.report())
+
+
+def scan(args: list[str]) -> None:
+    """Entry point of the 'metabook scan' command."""
+    options, _ = _parse_scan_args(args)
+    _apply_options(options)
+    folder = Path(options.folder).resolve()
+    quarantine = Quarantine(config.QUARANTINE_FILE)
+    costs = CostModel(config.COSTS_FILE)
+    profiles = PageProfiles(config.PAGE_PROFILES_FILE)
+    run = BookRun(quarantine=quarantine, costs=costs, profiles=profiles)
+    steps = [
+        ("prefetch", run.prefetch),
+        ("isbn", run.extract_isbn),
+        ("hash", _hash),
+    ]
+    books = schedule(find_books(folder), costs)
+    header = {
+        "folder": str(folder),
+        "scanned": datetime.now().isoformat("T", "seconds"),
+    }
+
+    def records() -> Iterator[dict[str, Any]]:
+        for job in _run_pipeline(run, steps, run.discover(books)):
+            run.measure(job)
+            if job.status != "skip":
+                yield to_record(job, folder)
+
+    output = PhaseFile(options.output or config.PHASE_FILE)
+    try:
+        count = output.write(header, records())
+        print(f"scanned {count} books into {output.path}")
+    finally:
+        quarantine.save()
+        costs.save()
+        run.stop()
+
+
+def resolve(args: list[str]) -> None:
+    """Entry point of the 'metabook resolve' command."""
+    options, _ = _parse_resolve_args(args)
+    _apply_options(options)
+    source = PhaseFile(options.file)
+    cache = MetadataCache(config.METADATA_CACHE_FILE)
+    session = requests.Session()
+    run = BookRun(cache=cache, session=session)
+    folder = source.folder
+
+    def jobs() -> Iterator[BookJob]:
+        for record in source.read():
+            yield to_job(record, folder)
+
+    def resolved() -> Iterator[dict[str, Any]]:
+        for job in _run_pipeline(run, [("lookup", run.lookup)], jobs()):
+            run.measure(job)
+            yield to_record(job, folder)
+
+    try:
+        output = PhaseFile(options.output or options.file)
+        count = output.write(source.header, resolved())
+        print(f"resolved {count} books into {output.path}")
+    finally:
+        cache.save()
+        publisher_resolver.save()
+        session.close()
+        run.stop()
+
+
+def apply(args: list[str]) -> None:
+    """Entry point of the 'metabook apply' command."""
+    options, _ = _parse_apply_args(args)
+    _apply_options(options)
+    source = PhaseFile(options.file)
+    catalog = Catalog()
+    prefixes = PrefixIndex(config.PREFIX_INDEX_FILE)
+    profiles = PageProfiles(config.PAGE_PROFILES_FILE)
+    run = BookRun(catalog=catalog, prefixes=prefixes, profiles=profiles)
+    steps = [
+        ("verify", _verify),
+        ("publisher", run.find_publisher),
+        ("render", run.render),
+        ("write", run.write),
+    ]
+    folder: Optional[Path] = options.folder
+
+    def jobs() -> Iterator[BookJob]:
+        for record in source.read():
+            job = to_job(record, folder or source.folder)
+            if job.status in ("no_isbn", "no_meta"):
+                run._catalog(job.book, {"ISBN": job.isbns[0]} if job.isbns else None)
+            yield job
+
+    try:
+        for job in _run_pipeline(run, steps, jobs()):
+            run.finish(job)
+    finally:
+        catalog.close()
+        prefixes.save()
+        profiles.save()
+        run.stop()
+
+
+def _apply_options(options: Any) -> None:
+    """Sets the configuration from the options shared by the phase commands."""
+    apply_options(options, ("isbn", "hash", "lookup"))
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""Staged processing pipeline connected by bounded queues."""
+
+# Core Library modules
+import contextvars
+import queue
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from typing import Any, Callable, Optional
+
+# Local modules
+from .metrics import STAGE_LATENCY
+
+_STOP = object()
+
+
+class Stage:
+    """One step of a pipeline run by its own pool of worker threads.
+
+    Args:
+        name (str): The stage name used in the statistics.
+        func (Callable): Called with each item, returns the item to pass on.
+        workers (int): The number of threads running func.
+        maxsize (int): The capacity of the stage's input queue. A full queue
+            blocks the previous stage, which keeps memory use flat.
+        abort (Callable): Called without arguments when the pipeline fails, to
+            wake up a func that waits on a later stage, which will never
+            process the items it waits for.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Any], Any],
+        workers: int = 1,
+        maxsize: int = 8,
+        abort: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.name = name
+        self.func = func
+        self.abort = abort
+        self.workers = max(workers, 1)
+        self.queue: queue.Queue = queue.Queue(maxsize=max(maxsize, 1))
+        self.processed = 0
+        self.busy = 0.0
+        self.depth_max = 0
+        self.depth_total = 0
+        self.depth_samples = 0
+        self._running = self.workers
+        self._lock = threading.Lock()
+
+    def put(self, item: Any) -> None:
+        self.queue.put(item)
+        depth = self.queue.qsize()
+        with self._lock:
+            self.depth_max = max(self.depth_max, depth)
+            self.depth_total += depth
+            self.depth_samples += 1
+
+    def stats(self) -> dict[str, Any]:
+        """Returns the counters of the stage."""
+        return {
+            "stage": self.name,
+            "workers": self.workers,
+            "processed": self.processed,
+            "busy": self.busy,
+            "depth_max": self.depth_max,
+            "depth_mean": (
+                self.depth_total / self.depth_samples if self.depth_samples else 0.0
+            ),
+        }
+
+
+class Pipeline:
+    """Feeds items through a chain of stages and yields the finished items.
+
+    Every stage reads from its own bounded queue and writes to the next stage's
+    queue, so each resource (disk, CPU, network) runs at its own pace with its
+    own number of workers. An exception raised by a stage function stops the
+    pipeline and is re-raised by run(); the abort callbacks of the stages are
+    called so that no stage keeps waiting for the items it stopped.
+    """
+
+    def __init__(self, stages: list[Stage], maxsize: int = 8) -> None:
+        self.stages = stages
+        self.output: queue.Queue = queue.Queue(maxsize=max(maxsize, 1))
+        self._error: Optional[BaseException] = None
+        self._threads: list[threading.Thread] = []
+
+    def _next_put(self, index: int) -> Callable[[Any], None]:
+        if index + 1 < len(self.stages):
+            return self.stages[index + 1].put
+        return self.output.put
+
+    def _fail(self, error: BaseException) -> None:
+        if self._error is None:
+            self._error = error
+        for stage in self.stages:
+            if stage.abort is not None:
+                stage.abort()
+
+    def _work(self, index: int) -> None:
+        stage = self.stages[index]
+        forward = self._next_put(index)
+        while True:
+            item = stage.queue.get()
+            if item is _STOP:
+                break
+            if self._error is not None:
+                continue
+            started = time.perf_counter()
+            try:
+                item = stage.func(item)
+            except BaseException as e:  # noqa: B902
+                self._fail(e)
+                continue
+            finally:
+                elapsed = time.perf_counter() - started
+                with stage._lock:
+                    stage.processed += 1
+                    stage.busy += elapsed
+                STAGE_LATENCY.labels(stage.name).observe(elapsed)
+            forward(item)
+        with stage._lock:
+            stage._running -= 1
+            last = stage._running == 0
+        if last:
+            if index + 1 < len(self.stages):
+                for _ in range(self.stages[index + 1].workers):
+                    forward(_STOP)
+            else:
+                forward(_STOP)
+
+    def _feed(self, items: Iterable) -> None:
+        first = self.stages[0]
+        try:
+            for item in items:
+                if self._error is not None:
+                    break
+                first.put(item)
+        except BaseException as e:  # noqa: B902
+            self._fail(e)
+        for _ in range(first.workers):
+            first.put(_STOP)
+
+    def run(
+        self, items: Iterable, context: Optional[contextvars.Context] = None
+    ) -> Iterator[Any]:
+        """Starts the stage workers and yields items as they leave the last stage.
+
+        Args:
+            items (Iterable): The source of the pipeline, consumed by a feeder
+                thread that blocks while the first stage's queue is full.
+            context (Context): The context variables (e.g. the active Config)
+                the worker threads run in, by default those of the caller.
+
+        Yields:
+            Any: The items returned by the last stage, in completion order.
+        """
+        context = context or contextvars.copy_context()
+        for index, stage in enumerate(self.stages):
+            for number in range(stage.workers):
+                thread = threading.Thread(
+                    target=context.copy().run,
+                    args=(self._work, index),
+                    name=f"metabook-{stage.name}-{number}",
+                    daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+        feeder = threading.Thread(
+            target=context.copy().run,
+            args=(self._feed, items),
+            name="metabook-feed",
+            daemon=True,
+        )
+        feeder.start()
+        while True:
+            item = self.output.get()
+            if item is _STOP:
+                break
+            yield item
+        if self._error is not None:
+            raise self._error
+
+    def stats(self) -> list[dict[str, Any]]:
+        return [stage.stats() for stage in self.stages]
+
+
+def format_stats(stats: list[dict[str, Any]]) -> str:
+    """Formats the stage statistics of a pipeline run as a table."""
+    lines = [
+        f"{'stage':<10} {'workers':>7} {'books':>6} {'busy s':>8} {'queue max':>9} "
+        f"{'queue mean':>10}"
+    ]
+    for stage in stats:
+        lines.append(
+            f"{stage['stage']:<10} {stage['workers']:>7} {stage['processed']:>6} "
+            f"{stage['busy']:>8.1f} {stage['depth_max']:>9} "
+            f"{stage['depth_mean']:>10.1f}"
+        )
+    return "\n".join(lines)
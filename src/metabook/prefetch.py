@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Read-ahead of the books about to be extracted."""
+
+# Core Library modules
+import os
+import threading
+import time
+from pathlib import Path
+
+# Local modules
+from .archives import split_member
+from .config import config
+from .governor import governor
+from .memory import MB
+from .metrics import EXTRACT_SECONDS, PREFETCH_BYTES
+
+CHUNK_SIZE = 64 * 1024
+
+
+def warm_ranges(size: int) -> list[tuple[int, int]]:
+    """Returns the (offset, length) ranges of a book worth reading ahead.
+
+    These are the first config.PREFETCH_HEAD bytes, which hold the header and
+    usually the first pages with the copyright page, and the last
+    config.PREFETCH_TAIL bytes holding the trailer and cross-reference table
+    that every PDF reader starts with.
+    """
+    head = min(size, config.PREFETCH_HEAD)
+    ranges = [(0, head)] if head else []
+    tail = max(size - config.PREFETCH_TAIL, head)
+    if tail < size:
+        ranges.append((tail, size - tail))
+    return ranges
+
+
+class Prefetcher:
+    """Warms the page cache with the parts of the next books that are read first.
+
+    It runs as a pipeline stage in front of the ISBN stage, so that on slow
+    network storage the cold reads of upcoming books overlap the extraction of
+    the current one. Where os.posix_fadvise is available the kernel is asked to
+    read the ranges in the background (POSIX_FADV_WILLNEED), otherwise they are
+    read by the stage thread.
+
+    Read-ahead is bounded: at most config.PREFETCH_AHEAD books and
+    config.PREFETCH_BUDGET bytes are warmed but not yet extracted. Beyond that
+    the stage waits for the ISBN stage to release earlier books, so prefetching
+    never evicts pages it warmed before they are used. When the pipeline fails
+    the books still pending are never released, so abort ends the wait until
+    the next pipeline resets the prefetcher.
+    """
+
+    def __init__(self) -> None:
+        self.books = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.waited = 0.0
+        self._pending: dict[Path, int] = {}
+        self._aborted = False
+        self._cond = threading.Condition()
+
+    def _admit(self, book: Path, size: int) -> None:
+        started = time.perf_counter()
+        with self._cond:
+            while (
+                not self._aborted
+                and self._pending
+                and (
+                    len(self._pending) >= config.PREFETCH_AHEAD
+                    or sum(self._pending.values()) + size > config.PREFETCH_BUDGET
+                )
+            ):
+                self._cond.wait()
+            self._pending[book] = size
+            self.waited += time.perf_counter() - started
+
+    def prefetch(self, book: Path) -> int:
+        """Starts reading the first parts of a book into the page cache.
+
+        Blocks while the read-ahead budget is used up. Books inside archives
+        are left alone, as their archive is decompressed from the start anyway.
+
+        Returns:
+            int: The number of bytes warmed.
+        """
+        if not config.PREFETCH_AHEAD or split_member(book) is not None:
+            return 0
+        try:
+            fd = os.open(book, os.O_RDONLY)
+        except OSError:
+            return 0
+        try:
+            ranges = warm_ranges(os.fstat(fd).st_size)
+            size = sum(length for _, length in ranges)
+            self._admit(book, size)
+            started = time.perf_counter()
+            for offset, length in ranges:
+                if hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(fd, offset, length, os.POSIX_FADV_WILLNEED)
+                    continue
+                os.lseek(fd, offset, os.SEEK_SET)
+                while length > 0:
+                    data = os.read(fd, min(length, CHUNK_SIZE))
+                    if not data:
+                        break
+                    length -= len(data)
+        except OSError:
+            self.release(book)
+            return 0
+        finally:
+            os.close(fd)
+        with self._cond:
+            self.books += 1
+            self.bytes += size
+            self.seconds += time.perf_counter() - started
+        PREFETCH_BYTES.inc(size)
+        governor.charge(size)
+        return size
+
+    def release(self, book: Path) -> None:
+        """Returns the budget of a book whose extraction has finished."""
+        with self._cond:
+            if self._pending.pop(book, None) is not None:
+                self._cond.notify_all()
+
+    def abort(self) -> None:
+        """Releases every pending book and stops waiting for the budget."""
+        with self._cond:
+            self._aborted = True
+            self._pending.clear()
+            self._cond.notify_all()
+
+    def reset(self) -> None:
+        """Bounds the read-ahead again, e.g. for a new pipeline after abort."""
+        with self._cond:
+            self._aborted = False
+            self._pending.clear()
+
+    def report(self) -> str:
+        """Returns the time extraction spent on CPU and waiting, and the read-ahead."""
+        cpu = EXTRACT_SECONDS.labels("cpu").value
+        wait = EXTRACT_SECONDS.labels("wait").value
+        share = wait / (cpu + wait) if cpu + wait else 0.0
+        return (
+            f"extraction: {cpu:.1f}s on CPU, {wait:.1f}s waiting on I/O "
+            f"({share:.0%})\n"
+            f"prefetch: {self.books} books, {self.bytes / MB:.1f}MB in "
+            f"{self.seconds:.1f}s, {self.waited:.1f}s waiting for the budget"
+        )
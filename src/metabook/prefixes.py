@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""Index resolving the publisher of a book from its ISBN prefix."""
+
+# Core Library modules
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+# Local modules
+from .config import config
+from .publishers import isbn_prefixes
+
+# The registrant ranges of the English language groups 978-0 and 978-1, from
+# the range message of the International ISBN Agency: the seven digits after
+# the group from first to last belong to registrants of the given length.
+REGISTRANT_RANGES = {
+    "9780": (
+        (0, 1999999, 2),
+        (2000000, 6999999, 3),
+        (7000000, 8499999, 4),
+        (8500000, 8999999, 5),
+        (9000000, 9499999, 6),
+        (9500000, 9999999, 7),
+    ),
+    "9781": (
+        (0, 999999, 2),
+        (1000000, 3999999, 3),
+        (4000000, 5499999, 4),
+        (5500000, 8697999, 5),
+        (8698000, 9989999, 6),
+        (9990000, 9999999, 7),
+    ),
+}
+
+
+def registrant_prefix(isbn: str) -> Optional[str]:
+    """Returns the registrant prefix of an ISBN-13, e.g. "97814842" for Apress.
+
+    Args:
+        isbn (str): ISBN-13 digits, or a prefix of them ending on a registrant.
+
+    Returns:
+        Optional[str]: The prefix, or None if the group's ranges are not known.
+    """
+    for group, ranges in REGISTRANT_RANGES.items():
+        if isbn.startswith(group):
+            value = int(isbn[len(group) : len(group) + 7].ljust(7, "0"))
+            for first, last, length in ranges:
+                if first <= value <= last:
+                    return isbn[: len(group) + length]
+    return None
+
+
+class _Node:
+    __slots__ = ("children", "seed", "counts")
+
+    def __init__(self) -> None:
+        self.children: dict[str, "_Node"] = {}
+        self.seed: Optional[str] = None
+        self.counts: dict[str, int] = {}
+
+
+class PrefixIndex:
+    """Trie from ISBN-13 digit prefixes to publishers.
+
+    The trie is seeded with the registrant prefixes in publishers.isbn_prefixes
+    and learns from books whose publisher was resolved otherwise: each learned
+    ISBN counts its publisher at its registrant prefix (see registrant_prefix),
+    so the books of one registrant never vouch for a neighbouring one, e.g.
+    O'Reilly's 978-1-4919 for Springer's 978-1-4939. ISBNs of groups whose
+    registrant ranges are not known are not learned. A lookup walks the ISBN's
+    digits once and returns the publisher of the deepest node that is a seed,
+    or whose counts reach config.PREFIX_MIN_COUNT with one publisher holding
+    config.PREFIX_CONFIDENCE of them.
+
+    Args:
+        path (Path): A JSON file the learned counts are loaded from and saved
+            to, or None to keep them in memory only.
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = path
+        self.root = _Node()
+        self.hits = 0
+        self.misses = 0
+        self._learned: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._changed = False
+        for prefix, publisher in isbn_prefixes.items():
+            self._node(prefix).seed = publisher
+        if path is not None and path.exists():
+            try:
+                learned = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                print(f"Ignoring unreadable ISBN prefix index: {path}")
+            else:
+                for prefix, counts in learned.items():
+                    if registrant_prefix(prefix) != prefix:
+                        continue  # counted by an older version at any length
+                    for publisher, count in counts.items():
+                        self._count(prefix, publisher, count)
+
+    def _node(self, prefix: str) -> _Node:
+        node = self.root
+        for digit in prefix:
+            node = node.children.setdefault(digit, _Node())
+        return node
+
+    def _count(self, prefix: str, publisher: str, count: int) -> None:
+        counts = self._node(prefix).counts
+        counts[publisher] = counts.get(publisher, 0) + count
+        self._learned[prefix] = counts
+
+    @staticmethod
+    def _confident(node: _Node) -> Optional[str]:
+        if node.seed is not None:
+            return node.seed
+        total = sum(node.counts.values())
+        if total < config.PREFIX_MIN_COUNT:
+            return None
+        publisher = max(node.counts, key=node.counts.__getitem__)
+        if node.counts[publisher] >= config.PREFIX_CONFIDENCE * total:
+            return publisher
+        return None
+
+    def resolve(self, isbn: str) -> Optional[str]:
+        """Returns the publisher of an ISBN-13 if its prefix is known, or None."""
+        found = None
+        with self._lock:
+            node = self.root
+            for digit in isbn:
+                node = node.children.get(digit)  # type: ignore
+                if node is None:
+                    break
+                found = self._confident(node) or found
+            if found is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return found
+
+    def learn(self, isbn: str, publisher: str) -> None:
+        """Counts a publisher resolved for an ISBN-13 by other means."""
+        prefix = registrant_prefix(isbn) if len(isbn) == 13 else None
+        if prefix is None or publisher == "None":
+            return
+        with self._lock:
+            self._count(prefix, publisher, 1)
+            self._changed = True
+
+    def save(self) -> None:
+        """Writes the learned counts to the index file, if they have changed."""
+        if self.path is None or not self._changed:
+            return
+        with self._lock:
+            learned: dict[str, Any] = dict(sorted(self._learned.items()))
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp = self.path.with_suffix(".tmp")
+            temp.write_text(json.dumps(learned), encoding="utf-8")
+            os.replace(temp, self.path)
+            self._changed = False
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Cheap pre-flight classification of book files before they are parsed."""
+
+# Core Library modules
+import json
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+# Local modules
+from .archives import book_stat, open_book
+
+PROCESS = "process"
+DECRYPT = "decrypt"
+SKIP = "skip"
+
+HEAD_SIZE = 1024
+TAIL_SIZE = 4096
+XREF_SIZE = 1024
+
+STARTXREF = re.compile(rb"startxref\s+(\d+)")
+XREF_START = re.compile(rb"\s*(?:xref|\d+\s+\d+\s+obj)")
+
+
+def classify(book: Path) -> tuple[str, str]:
+    """Decides how a book should be handled from a few KB of it.
+
+    Only the header, the tail holding startxref and the trailer, and the start
+    of the cross-reference section it points to are read.
+
+    Args:
+        book (Path): The book to classify.
+
+    Returns:
+        tuple[str, str]: The verdict and the reason for it. The verdict is
+        PROCESS for a PDF that looks intact, DECRYPT for an encrypted one, which
+        is opened with the empty password and never rewritten, and SKIP for a
+        file that is empty, is not a PDF or is truncated. A startxref that is
+        missing or off is left to the parser, which rebuilds the
+        cross-reference by scanning the file, so the book is still processed
+        and the reason says so.
+    """
+    try:
+        with open_book(book) as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(0)
+            head = f.read(HEAD_SIZE)
+            f.seek(max(size - TAIL_SIZE, 0))
+            tail = f.read()
+            starts = STARTXREF.findall(tail)
+            offset = int(starts[-1]) if starts else -1
+            # offsets count from the header, which may follow some junk
+            offset += max(head.find(b"%PDF-"), 0)
+            xref = b""
+            if 0 < offset < size:
+                f.seek(offset)
+                xref = f.read(XREF_SIZE)
+    except OSError as e:
+        return SKIP, f"unreadable file ({e.strerror})"
+    if size == 0:
+        return SKIP, "empty file"
+    if b"%PDF-" not in head:
+        return SKIP, "not a PDF"
+    if b"%%EOF" not in tail:
+        return SKIP, "truncated (no %%EOF marker)"
+    reason = ""
+    if not starts:
+        reason = "no startxref, left to the parser"
+    elif not xref:
+        reason = "startxref points outside the file, left to the parser"
+    elif not XREF_START.match(xref):
+        reason = "startxref does not point at a cross-reference, left to the parser"
+    trailer = tail[tail.rfind(b"trailer") :] if b"trailer" in tail else b""
+    if b"/Encrypt" in trailer or b"/Encrypt" in xref:
+        return DECRYPT, "encrypted"
+    return PROCESS, reason
+
+
+class Quarantine:
+    """Persistent list of files known to be unprocessable, with the reason.
+
+    An entry holds the size and modification time of the file when it was
+    quarantined and no longer applies once the file has changed, so a repaired
+    or replaced file is processed again. For a book inside an archive they are
+    those of the archive.
+
+    Args:
+        path (Path): A JSON file the list is loaded from and saved to, or None
+            for a list that lives only as long as the object.
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = path
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._changed = False
+        if path is not None and path.exists():
+            try:
+                self._entries.update(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                print(f"Ignoring unreadable quarantine list: {path}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _stamp(book: Path) -> tuple[int, float]:
+        stat = book_stat(book)
+        return stat.st_size, stat.st_mtime
+
+    def get(self, book: Path) -> Optional[str]:
+        """Returns why a book is quarantined, or None if it is not."""
+        entry = self._entries.get(str(book))
+        if entry is None:
+            return None
+        try:
+            if (entry["size"], entry["mtime"]) != self._stamp(book):
+                return None
+        except OSError:
+            return None
+        return entry["reason"]
+
+    def add(self, book: Path, reason: str) -> None:
+        try:
+            size, mtime = self._stamp(book)
+        except OSError:
+            return
+        with self._lock:
+            self._entries[str(book)] = {"reason": reason, "size": size, "mtime": mtime}
+            self._changed = True
+
+    def save(self) -> None:
+        """Writes the list to its file, if it has one and has changed."""
+        if self.path is None or not self._changed:
+            return
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp = self.path.with_suffix(".tmp")
+            temp.write_text(json.dumps(self._entries, indent=1), encoding="utf-8")
+            os.replace(temp, self.path)
+            self._changed = False
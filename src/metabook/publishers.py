@@ -17,6 +17,7 @@
     "Manning Publications": "Manning",
     "Mastering Computer Science": "CRC Press",
     "McGraw Hill Professional": "McGraw Hill",
+    "McGraw-Hill Education": "McGraw Hill",
     "Mercury Learning and Information": "Mercury",
     "National Geographic Books": "No Starch Press",
     "NO STARCH PRESS, INC": "No Starch Press",
@@ -36,7 +37,9 @@
     "Real Python (Realpython.Com)": "Real Python",
     "Sams Publishing": "Sams",
     "Simon and Schuster": "Manning",
+    "Springer Nature": "Springer",
     "Springer Science & Business Media": "Springer",
+    "Springer-Verlag": "Springer",
     "Syngress Publishing": "Syngress",
     "What Every Engineer Should Know": "CRC Press",
     '"O\'Reilly Media, Inc."': "O'Reilly",
@@ -59,3 +62,74 @@
     "The Pragmatic Programmers",
     "Wiley",
 ]
+
+# ISBN-13 registrant prefixes (without hyphens) of publishers, from the
+# registration group and registrant ranges. Longer prefixes take precedence.
+isbn_prefixes = {
+    "9780070": "McGraw Hill",
+    "9780071": "McGraw Hill",
+    "9780201": "Addison-Wesley",
+    "9780321": "Addison-Wesley",
+    "9780387": "Springer",
+    "9780470": "Wiley",
+    "9780471": "Wiley",
+    "9780596": "O'Reilly",
+    "9781098": "O'Reilly",
+    "9781118": "Wiley",
+    "9781119": "Wiley",
+    "9781138": "CRC Press",
+    "9781260": "McGraw Hill",
+    "9781285": "Cengage",
+    "9781305": "Cengage",
+    "9781337": "Cengage",
+    "97814398": "CRC Press",
+    "97814419": "Springer",
+    "9781449": "O'Reilly",
+    "97814614": "Springer",
+    "97814665": "CRC Press",
+    "97814822": "CRC Press",
+    "9781491": "O'Reilly",
+    "9781492": "O'Reilly",
+    "97815932": "No Starch Press",
+    "97816172": "Manning",
+    "97816334": "Manning",
+    "97816383": "Manning",
+    "97816805": "The Pragmatic Programmers",
+    "97817185": "No Starch Press",
+    "97817821": "Packt",
+    "97817832": "Packt",
+    "97817835": "Packt",
+    "97817839": "Packt",
+    "97817843": "Packt",
+    "97817852": "Packt",
+    "97817858": "Packt",
+    "97817864": "Packt",
+    "97817871": "Packt",
+    "97817882": "Packt",
+    "97817888": "Packt",
+    "97817889": "Packt",
+    "97817891": "Packt",
+    "97817899": "Packt",
+    "97818002": "Packt",
+    "97818005": "Packt",
+    "97818010": "Packt",
+    "97818018": "Packt",
+    "97818032": "Packt",
+    "97818046": "Packt",
+    "97818051": "Packt",
+    "97818354": "Packt",
+    "97818376": "Packt",
+    "97818388": "Packt",
+    "97818389": "Packt",
+    "978184719": "Packt",
+    "978184951": "Packt",
+    "978184969": "Packt",
+    "978193435": "The Pragmatic Programmers",
+    "978193778": "The Pragmatic Programmers",
+    "978194122": "The Pragmatic Programmers",
+    "9783030": "Springer",
+    "9783031": "Springer",
+    "9783319": "Springer",
+    "9783540": "Springer",
+    "9783642": "Springer",
+}
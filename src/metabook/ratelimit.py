@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Token bucket rate limiter for API calls shared between processes."""
+
+# Core Library modules
+import json
+import os
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+# Local modules
+from .config import config
+
+try:
+    # Core Library modules
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+    # Core Library modules
+    import msvcrt
+
+
+@contextmanager
+def locked_file(path: os.PathLike) -> Iterator[Any]:
+    """Holds an exclusive lock on path (created if needed) for the block."""
+    with open(path, mode="a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:  # pragma: no cover
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield f
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:  # pragma: no cover
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _quota_day(now: float) -> str:
+    """Returns the quota period that now falls in, as an ISO date."""
+    shifted = datetime.fromtimestamp(now, timezone.utc) - timedelta(
+        hours=config.API_QUOTA_RESET_HOUR
+    )
+    return shifted.date().isoformat()
+
+
+def _next_quota_day(now: float) -> float:
+    """Returns the number of seconds until the quota period after now begins."""
+    start = datetime.fromisoformat(_quota_day(now)).replace(tzinfo=timezone.utc)
+    reset = start + timedelta(days=1, hours=config.API_QUOTA_RESET_HOUR)
+    return max(reset.timestamp() - now, 0.0)
+
+
+class RateLimiter:
+    """Token bucket with a daily quota, persisted in config.RATE_LIMIT_FILE.
+
+    Every process of a run (and every later run) that uses the same file draws
+    from the same bucket: config.API_RATE tokens per second up to a burst of
+    config.API_BURST, and at most config.API_DAILY_QUOTA requests per quota day
+    (0 for no quota). The state is read and written under an exclusive file
+    lock so concurrent processes never overspend. Callers block until a token
+    is available rather than failing.
+    """
+
+    def _update(self, state: dict[str, Any], now: float) -> dict[str, Any]:
+        day = _quota_day(now)
+        if state.get("day") != day:
+            state["day"] = day
+            state["used"] = 0
+        elapsed = max(now - state.get("updated", now), 0.0)
+        state["tokens"] = min(
+            float(config.API_BURST),
+            state.get("tokens", float(config.API_BURST)) + elapsed * config.API_RATE,
+        )
+        state["updated"] = now
+        return state
+
+    @contextmanager
+    def _state(self) -> Iterator[dict[str, Any]]:
+        path = config.RATE_LIMIT_FILE
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with locked_file(path.with_suffix(".lock")):
+            try:
+                state = json.loads(path.read_text(encoding="utf-8"))
+            except (FileNotFoundError, json.JSONDecodeError):
+                state = {}
+            state = self._update(state, time.time())
+            yield state
+            temp = path.with_suffix(".tmp")
+            temp.write_text(json.dumps(state), encoding="utf-8")
+            os.replace(temp, path)
+
+    def acquire(self) -> float:
+        """Takes one token, waiting for the bucket or the daily quota to refill.
+
+        Returns:
+            float: The number of seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._state() as state:
+                now = state["updated"]
+                if state.get("blocked_until", 0.0) > now:
+                    wait = state["blocked_until"] - now
+                elif config.API_DAILY_QUOTA and state["used"] >= config.API_DAILY_QUOTA:
+                    wait = _next_quota_day(now)
+                    print(f"Daily API quota used, waiting {wait / 3600:.1f} hours")
+                elif state["tokens"] >= 1.0:
+                    state["tokens"] -= 1.0
+                    state["used"] += 1
+                    return waited
+                else:
+                    wait = (1.0 - state["tokens"]) / config.API_RATE
+            time.sleep(wait)
+            waited += wait
+
+    def backoff(self, seconds: float) -> None:
+        """Stops every process from sending requests for the given time.
+
+        Used when the API answers 429 Too Many Requests. The request that was
+        throttled is handed back to the daily quota.
+        """
+        with self._state() as state:
+            until = state["updated"] + seconds
+            state["blocked_until"] = max(state.get("blocked_until", 0.0), until)
+            state["tokens"] = 0.0
+            state["used"] = max(state["used"] - 1, 0)
+
+    def usage(self) -> int:
+        """Returns the number of requests made in the current quota day."""
+        with self._state() as state:
+            return int(state["used"])
+
+
+rate_limiter = RateLimiter()
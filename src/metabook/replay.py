@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""Recording of book API responses and a local stub API replaying them."""
+
+# Core Library modules
+import gzip
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlsplit
+
+# Third party modules
+from requests.adapters import HTTPAdapter
+
+# Local modules
+from .cli import _parse_stub_args
+
+# The parts of a volume that fetch_book_metadata reads
+VOLUME_FIELDS = (
+    "title",
+    "subtitle",
+    "description",
+    "authors",
+    "publishedDate",
+    "publisher",
+)
+
+
+def compact_body(body: Any) -> Any:
+    """Keeps only the first volume and the fields metabook uses of a response."""
+    if not isinstance(body, dict) or "items" not in body:
+        return body
+    items = []
+    for item in body["items"][:1]:
+        info = item.get("volumeInfo", {})
+        items.append({"volumeInfo": {k: info[k] for k in VOLUME_FIELDS if k in info}})
+    return {"totalItems": body.get("totalItems", len(items)), "items": items}
+
+
+class Cassette:
+    """Book API responses keyed by query, e.g. "isbn:9781838826581".
+
+    Each entry holds the status code, the compacted JSON body and the time the
+    real API took to answer. The file is JSON, gzip compressed if its name ends
+    in .gz.
+
+    Args:
+        path (Path): The cassette file; loaded if it exists.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.entries: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._changed = False
+        if self.path.exists():
+            opener: Any = gzip.open if self.path.suffix == ".gz" else open
+            with opener(self.path, "rt", encoding="utf-8") as f:
+                self.entries.update(json.load(f))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, query: str) -> Optional[dict[str, Any]]:
+        return self.entries.get(query)
+
+    def record(self, query: str, status: int, body: Any, elapsed: float) -> None:
+        entry = {"status": status, "body": compact_body(body), "elapsed": elapsed}
+        with self._lock:
+            self.entries[query] = entry
+            self._changed = True
+
+    def save(self) -> None:
+        """Writes the cassette, if it has changed."""
+        if not self._changed:
+            return
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp = self.path.with_name(self.path.name + ".tmp")
+            opener: Any = gzip.open if self.path.suffix == ".gz" else open
+            with opener(temp, "wt", encoding="utf-8") as f:
+                json.dump(self.entries, f, separators=(",", ":"))
+            os.replace(temp, self.path)
+            self._changed = False
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Transport adapter saving the book API responses into a cassette.
+
+    Mount it on the session used for lookups. Throttled (429) responses are
+    not recorded, and neither is the API key, which is only part of the URL.
+    """
+
+    def __init__(self, cassette: Cassette, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def send(self, request: Any, **kwargs: Any) -> Any:
+        response = super().send(request, **kwargs)
+        query = parse_qs(urlsplit(request.url).query).get("q")
+        if query and response.status_code != 429:
+            try:
+                body = response.json()
+            except ValueError:
+                body = response.text
+            elapsed = response.elapsed.total_seconds()
+            self.cassette.record(query[0], response.status_code, body, elapsed)
+        return response
+
+
+class StubAPI:
+    """Answers book API queries from a cassette with injected faults.
+
+    Faults are deterministic for a given order of requests: every burst_every
+    requests begin a burst of burst_length 429 responses carrying a
+    Retry-After of retry_after seconds, and other requests fail with a 503 with
+    probability error_rate, drawn from a generator seeded with seed.
+
+    Args:
+        cassette (Cassette): The recorded responses. Unknown queries get an
+            empty result, as the real API gives for unknown ISBNs.
+        latency (float): The delay of every response in seconds, or None to
+            replay the delays recorded in the cassette.
+        error_rate (float): The share of requests failing with 503.
+        burst_every (int): The number of requests between 429 bursts, 0 for
+            none.
+        burst_length (int): The number of 429 responses in a burst.
+        retry_after (int): The Retry-After header of the 429 responses.
+        seed (int): The seed of the error generator.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        latency: Optional[float] = None,
+        error_rate: float = 0.0,
+        burst_every: int = 0,
+        burst_length: int = 1,
+        retry_after: int = 1,
+        seed: int = 0,
+    ) -> None:
+        self.cassette = cassette
+        self.latency = latency
+        self.error_rate = error_rate
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.retry_after = retry_after
+        self.requests = 0
+        self.statuses: dict[int, int] = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def respond(self, query: str) -> tuple[int, dict[str, str], Any, float]:
+        """Returns the status, headers, body and delay of the next response."""
+        entry = self.cassette.get(query) or {
+            "status": 200,
+            "body": {"kind": "books#volumes", "totalItems": 0},
+            "elapsed": 0.0,
+        }
+        delay = entry["elapsed"] if self.latency is None else self.latency
+        with self._lock:
+            number = self.requests
+            self.requests += 1
+            failed = self._random.random() < self.error_rate
+            if self.burst_every and number % self.burst_every < self.burst_length:
+                status = 429
+            elif failed:
+                status = 503
+            else:
+                status = entry["status"]
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+        if status == 429:
+            error = {"error": {"code": 429, "message": "Rate Limit Exceeded"}}
+            return status, {"Retry-After": str(self.retry_after)}, error, delay
+        if status == 503:
+            return status, {}, {"error": {"code": 503}}, delay
+        return status, {}, entry["body"], delay
+
+    def serve(self, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+        """Returns a server for the stub; run its serve_forever() to answer.
+
+        The API is served at http://host:port/books/v1/volumes, which is the
+        URL to set as config.API_URL.
+        """
+        handler = type("Handler", (StubRequestHandler,), {"stub": self})
+        return ThreadingHTTPServer((host, port), handler)
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """Handles GET /books/v1/volumes?q=... like the Google Books API."""
+
+    stub: StubAPI
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:  # noqa: N802
+        url = urlsplit(self.path)
+        query = parse_qs(url.query).get("q")
+        headers: dict[str, str]
+        if url.path != "/books/v1/volumes" or not query:
+            status, headers, body, delay = 404, {}, {"error": {"code": 404}}, 0.0
+        else:
+            status, headers, body, delay = self.stub.respond(query[0])
+        time.sleep(delay)
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        pass
+
+
+def stub(args: list[str]) -> None:
+    """Entry point of the 'metabook stub' command."""
+    options, parser = _parse_stub_args(args)
+    api = StubAPI(
+        Cassette(options.cassette),
+        latency=options.latency,
+        error_rate=options.error_rate,
+        burst_every=options.burst_every,
+        burst_length=options.burst_length,
+        retry_after=options.retry_after,
+        seed=options.seed,
+    )
+    server = api.serve(options.host, options.port)
+    host, port = options.host, server.server_address[1]
+    print(f"replaying {len(api.cassette)} responses at http://{host}:{port}")
+    print(f"use: metabook --api-url http://{host}:{port}/books/v1/volumes ...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"answered {api.requests} requests: {api.statuses}")
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Resolution of publisher name variants to their canonical names."""
+
+# Core Library modules
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+# Local modules
+from .config import config
+from .publishers import publisher_mapping, publishers
+
+# Words dropped from the end of a name, e.g. "Packt Publishing Ltd" -> "packt"
+SUFFIXES = {
+    "co",
+    "company",
+    "corp",
+    "corporation",
+    "gmbh",
+    "inc",
+    "incorporated",
+    "limited",
+    "llc",
+    "ltd",
+    "media",
+    "plc",
+    "press",
+    "pub",
+    "publisher",
+    "publishers",
+    "publishing",
+    "publications",
+    "pvt",
+}
+
+
+def normalize_publisher(name: str) -> str:
+    """Returns the key of a publisher name that its variants have in common.
+
+    The name is casefolded and stripped of accents, quotes and punctuation, "&"
+    becomes "and", and a leading "the" and trailing corporate suffixes are
+    dropped, e.g. '"O'Reilly Media, Inc."' and "O'REILLY" both become "oreilly".
+    """
+    key = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    key = key.casefold().replace("&", " and ")
+    key = re.sub(r"['\"`]", "", key)
+    words = re.sub(r"[^a-z0-9]+", " ", key).split()
+    if len(words) > 1 and words[0] == "the":
+        words = words[1:]
+    while len(words) > 1 and words[-1] in SUFFIXES:
+        words = words[:-1]
+    return " ".join(words)
+
+
+def trigrams(key: str) -> set[str]:
+    padded = f"  {key} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class PublisherResolver:
+    """Maps publisher names to the canonical names used in filenames.
+
+    The names and variants of publishers.publishers and publisher_mapping are
+    indexed by their normalized key, so a lookup is one normalization and one
+    dictionary access; results are memoized per raw name. A name whose key is
+    not indexed is matched against the keys sharing its trigrams, and accepted
+    if the Dice similarity reaches config.PUBLISHER_FUZZY_THRESHOLD. Names left
+    unmatched are passed through unchanged and counted, so that they can be
+    added to publisher_mapping; see save().
+    """
+
+    def __init__(self) -> None:
+        self.keys: dict[str, str] = {}
+        self.grams: dict[str, set[str]] = {}
+        self.unmatched: Counter[str] = Counter()
+        self._memo: dict[str, tuple[str, bool]] = {}
+        self._lock = threading.Lock()
+        for publisher in publishers:
+            self.add(publisher, publisher)
+        for variant, publisher in publisher_mapping.items():
+            self.add(variant, publisher)
+
+    def add(self, name: str, publisher: str) -> None:
+        """Indexes name as a variant of the canonical publisher."""
+        key = normalize_publisher(name)
+        if not key:
+            return
+        self.keys.setdefault(key, publisher)
+        for gram in trigrams(key):
+            self.grams.setdefault(gram, set()).add(key)
+
+    def _fuzzy(self, key: str) -> Optional[str]:
+        grams = trigrams(key)
+        shared: Counter[str] = Counter()
+        for gram in grams:
+            shared.update(self.grams.get(gram, ()))
+        best, best_score = None, 0.0
+        for candidate, count in shared.items():
+            score = 2 * count / (len(grams) + len(trigrams(candidate)))
+            if score > best_score:
+                best, best_score = candidate, score
+        if best is not None and best_score >= config.PUBLISHER_FUZZY_THRESHOLD:
+            return self.keys[best]
+        return None
+
+    def resolve(self, name: str) -> str:
+        """Returns the canonical name of a publisher, or name if unknown."""
+        if name == "None":
+            return name
+        memo = self._memo.get(name)
+        if memo is None:
+            key = normalize_publisher(name)
+            found = self.keys.get(key) or (self._fuzzy(key) if key else None)
+            memo = self._memo[name] = (found or name, found is not None)
+        if not memo[1]:
+            with self._lock:
+                self.unmatched[name] += 1
+        return memo[0]
+
+    def save(self, path: Optional[Path] = None) -> None:
+        """Adds this run's unmatched names to the unmatched publishers report.
+
+        The report is a JSON object from each unmatched name to the number of
+        times it was seen, most frequent first, by default in
+        config.UNMATCHED_PUBLISHERS_FILE.
+        """
+        path = path or config.UNMATCHED_PUBLISHERS_FILE
+        with self._lock:
+            if not self.unmatched:
+                return
+            seen: Counter[str] = Counter()
+            try:
+                seen.update(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                pass
+            seen.update(self.unmatched)
+            self.unmatched.clear()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp = path.with_suffix(".tmp")
+            temp.write_text(json.dumps(dict(seen.most_common()), indent=2))
+            os.replace(temp, path)
+
+
+publisher_resolver = PublisherResolver()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""Fast-path ISBN scanner working directly on raw page content streams."""
+
+# Core Library modules
+from collections.abc import Iterator, Sequence
+from pathlib import Path
+from typing import Optional
+
+# Third party modules
+from PyPDF2 import PdfReader as Reader
+from PyPDF2.errors import PdfReadError
+
+# Local modules
+from .archives import open_book
+from .config import config
+from .isbn import find_isbns, isbn13_valid
+from .locations import probe_order
+
+TEXT_SHOW_OPERATORS = {b"Tj", b"TJ", b"'", b'"'}
+TEXT_MOVE_OPERATORS = {b"Td", b"TD", b"Tm", b"T*", b"'", b'"', b"ET"}
+WHITESPACE = b" \t\r\n\f\x00"
+DELIMITERS = b"()<>[]{}/%"
+TOKEN_END = WHITESPACE + DELIMITERS
+ESCAPES = {
+    ord("n"): b"\n",
+    ord("r"): b"\r",
+    ord("t"): b"\t",
+    ord("b"): b"\b",
+    ord("f"): b"\f",
+}
+KERNING_SPACE = -200
+
+
+def _literal_string(data: bytes, pos: int) -> tuple[bytes, int]:
+    """Decodes a PDF literal string starting just after its opening parenthesis.
+
+    Args:
+        data (bytes): The content stream.
+        pos (int): Index of the first byte after the opening '('.
+
+    Returns:
+        tuple[bytes, int]: The decoded string and the index after the closing ')'.
+    """
+    out = bytearray()
+    depth = 1
+    length = len(data)
+    while pos < length:
+        char = data[pos]
+        if char == 0x5C:  # backslash
+            pos += 1
+            if pos >= length:
+                break
+            char = data[pos]
+            if char in ESCAPES:
+                out += ESCAPES[char]
+            elif 0x30 <= char <= 0x37:
+                end = pos
+                while end < length and end - pos < 3 and 0x30 <= data[end] <= 0x37:
+                    end += 1
+                out.append(int(data[pos:end], 8) & 0xFF)
+                pos = end
+                continue
+            elif char == 0x0D:
+                if pos + 1 < length and data[pos + 1] == 0x0A:
+                    pos += 1
+            elif char != 0x0A:
+                out.append(char)
+        elif char == 0x28:
+            depth += 1
+            out.append(char)
+        elif char == 0x29:
+            depth -= 1
+            if depth == 0:
+                return bytes(out), pos + 1
+            out.append(char)
+        else:
+            out.append(char)
+        pos += 1
+    return bytes(out), pos
+
+
+def _hex_string(data: bytes, pos: int) -> tuple[bytes, int]:
+    """Decodes a PDF hex string starting just after its opening angle bracket.
+
+    Args:
+        data (bytes): The content stream.
+        pos (int): Index of the first byte after the opening '<'.
+
+    Returns:
+        tuple[bytes, int]: The decoded string and the index after the closing '>'.
+    """
+    end = data.find(b">", pos)
+    if end == -1:
+        end = len(data)
+    digits = bytes(c for c in data[pos:end] if c not in WHITESPACE)
+    if len(digits) % 2:
+        digits += b"0"
+    try:
+        return bytes.fromhex(digits.decode("ascii")), end + 1
+    except ValueError:
+        return b"", end + 1
+
+
+def _bare_token(
+    data: bytes, pos: int, operands: list, array: Optional[list]
+) -> tuple[int, list[str]]:
+    """Reads a number, name or operator starting at pos.
+
+    Args:
+        data (bytes): The content stream.
+        pos (int): Index of the first byte of the token.
+        operands (list): The operands read since the last operator. A number or
+            name is added to them, an operator consumes and clears them.
+        array (list): The strings of the TJ array being read, if any, to which
+            a kerning wide enough to be a space adds one.
+
+    Returns:
+        tuple[int, list[str]]: The index after the token, or after the inline
+        image an ID operator starts, and the text the token shows.
+    """
+    length = len(data)
+    end = pos + 1
+    while end < length and data[end] not in TOKEN_END:
+        end += 1
+    token = data[pos:end]
+    pos = end
+    if array is not None:
+        try:
+            if float(token) <= KERNING_SPACE:
+                array.append(b" ")
+        except ValueError:
+            pass
+        return pos, []
+    if token[0] in b"+-.0123456789/":
+        operands.append(token)
+        return pos, []
+    if token == b"ID":
+        # inline image data is binary; skip to the closing EI operator
+        end = data.find(b"EI", pos)
+        while end != -1 and data[end - 1 : end] not in WHITESPACE:
+            end = data.find(b"EI", end + 2)
+        pos = length if end == -1 else end + 2
+    texts = []
+    if token in TEXT_MOVE_OPERATORS:
+        texts.append("\n")
+    if token in TEXT_SHOW_OPERATORS and operands:
+        shown = operands[-1]
+        if isinstance(shown, list):
+            shown = b"".join(s for s in shown if isinstance(s, bytes))
+        if isinstance(shown, bytes):
+            texts.append(shown.decode("latin-1"))
+    operands.clear()
+    return pos, texts
+
+
+def iter_text_operands(data: bytes) -> Iterator[str]:
+    """Yields the text shown by the Tj/TJ/'/" operators of a content stream.
+
+    Args:
+        data (bytes): A decoded (inflated) page content stream.
+
+    Yields:
+        str: The string operands, one chunk per text run. A newline is yielded
+        whenever the text position moves so that adjacent lines are not merged.
+
+    Notes:
+        This is a single forward pass over the stream. Fonts, images and layout
+        are never interpreted: string bytes are mapped through latin-1, which is
+        correct for the standard and WinAnsi encodings that most copyright pages
+        use. Composite (two byte) fonts produce unreadable output here and are
+        left to the full text extraction fallback.
+    """
+    operands: list = []
+    array: list = []
+    in_array = False
+    pos = 0
+    length = len(data)
+    while pos < length:
+        char = data[pos]
+        if char in WHITESPACE:
+            pos += 1
+        elif char == 0x25:  # comment
+            end = data.find(b"\n", pos)
+            pos = length if end == -1 else end + 1
+        elif char == 0x28:
+            string, pos = _literal_string(data, pos + 1)
+            (array if in_array else operands).append(string)
+        elif char == 0x3C:
+            if data[pos + 1 : pos + 2] == b"<":
+                end = data.find(b">>", pos)
+                pos = length if end == -1 else end + 2
+                operands.append(None)
+            else:
+                string, pos = _hex_string(data, pos + 1)
+                (array if in_array else operands).append(string)
+        elif char == 0x5B:
+            in_array = True
+            array = []
+            pos += 1
+        elif char == 0x5D:
+            in_array = False
+            operands.append(array)
+            pos += 1
+        else:
+            pos, texts = _bare_token(data, pos, operands, array if in_array else None)
+            yield from texts
+
+
+def _page_streams(page) -> list[bytes]:  # type: ignore
+    """Returns the inflated content streams of a page that can contain text."""
+    resources = page.get("/Resources")
+    if resources is not None:
+        resources = resources.get_object()
+        if "/Font" not in resources:
+            return []
+    contents = page.get("/Contents")
+    if contents is None:
+        return []
+    contents = contents.get_object()
+    if not isinstance(contents, list):
+        contents = [contents]
+    streams = []
+    for stream in contents:
+        data = stream.get_object().get_data()
+        if b"BT" in data:
+            streams.append(data)
+    return streams
+
+
+def scan_isbn(pdf_file: Path) -> list[str]:
+    """Finds ISBN candidates using only the raw text operators of each page.
+
+    Args:
+        pdf_file (Path): The Path object representing the PDF file.
+
+    Returns:
+        List[str]: The ISBNs as ISBN-13 digits, or an empty list if the fast
+        path could not find one.
+
+    Notes:
+        Only the first config.SEARCH_PAGES_ISBN pages are examined and pages
+        without fonts or text objects are skipped without inflating their
+        streams. As in the full text extraction, ISBNs labelled as such on any
+        page are preferred to bare ones (see isbn.iter_candidates), and only
+        those with a valid check digit are returned. An empty result means the
+        caller should fall back to the full text extraction, never that the
+        book has no ISBN.
+    """
+    return locate_isbn(pdf_file)[0]
+
+
+def locate_isbn(
+    pdf_file: Path, order: Sequence[int] = ()
+) -> tuple[list[str], Optional[int]]:
+    """Finds ISBN candidates like scan_isbn, searching some pages first.
+
+    Args:
+        pdf_file (Path): The Path object representing the PDF file.
+        order (Sequence[int]): The pages to search first (see
+            locations.probe_order).
+
+    Returns:
+        tuple[list[str], Optional[int]]: The ISBNs of the first page searched
+        with labelled ones, or else of the first with bare ones, and that page,
+        or ([], None).
+    """
+    bare: tuple[list[str], Optional[int]] = ([], None)
+    try:
+        with open_book(pdf_file) as pdf:
+            pdf_reader = Reader(pdf)
+            num_pages = min(len(pdf_reader.pages), config.SEARCH_PAGES_ISBN + 2)
+            for page_number in probe_order(num_pages, order):
+                page = pdf_reader.pages[page_number]
+                text = "\n".join(
+                    "".join(iter_text_operands(data)) for data in _page_streams(page)
+                )
+                labelled = _valid(find_isbns(text, labelled=True))
+                if labelled:
+                    return labelled, page_number
+                if not bare[0]:
+                    bare = (_valid(find_isbns(text)), page_number)
+    except (ValueError, TypeError, KeyError, IndexError, PdfReadError):
+        pass
+    return bare if bare[0] else ([], None)
+
+
+def _valid(isbns: list[str]) -> list[str]:
+    """Drops the ISBNs with a wrong check digit, keeping the order."""
+    return [isbn for isbn in isbns if isbn13_valid(isbn)]
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Ordering of books by their estimated processing cost."""
+
+# Core Library modules
+import json
+import os
+import re
+import threading
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any, Optional
+
+# Local modules
+from .archives import book_stat, split_member
+from .config import config
+from .memory import MB
+
+HEAD_SIZE = 1024
+TAIL_SIZE = 4096
+
+# seconds per page and per MB used until past runs have been timed
+DEFAULT_RATES = {"pages": 0.05, "size": 0.2}
+
+LINEARIZED = re.compile(rb"/Linearized\b[^>]*?/N\s+(\d+)")
+PAGE_TREE = re.compile(
+    rb"/Type\s*/Pages\b[^>]*?/Count\s+(\d+)|/Count\s+(\d+)[^>]*?/Type\s*/Pages\b"
+)
+
+POLICIES = ("largest", "smallest", "interleave", "found")
+
+
+def page_count(book: Path) -> Optional[int]:
+    """Returns the page count of a book if a few KB of it reveal it.
+
+    Linearized PDFs state it in their first object. Otherwise the root of the
+    page tree is looked for in the first and last KB, where most writers and
+    every incremental update put it.
+
+    Returns:
+        int: The number of pages, or None if it was not found, e.g. because the
+        page tree is inside a compressed object stream.
+    """
+    try:
+        with open(book, "rb") as f:
+            head = f.read(HEAD_SIZE)
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(size - TAIL_SIZE, len(head)))
+            tail = f.read()
+    except OSError:
+        return None
+    match = LINEARIZED.search(head)
+    if match:
+        return int(match.group(1))
+    counts = [int(a or b) for a, b in PAGE_TREE.findall(head + b"\n" + tail)]
+    return max(counts) if counts else None
+
+
+class CostModel:
+    """Estimates how long books take to process from how long past ones took.
+
+    A book processed before is estimated at the time it took then. Otherwise
+    its page count, or failing that its size, is multiplied by the seconds per
+    page or per MB measured over all timed books. Page counts and times are
+    kept per book together with its size and modification time, and are
+    forgotten when the book changes.
+
+    Args:
+        path (Path): A JSON file the timings are loaded from and saved to, or
+            None for timings that live only as long as the object.
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = path
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._changed = False
+        if path is not None and path.exists():
+            try:
+                self._entries.update(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                print(f"Ignoring unreadable book timings: {path}")
+
+    def _entry(self, book: Path) -> dict[str, Any]:
+        """Returns the entry of a book, emptied if the book has changed."""
+        try:
+            stat = book_stat(book)
+        except OSError:
+            return {}
+        stamp = {"size": stat.st_size, "mtime": stat.st_mtime}
+        with self._lock:
+            entry = self._entries.get(str(book))
+            if entry is None or any(entry.get(k) != v for k, v in stamp.items()):
+                entry = self._entries[str(book)] = stamp
+                self._changed = True
+            return entry
+
+    def rates(self) -> dict[str, float]:
+        """Returns the seconds per page and per MB over all timed books."""
+        totals = {"pages": [0.0, 0.0], "size": [0.0, 0.0]}
+        with self._lock:
+            for entry in self._entries.values():
+                if "seconds" not in entry:
+                    continue
+                if entry.get("pages"):
+                    totals["pages"][0] += entry["seconds"]
+                    totals["pages"][1] += entry["pages"]
+                totals["size"][0] += entry["seconds"]
+                totals["size"][1] += entry["size"] / MB
+        return {
+            kind: seconds / amount if amount else DEFAULT_RATES[kind]
+            for kind, (seconds, amount) in totals.items()
+        }
+
+    def estimate(self, book: Path, rates: Optional[dict[str, float]] = None) -> float:
+        """Returns the estimated processing time of a book in seconds.
+
+        Args:
+            book (Path): The book.
+            rates (dict): The result of rates(), passed when estimating many
+                books so it is only computed once.
+        """
+        if split_member(book) is not None:
+            # members share the archive's size and are read from memory
+            return 0.0
+        rates = rates or self.rates()
+        entry = self._entry(book)
+        if not entry:
+            return 0.0
+        if "seconds" in entry:
+            return float(entry["seconds"])
+        if "pages" not in entry:
+            pages = page_count(book)
+            with self._lock:
+                entry["pages"] = pages
+                self._changed = True
+        if entry["pages"]:
+            return entry["pages"] * rates["pages"]
+        return entry["size"] / MB * rates["size"]
+
+    def record(self, book: Path, seconds: float) -> None:
+        """Records the time spent extracting a book."""
+        if split_member(book) is not None:
+            return
+        entry = self._entry(book)
+        if entry:
+            with self._lock:
+                entry["seconds"] = round(seconds, 3)
+                self._changed = True
+
+    def save(self) -> None:
+        """Writes the timings to their file, if it has one and they changed."""
+        if self.path is None or not self._changed:
+            return
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp = self.path.with_suffix(".tmp")
+            temp.write_text(json.dumps(self._entries), encoding="utf-8")
+            os.replace(temp, self.path)
+            self._changed = False
+
+
+def schedule(
+    books: Iterable[Path], costs: CostModel, policy: Optional[str] = None
+) -> list[Path]:
+    """Orders books for processing according to a scheduling policy.
+
+    Args:
+        books (Iterable[Path]): The books in the order they were found.
+        costs (CostModel): Estimates the processing time of each book.
+        policy (str): By default config.SCHEDULE, one of
+            - "largest": most expensive first, so that no long book starts
+              last and holds up the end of the run,
+            - "smallest": cheapest first, for the most results early on,
+            - "interleave": alternately the most and the least expensive
+              remaining book, bounding the run like "largest" while results
+              keep arriving steadily,
+            - "found": the order the books were found in.
+
+    Returns:
+        list[Path]: The books in processing order. Books skipped as already
+        renamed cost nothing and are not examined.
+    """
+    policy = policy or config.SCHEDULE
+    books = list(books)
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown scheduling policy: {policy}")
+    if policy == "found":
+        return books
+    rates = costs.rates()
+
+    def cost(book: Path) -> float:
+        if config.SKIP_EXISTING and book.name.startswith("["):
+            return 0.0
+        return costs.estimate(book, rates)
+
+    ordered = sorted(books, key=cost, reverse=policy != "smallest")
+    if policy != "interleave":
+        return ordered
+    interleaved = []
+    front, back = 0, len(ordered) - 1
+    while front <= back:
+        interleaved.append(ordered[front])
+        if front != back:
+            interleaved.append(ordered[back])
+        front, back = front + 1, back - 1
+    return interleaved
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Local HTTP/JSON service answering book lookups from warm resources."""
+
+# Core Library modules
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Optional
+
+# Third party modules
+from requests.adapters import HTTPAdapter
+
+# Local modules
+from .api import MetaBook
+from .cache import MetadataCache
+from .cli import _parse_serve_args
+from .config import config, use_config
+from .metrics import CONTENT_TYPE, RUN_STARTED, Histogram, registry
+
+
+class BookService:
+    """The state shared by all requests of the service.
+
+    A single MetaBook holds the warm extraction workers, the pooled HTTP session
+    and the metadata cache. At most `concurrency` books are processed at once;
+    further requests wait up to config.SERVE_QUEUE_TIMEOUT seconds for a slot.
+    Books are never modified: the proposed name is returned instead.
+
+    Args:
+        concurrency (int): The number of books processed at the same time.
+        root (Path): If given, only paths inside this directory may be looked up.
+    """
+
+    def __init__(self, concurrency: int, root: Optional[Path] = None) -> None:
+        self.root = root.resolve() if root else None
+        self.metabook = MetaBook(
+            cache=MetadataCache(config.METADATA_CACHE_FILE),
+            settings=config.copy(),
+            DRYRUN=True,
+            SKIP_EXISTING=False,
+            HARDCOPY=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.metabook.session.mount("https://", adapter)
+        self.metabook.session.mount("http://", adapter)
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.latency = Histogram()
+        self.statuses: dict[str, int] = {}
+        self._lock = threading.Lock()
+        RUN_STARTED.set(time.time())
+        with use_config(self.metabook.config):
+            self.metabook._run.warm(concurrency)
+
+    def allowed(self, path: Path) -> bool:
+        if self.root is None:
+            return True
+        return path.resolve().is_relative_to(self.root)
+
+    def process(self, path: Path) -> dict[str, Any]:
+        result = self.metabook.process(path).as_dict()
+        with self._lock:
+            self.statuses[result["status"]] = self.statuses.get(result["status"], 0) + 1
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        cache = self.metabook.cache
+        lookups = cache.hits + cache.misses
+        return {
+            "latency_seconds": self.latency.snapshot(),
+            "p50": self.latency.quantile(0.5),
+            "p99": self.latency.quantile(0.99),
+            "statuses": dict(self.statuses),
+            "cache_hit_ratio": cache.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        self.metabook.close()
+
+
+class BookRequestHandler(BaseHTTPRequestHandler):
+    """Handles POST /process, GET /stats, GET /metrics and GET /health."""
+
+    service: BookService
+    server_version = "metabook"
+
+    def _send(self, status: int, body: dict[str, Any]) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        if config.SERVE_ACCESS_LOG:
+            super().log_message(format, *args)
+
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path == "/health":
+            self._send(200, {"status": "ok"})
+        elif self.path == "/stats":
+            self._send(200, self.service.stats())
+        elif self.path == "/metrics":
+            data = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self) -> None:  # noqa: N802
+        if self.path != "/process":
+            self._send(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send(400, {"error": "invalid Content-Length"})
+            return
+        if length > config.SERVE_MAX_UPLOAD:
+            self._send(413, {"error": "upload too large"})
+            return
+        body = self.rfile.read(length)
+        upload = self.headers.get("Content-Type", "").startswith("application/pdf")
+        path = None
+        if not upload:
+            try:
+                path = Path(json.loads(body)["path"])
+            except (ValueError, KeyError, TypeError):
+                self._send(400, {"error": 'expected a PDF body or JSON {"path": ...}'})
+                return
+            if not self.service.allowed(path):
+                self._send(403, {"error": "path outside the served directory"})
+                return
+            if not path.is_file():
+                self._send(404, {"error": "no such file"})
+                return
+        if not self.service.slots.acquire(timeout=config.SERVE_QUEUE_TIMEOUT):
+            self._send(503, {"error": "too many concurrent requests"})
+            return
+        started = time.perf_counter()
+        try:
+            result = self._process(path, body)
+        finally:
+            self.service.slots.release()
+            self.service.latency.observe(time.perf_counter() - started)
+        self._send(200, result)
+
+    def _process(self, path: Optional[Path], body: bytes) -> dict[str, Any]:
+        if path is not None:
+            return self.service.process(path)
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+            f.write(body)
+        try:
+            result = self.service.process(Path(f.name))
+        finally:
+            os.unlink(f.name)
+        result["book"] = None
+        return result
+
+
+def serve(args: list[str]) -> None:
+    """Entry point of the 'metabook serve' command."""
+    options, parser = _parse_serve_args(args)
+    service = BookService(options.concurrency, options.root)
+    handler = type("Handler", (BookRequestHandler,), {"service": service})
+    server = ThreadingHTTPServer((options.host, options.port), handler)
+    print(f"metabook serving on http://{options.host}:{options.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
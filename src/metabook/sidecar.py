@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Book metadata written beside the books instead of into the PDFs."""
+
+# Core Library modules
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any
+from xml.sax.saxutils import escape
+
+# Local modules
+from .config import config
+from .metrics import BYTES_WRITTEN
+
+OPF_TEMPLATE = """<?xml version="1.0" encoding="utf-8"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="2.0"
+         unique-identifier="isbn">
+  <metadata xmlns:dc="http://purl.org/dc/elements/1.1/"
+            xmlns:opf="http://www.idpf.org/2007/opf">
+{elements}
+  </metadata>
+</package>
+"""
+
+
+def _present(value: Any) -> bool:
+    return value not in (None, "", "None", [])
+
+
+def opf_metadata(meta: dict[str, Any]) -> str:
+    """Returns an OPF 2.0 package document holding the metadata of a book."""
+    elements = []
+    if _present(meta.get("TITLE")):
+        title = meta["TITLE"]
+        if _present(meta.get("SUBTITLE")):
+            title = f"{title}: {meta['SUBTITLE']}"
+        elements.append(f"<dc:title>{escape(title)}</dc:title>")
+    for author in meta.get("AUTHORS", []):
+        elements.append(f'<dc:creator opf:role="aut">{escape(author)}</dc:creator>')
+    for name in ("DATE", "PUBLISHER", "DESCRIPTION"):
+        if _present(meta.get(name)):
+            element = name.lower()
+            elements.append(f"<dc:{element}>{escape(meta[name])}</dc:{element}>")
+    if _present(meta.get("ISBN")):
+        isbn = escape(meta["ISBN"])
+        elements.append(
+            f'<dc:identifier id="isbn" opf:scheme="ISBN">{isbn}</dc:identifier>'
+        )
+    return OPF_TEMPLATE.format(elements="\n".join("    " + e for e in elements))
+
+
+class SidecarWriter:
+    """Writes the metadata of books in the format given by config.SIDECAR.
+
+    "json" and "opf" write a small file next to each book with the book's name
+    and a .json or .opf suffix. "index" appends one JSON line per book to the
+    consolidated config.SIDECAR_INDEX_FILE; when a book appears more than once
+    the last line is the current one. The PDFs themselves are never opened.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+
+    def write(self, book: Path, meta: dict[str, Any]) -> None:
+        if config.SIDECAR == "index":
+            line = json.dumps({"book": str(book), "meta": meta}) + "\n"
+            BYTES_WRITTEN.labels("sidecar").inc(len(line.encode()))
+            with self._lock:
+                config.SIDECAR_INDEX_FILE.parent.mkdir(parents=True, exist_ok=True)
+                with open(config.SIDECAR_INDEX_FILE, mode="a", encoding="utf-8") as f:
+                    f.write(line)
+            return
+        if config.SIDECAR == "opf":
+            sidecar, text = book.with_suffix(".opf"), opf_metadata(meta)
+        else:
+            sidecar, text = book.with_suffix(".json"), json.dumps(meta, indent=2)
+        temp = sidecar.with_name(sidecar.name + ".tmp")
+        temp.write_text(text, encoding="utf-8")
+        BYTES_WRITTEN.labels("sidecar").inc(len(text.encode()))
+        os.replace(temp, sidecar)
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""Supervised worker process enforcing a per-book time and page budget."""
+
+# Core Library modules
+import atexit
+import multiprocessing
+import threading
+import time
+from datetime import datetime
+from multiprocessing.context import ForkServerContext, SpawnContext
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+# Third party modules
+from jinja2 import Template
+
+# Local modules
+from .config import config
+from .governor import governor
+from .memory import (
+    MB,
+    CallTracer,
+    memory_profile,
+    read_bytes,
+    read_bytes_since,
+    rss,
+)
+from .metrics import record_extraction
+from .pages import stop_page_workers
+
+
+class BookTimeout(Exception):
+    """Raised when a book exceeds its wall-clock budget."""
+
+
+class WorkerError(Exception):
+    """Raised when the supervised worker fails or dies while processing a book."""
+
+
+class WorkerMemoryError(WorkerError):
+    """Raised when the worker exceeds config.WORKER_RSS_LIMIT during a book."""
+
+
+class BookBudget:
+    """The wall-clock deadline and pages used of one book.
+
+    The budget travels with the book, so successive calls for the same book
+    share it even when they are made by different supervisors.
+    """
+
+    def __init__(self) -> None:
+        self.deadline = time.monotonic() + config.BOOK_TIMEOUT
+        self.pages_used = 0
+
+    def remaining(self) -> float:
+        return self.deadline - time.monotonic()
+
+
+class PageBudget(threading.local):
+    """Counts the pages extracted for the current book against a limit.
+
+    The counter is thread local so that in-process extraction from several
+    threads charges each book separately.
+    """
+
+    def __init__(self, limit: int = 0) -> None:
+        self.limit = limit
+        self.used = 0
+
+    def reset(self, limit: int, used: int = 0) -> None:
+        self.limit = limit
+        self.used = used
+
+    def remaining(self, pages: int) -> int:
+        """Returns how many of the next pages the budget still allows."""
+        if not self.limit:
+            return pages
+        return max(min(pages, self.limit - self.used), 0)
+
+    def spend(self, pages: int = 1) -> bool:
+        """Charges pages to the budget.
+
+        Returns:
+            bool: False if the budget was already exhausted and the caller should
+            stop extracting, otherwise True.
+        """
+        if self.limit and self.used >= self.limit:
+            return False
+        self.used += pages
+        return True
+
+
+page_budget = PageBudget()
+
+
+def _worker_loop(conn: Any) -> None:
+    """Runs extraction calls sent by the supervisor until told to stop."""
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if message is None:
+            break
+        func, args, overrides, limit, used = message
+        config.load(overrides)
+        page_budget.reset(limit, used)
+        tracer = CallTracer()
+        try:
+            with tracer:
+                result = func(*args)
+        except Exception as e:  # noqa: B902
+            conn.send(("error", repr(e), page_budget.used, tracer.stats))
+        else:
+            conn.send(("ok", result, page_budget.used, tracer.stats))
+    # the process exits without running atexit handlers, which would do this
+    stop_page_workers()
+    conn.close()
+
+
+class Supervisor:
+    """Runs extraction functions in a worker process that can be killed.
+
+    The worker is started lazily and reused for successive books. If a book
+    exceeds config.BOOK_TIMEOUT seconds the worker is killed, BookTimeout is
+    raised and a fresh worker is started for the next call. config.PAGE_BUDGET
+    limits the number of pages extracted per book across all calls.
+
+    The worker's memory is governed as well. It is killed if its RSS exceeds
+    config.WORKER_RSS_LIMIT while working on a book, and recycled (replaced by a
+    fresh one between books) after config.WORKER_MAX_BOOKS books or once its
+    RSS after a call has grown beyond config.WORKER_RECYCLE_RSS, which returns
+    the memory held by leaking or caching PDF libraries to the system.
+
+    With config.BOOK_TIMEOUT set to 0 calls run in-process without isolation.
+    A supervisor is not thread safe; use one per thread.
+    """
+
+    def __init__(self) -> None:
+        # workers are long lived, so prefer the start method that is safe to use
+        # from a multi-threaded parent over the fastest one
+        methods = multiprocessing.get_all_start_methods()
+        self._context: Union[ForkServerContext, SpawnContext]
+        if "forkserver" in methods:
+            self._context = multiprocessing.get_context("forkserver")
+        else:
+            self._context = multiprocessing.get_context("spawn")
+        self._process: Optional[multiprocessing.process.BaseProcess] = None
+        self._conn: Any = None
+        self._budget: Optional[BookBudget] = None
+        self.books = 0
+        self.rss = 0
+        atexit.register(self.stop)
+
+    def call(self, budget: BookBudget, func: Callable, *args: Any) -> Any:
+        """Runs func(*args) within the remaining budget of a book.
+
+        Args:
+            budget (BookBudget): The budget of the book being processed.
+            func (Callable): A module level (picklable) extraction function.
+            *args: Picklable arguments for func.
+
+        Returns:
+            Any: The return value of func.
+
+        Raises:
+            BookTimeout: If the book's wall-clock budget is exhausted.
+            WorkerMemoryError: If the worker exceeded its memory limit.
+            WorkerError: If func raised or the worker process died.
+
+        Note:
+            In background mode the call first waits for the governor (see
+            governor.Governor), and the book's deadline is extended by the wait.
+        """
+        budget.deadline += governor.wait()
+        if not config.BOOK_TIMEOUT:
+            page_budget.reset(config.PAGE_BUDGET, budget.pages_used)
+            started, cpu = time.perf_counter(), time.thread_time()
+            read = read_bytes()
+            try:
+                return func(*args)
+            except Exception as e:  # noqa: B902
+                raise WorkerError(repr(e)) from e
+            finally:
+                budget.pages_used = page_budget.used
+                wall, cpu = time.perf_counter() - started, time.thread_time() - cpu
+                record_extraction(wall, cpu)
+                governor.record(wall, cpu, read_bytes_since(read))
+        remaining = budget.remaining()
+        if remaining <= 0:
+            raise BookTimeout()
+        new_book = budget is not self._budget
+        if new_book:
+            self._budget = budget
+            self._recycle_if_due()
+        self._ensure_worker()
+        if new_book:
+            self.books += 1
+        # templates cannot be pickled and are not needed for extraction
+        overrides = {
+            name: value
+            for name, value in config.settings().items()
+            if not isinstance(value, Template)
+        }
+        self._conn.send((func, args, overrides, config.PAGE_BUDGET, budget.pages_used))
+        if not self._wait(remaining):
+            self._kill()
+            raise BookTimeout()
+        try:
+            status, result, used, memory = self._conn.recv()
+        except (EOFError, OSError):
+            self._kill()
+            raise WorkerError("worker process died") from None
+        budget.pages_used = used
+        self.rss = memory.get("rss") or 0
+        name = getattr(func, "func", func).__name__
+        memory_profile.add(name, memory)
+        record_extraction(memory["wall"], memory["cpu"])
+        governor.record(memory["wall"], memory["cpu"], memory["read"])
+        if status == "error":
+            raise WorkerError(result)
+        return result
+
+    def _wait(self, remaining: float) -> bool:
+        """Waits for the worker's reply while watching its memory.
+
+        Returns:
+            bool: False if no reply arrived within remaining seconds.
+
+        Raises:
+            WorkerMemoryError: If the worker's RSS exceeded the limit; the
+                worker is killed.
+        """
+        if not config.WORKER_RSS_LIMIT:
+            return bool(self._conn.poll(remaining))
+        deadline = time.monotonic() + remaining
+        while True:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return False
+            if self._conn.poll(min(left, config.MEMORY_POLL_INTERVAL)):
+                return True
+            used = rss(self._process.pid)  # type: ignore
+            if used is not None and used > config.WORKER_RSS_LIMIT:
+                self._kill()
+                memory_profile.recycled("killed over the RSS limit")
+                raise WorkerMemoryError(
+                    f"worker exceeded the memory limit "
+                    f"({used / MB:.0f}MB > {config.WORKER_RSS_LIMIT / MB:.0f}MB)"
+                )
+
+    def _recycle_if_due(self) -> None:
+        """Replaces the worker before the next book if it has served enough."""
+        if config.WORKER_MAX_BOOKS and self.books >= config.WORKER_MAX_BOOKS:
+            memory_profile.recycled("after max books")
+        elif config.WORKER_RECYCLE_RSS and self.rss > config.WORKER_RECYCLE_RSS:
+            memory_profile.recycled("over the recycle RSS")
+        else:
+            return
+        self.stop()
+
+    def start(self, preload: Optional[Callable] = None, *args: Any) -> None:
+        """Starts the worker ahead of the first book.
+
+        Args:
+            preload (Callable): An optional cheap function run once in the new
+                worker so that the modules it needs are imported up front.
+            *args: Arguments for preload.
+        """
+        self._ensure_worker()
+        if preload is not None and config.BOOK_TIMEOUT:
+            self.call(BookBudget(), preload, *args)
+
+    def _ensure_worker(self) -> None:
+        if self._process is not None and self._process.is_alive():
+            return
+        self._kill()
+        parent_conn, child_conn = self._context.Pipe()
+        self._process = self._context.Process(
+            target=_worker_loop, args=(child_conn,), name="metabook-worker"
+        )
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+
+    def _kill(self) -> None:
+        if self._process is not None:
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join(1)
+                if self._process.is_alive():
+                    self._process.kill()
+                    self._process.join()
+            self._process = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self.books = 0
+        self.rss = 0
+
+    def stop(self) -> None:
+        """Asks the worker to exit, killing it if it does not."""
+        if self._process is not None and self._process.is_alive():
+            try:
+                self._conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self._process.join(1)
+        self._kill()
+
+
+def record_timeout(book: Path) -> None:
+    """Appends a book that exceeded its budget to config.TIMEOUT_FILE."""
+    config.TIMEOUT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(config.TIMEOUT_FILE, mode="a", encoding="utf-8") as f:
+        f.write(f"{datetime.now().isoformat(timespec='seconds')}\t{book}\n")
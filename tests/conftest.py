@@ -1 +1,79 @@
 """Put your global fixtures for pytest here"""
+
+# Core Library modules
+import zlib
+from pathlib import Path
+from typing import Callable, Optional
+
+# Third party modules
+import pytest
+
+
+def build_pdf(pages: list[str], compress: bool = True, padding: int = 0) -> bytes:
+    """Builds a minimal but valid PDF with one Helvetica text page per string.
+
+    Args:
+        pages: The text shown on each page (one Tj per line).
+        compress: Deflate the page content streams.
+        padding: Bytes of junk appended to every content stream after the text,
+            used to build synthetic large books.
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for text in pages:
+        lines = [
+            f"({line.replace('(', '').replace(')', '')}) Tj 0 -14 Td"
+            for line in text.splitlines()
+        ]
+        content = ("BT /F1 12 Tf 72 720 Td " + " ".join(lines) + " ET\n").encode()
+        content += b"% " + b"x" * padding + b"\n" if padding else b""
+        stream_dict = b"<< /Length %d >>"
+        if compress:
+            content = zlib.compress(content)
+            stream_dict = b"<< /Length %d /Filter /FlateDecode >>"
+        objects.append(
+            stream_dict % len(content) + b"\nstream\n" + content + b"\nendstream"
+        )
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(kids),
+        len(kids),
+    )
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\n" % (len(objects) + 1)
+    out += b"startxref\n%d\n%%%%EOF\n" % xref
+    return bytes(out)
+
+
+@pytest.fixture()
+def make_pdf(tmp_path: Path) -> Callable[..., Path]:
+    """Returns a factory writing synthetic PDFs into the test's tmp_path."""
+
+    def _make_pdf(
+        pages: list[str],
+        name: str = "book.pdf",
+        directory: Optional[Path] = None,
+        **kwargs,
+    ) -> Path:
+        path = (directory or tmp_path) / name
+        path.write_bytes(build_pdf(pages, **kwargs))
+        return path
+
+    return _make_pdf
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Tests for the embeddable MetaBook API"""
+
+# Core Library modules
+from pathlib import Path
+
+# First party modules
+from metabook.api import MetaBook
+from metabook.cache import MetadataCache
+from metabook.config import config
+
+META = {
+    "TITLE": "Python Testing",
+    "SUBTITLE": "None",
+    "AUTHORS": ["A. Writer"],
+    "DATE": "2021",
+    "PUBLISHER": "Packt",
+    "ISBN": "9781838826581",
+}
+
+
+def _cache() -> MetadataCache:
+    cache = MetadataCache()
+    cache.put(META["ISBN"], META)
+    return cache
+
+
+def test_instances_keep_their_own_config(make_pdf) -> None:  # type: ignore
+    book = make_pdf(["Copyright", "ISBN 978-1-83882-658-1"])
+    with MetaBook(cache=_cache(), DRYRUN=True, BOOK_TIMEOUT=0) as plain:
+        with MetaBook(
+            cache=_cache(), DRYRUN=True, LOWERCASE_ONLY=True, ALLOW_SPACE=False
+        ) as lower:
+            assert (
+                lower.process(book).new_name
+                == "[packt]_-_python_testing_[2021]_[9781838826581]"
+            )
+            result = plain.process(book)
+    assert result.status == "dryrun"
+    assert result.new_name == "[Packt] - Python Testing [2021] [9781838826581]"
+    assert result.as_dict()["isbns"] == ["9781838826581"]
+    assert not config.DRYRUN and not config.LOWERCASE_ONLY
+    assert book.exists()
+
+
+def test_process_many_streams_results(make_pdf, tmp_path: Path) -> None:  # type: ignore
+    books = [
+        make_pdf(["ISBN 978-1-83882-658-1"], name=f"book{n}.pdf") for n in range(6)
+    ]
+    books.append(make_pdf(["no identifier"], name="plain.pdf"))
+    with MetaBook(cache=_cache(), DRYRUN=True) as metabook:
+        results = {job.book.name: job for job in metabook.process_many(iter(books))}
+        again = list(metabook.process_many(books[:2]))
+    assert len(results) == 7
+    assert results["plain.pdf"].status == "no_isbn"
+    assert {results[f"book{n}.pdf"].status for n in range(6)} == {"dryrun"}
+    assert len(again) == 2
+    assert len(metabook._run._supervisors) <= 3
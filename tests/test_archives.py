@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Tests for books read from inside zip and tar archives"""
+
+# Core Library modules
+import io
+import tarfile
+import zipfile
+from pathlib import Path
+
+# Third party modules
+import pytest
+from PyPDF2 import PdfReader
+
+# First party modules
+from metabook import archives
+from metabook.api import MetaBook
+from metabook.archives import archive_members, open_book, split_member
+from metabook.cache import MetadataCache
+from metabook.config import Config, use_config
+from metabook.metabook import find_books
+from metabook.preflight import PROCESS, classify
+
+# Local modules
+from .conftest import build_pdf
+
+META = {
+    "TITLE": "Python Testing with pytest",
+    "SUBTITLE": "None",
+    "AUTHORS": ["Brian Okken"],
+    "DATE": "2022",
+    "PUBLISHER": "The Pragmatic Programmers",
+    "ISBN": "9781680508604",
+}
+BOOK = build_pdf(["Python Testing", "ISBN: 978-1-68050-860-4"])
+
+
+def _zip(path: Path) -> Path:
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("books/testing.pdf", BOOK)
+        zf.writestr("books/readme.txt", "not a book")
+        zf.writestr("../escape.pdf", BOOK)
+    return path
+
+
+def _tar(path: Path) -> Path:
+    with tarfile.open(path, "w:gz") as tf:
+        info = tarfile.TarInfo("./testing.pdf")
+        info.size = len(BOOK)
+        tf.addfile(info, io.BytesIO(BOOK))
+    return path
+
+
+def test_members_are_found_and_read(tmp_path: Path) -> None:
+    archive = _zip(tmp_path / "bundle.zip")
+    bundle = _tar(tmp_path / "bundle.tar.gz")
+    (tmp_path / "loose.pdf").write_bytes(BOOK)
+    assert archive_members(archive) == [archive / "books" / "testing.pdf"]
+    with use_config(Config(ARCHIVES=True)):
+        books = sorted(find_books(tmp_path))
+    assert books == [
+        tmp_path / "bundle.tar.gz" / "testing.pdf",
+        archive / "books" / "testing.pdf",
+        tmp_path / "loose.pdf",
+    ]
+    assert split_member(books[0]) == (bundle, "testing.pdf")
+    assert split_member(books[2]) is None
+    for book in books:
+        with open_book(book) as f:
+            assert f.read() == BOOK
+        assert classify(book) == (PROCESS, "")
+    with pytest.raises(OSError):
+        open_book(archive / "missing.pdf")
+
+
+@pytest.mark.parametrize("extract", [True, False])
+def test_members_are_extracted(tmp_path: Path, extract: bool) -> None:
+    archive = _zip(tmp_path / "bundle.zip")
+    before = archive.read_bytes()
+    out = tmp_path / "out"
+    cache = MetadataCache()
+    cache.put(META["ISBN"], META)
+    settings = {"EXTRACT_TO": out} if extract else {}
+    with MetaBook(cache=cache, BOOK_TIMEOUT=0, **settings) as metabook:
+        job = metabook.process(archive / "books" / "testing.pdf")
+    assert job.isbns == [META["ISBN"]]
+    assert archive.read_bytes() == before
+    if not extract:
+        assert job.status == "dryrun"
+        assert not out.exists()
+        return
+    assert job.status == "renamed"
+    (written,) = out.iterdir()
+    assert written.name == job.new_name + ".pdf"
+    assert PdfReader(written).metadata.title == job.new_name
+
+
+def test_tar_members_are_decompressed_once(tmp_path: Path, monkeypatch) -> None:  # type: ignore
+    bundle = _tar(tmp_path / "bundle.tar.gz")
+    cache = MetadataCache()
+    cache.put(META["ISBN"], META)
+    opened = []
+    tar_open = tarfile.open
+
+    def counting_open(*args, **kwargs):  # type: ignore
+        opened.append(args)
+        return tar_open(*args, **kwargs)
+
+    monkeypatch.setattr(tarfile, "open", counting_open)
+    with MetaBook(cache=cache, BOOK_TIMEOUT=0, EXTRACT_TO=tmp_path / "out") as metabook:
+        job = metabook.process(bundle / "testing.pdf")
+    assert job.status == "renamed"
+    assert len(opened) == 1
+    assert bundle / "testing.pdf" not in archives._spools
+    assert (tmp_path / "out" / (job.new_name + ".pdf")).exists()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Tests for the library catalog"""
+
+# Core Library modules
+from pathlib import Path
+
+# First party modules
+from metabook.catalog import Catalog
+
+
+def test_catalog_query(tmp_path: Path) -> None:
+    catalog = Catalog(tmp_path / "catalog.sqlite")
+    packt = {
+        "TITLE": "Python Testing",
+        "SUBTITLE": "None",
+        "AUTHORS": ["A. Writer", "B. Writer"],
+        "DATE": "2021",
+        "PUBLISHER": "Packt",
+        "ISBN": "9781838826581",
+    }
+    catalog.add(tmp_path / "packt.pdf", packt)
+    catalog.add(tmp_path / "oreilly.pdf", {**packt, "PUBLISHER": "O'Reilly"})
+    catalog.add(tmp_path / "unknown.pdf")
+    catalog.add(tmp_path / "nometa.pdf", {"ISBN": "9780000000002"})
+
+    rows = catalog.query(publisher="packt", year="2021")
+    assert [row["path"] for row in rows] == [str(tmp_path / "packt.pdf")]
+    assert rows[0]["authors"] == "A. Writer; B. Writer"
+    assert rows[0]["subtitle"] is None
+    assert [r["path"] for r in catalog.query(missing_isbn=True)] == [
+        str(tmp_path / "unknown.pdf")
+    ]
+    assert len(catalog.query(missing_meta=True)) == 1
+    assert len(catalog.query(author="b. writer")) == 2
+    catalog.close()
+
+    reopened = Catalog(tmp_path / "catalog.sqlite")
+    assert len(reopened.query()) == 4
+    reopened.close()
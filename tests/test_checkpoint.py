@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Tests for the resumable run checkpoint"""
+
+# Core Library modules
+from pathlib import Path
+
+# First party modules
+from metabook.checkpoint import Checkpoint
+from metabook.config import config
+
+
+def test_checkpoint_round_trip(tmp_path: Path, monkeypatch) -> None:  # type: ignore
+    monkeypatch.setattr(config, "CHECKPOINT_BATCH", 2)
+    path = tmp_path / "checkpoint.jsonl"
+    books = [tmp_path / "a.pdf", tmp_path / "b.pdf"]
+    run = Checkpoint(path)
+    run.start(tmp_path, books)
+    run.record(books[0], "isbn", ["9781838826581"])
+    run.record(books[0], "done", "renamed")
+    run.record(books[1], "isbn", [])  # buffered, lost in a crash
+
+    resumed = Checkpoint(path)
+    resumed.load()
+    assert resumed.folder == tmp_path
+    assert resumed.books == books
+    assert resumed.done(books[0])
+    assert resumed.get(books[0], "isbn") == ["9781838826581"]
+    assert resumed.get(books[1], "isbn") is None
+
+
+def test_checkpoint_ignores_torn_line_and_finish(tmp_path: Path) -> None:
+    path = tmp_path / "checkpoint.jsonl"
+    run = Checkpoint(path)
+    run.start(tmp_path, [tmp_path / "a.pdf"])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"book": "a.pdf", "sta')
+    resumed = Checkpoint(path)
+    resumed.load()
+    assert resumed.stages == {}
+    resumed.finish()
+    assert not path.exists()
+
+
+def test_resumed_run_appends_after_torn_line(tmp_path: Path) -> None:
+    path = tmp_path / "checkpoint.jsonl"
+    books = [tmp_path / "a.pdf", tmp_path / "b.pdf"]
+    run = Checkpoint(path)
+    run.start(tmp_path, books)
+    run.record(books[0], "done", "renamed")
+    run.flush()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"book": "b.pdf", "sta')
+
+    resumed = Checkpoint(path)
+    resumed.load()
+    resumed.record(books[1], "done", "renamed")
+    resumed.flush()
+    again = Checkpoint(path)
+    again.load()
+    assert again.done(books[0]) and again.done(books[1])
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Tests for the distributed work sharing, using local processes as nodes"""
+
+# Core Library modules
+import json
+import multiprocessing
+import time
+from pathlib import Path
+
+# First party modules
+from metabook.config import config
+from metabook.distributed import Coordinator
+from metabook.metabook import BookRun
+
+
+def _node(folder: Path, name: str, books: list[Path]) -> None:
+    coordinator = Coordinator(folder, name)
+    coordinator.start()
+    for book in books:
+        if coordinator.claim(book):
+            time.sleep(0.005)  # the work
+            coordinator.complete(book, "renamed", name)
+    coordinator.stop()
+
+
+def test_each_book_is_processed_by_exactly_one_node(tmp_path: Path) -> None:
+    books = [tmp_path / f"book{number:03}.pdf" for number in range(60)]
+    for book in books:
+        book.touch()
+    nodes = [
+        multiprocessing.Process(target=_node, args=(tmp_path, f"node{n}", books))
+        for n in range(4)
+    ]
+    for node in nodes:
+        node.start()
+    for node in nodes:
+        node.join(60)
+    records = Coordinator(tmp_path, "reader").records()
+    assert sorted(record["book"] for record in records) == [b.name for b in books]
+    assert len({record["node"] for record in records}) > 1
+    assert not list((tmp_path / config.DISTRIBUTED_DIR / "leases").iterdir())
+
+
+def test_expired_lease_is_taken_over(tmp_path: Path) -> None:
+    book = tmp_path / "book.pdf"
+    crashed = Coordinator(tmp_path, "crashed")
+    assert crashed.claim(book)
+    other = Coordinator(tmp_path, "other")
+    assert not other.claim(book)
+
+    lease = next((tmp_path / config.DISTRIBUTED_DIR / "leases").iterdir())
+    body = json.loads(lease.read_text())
+    body["expires"] = time.time() - 1
+    lease.write_text(json.dumps(body))
+    assert other.claim(book)
+    other.complete(book, "renamed")
+    assert crashed.done(book)
+    assert not Coordinator(tmp_path, "late").claim(book)
+
+
+def test_broken_lease_is_not_renewed_by_its_old_owner(tmp_path: Path) -> None:
+    book = tmp_path / "book.pdf"
+    stale = Coordinator(tmp_path, "stale")
+    assert stale.claim(book)
+    lease = next((tmp_path / config.DISTRIBUTED_DIR / "leases").iterdir())
+    body = json.loads(lease.read_text())
+    body["expires"] = time.time() - 1
+    lease.write_text(json.dumps(body))
+
+    other = Coordinator(tmp_path, "other")
+    assert other.claim(book)
+    stale.renew()
+    assert json.loads(lease.read_text())["node"] == "other"
+    assert not stale._held
+    other.renew()
+    assert json.loads(lease.read_text())["node"] == "other"
+    other.stop()
+    assert not list(lease.parent.iterdir())
+
+
+def test_skipped_books_are_released(tmp_path: Path) -> None:
+    coordinator = Coordinator(tmp_path, "node")
+    run = BookRun(None, None, coordinator)
+    (job,) = run.discover([tmp_path / "missing.pdf"])
+    assert job.status == "skip"
+    assert not coordinator._held
+    assert not list((tmp_path / config.DISTRIBUTED_DIR / "leases").iterdir())
+    assert Coordinator(tmp_path, "other").claim(tmp_path / "missing.pdf")
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Tests for reading metadata back from renamed filenames"""
+
+# Core Library modules
+from pathlib import Path
+
+# Third party modules
+import pytest
+
+# First party modules
+from metabook.cache import MetadataCache
+from metabook.catalog import Catalog
+from metabook.config import config
+from metabook.metabook import (
+    BookRun,
+    normalize_filename,
+    parse_filename,
+    render_template,
+)
+
+META = {
+    "TITLE": "Python Testing",
+    "SUBTITLE": "Simple, Rapid, Effective, and Scalable",
+    "AUTHORS": [],
+    "DATE": "2021",
+    "PUBLISHER": "The Pragmatic Programmers",
+    "ISBN": "9781680508604",
+}
+
+
+@pytest.mark.parametrize("allow_space", [True, False])
+@pytest.mark.parametrize("subtitle", [META["SUBTITLE"], "None"])
+def test_names_round_trip(monkeypatch, allow_space: bool, subtitle: str) -> None:  # type: ignore
+    monkeypatch.setattr(config, "ALLOW_SPACE", allow_space)
+    meta = {**META, "SUBTITLE": subtitle}
+    name = normalize_filename(render_template(meta)) + ".pdf"
+    assert parse_filename(name) == meta
+
+
+def test_other_names_are_not_parsed() -> None:
+    assert parse_filename("[Packt] some book.pdf") is None
+    assert parse_filename("[Packt] - Title [2021] [12345].pdf") is None
+
+
+def test_discover_seeds_cache_and_catalog(tmp_path: Path) -> None:
+    renamed = tmp_path / (normalize_filename(render_template(META)) + ".pdf")
+    renamed.write_bytes(b"%PDF-1.4")
+    cache = MetadataCache()
+    catalog = Catalog(tmp_path / "catalog.sqlite")
+    run = BookRun(catalog=catalog, cache=cache)
+    assert [job.status for job in run.discover([renamed])] == ["skip"]
+    assert cache.get(META["ISBN"]) == META
+    assert catalog.query(isbn=META["ISBN"])[0]["path"] == str(renamed)
+    assert run.prefixes.resolve("9781680508611") == "The Pragmatic Programmers"
+    catalog.close()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Tests for the background resource governor"""
+
+# Core Library modules
+import os
+import threading
+
+# First party modules
+from metabook import governor as governor_module
+from metabook.config import Config, use_config
+from metabook.governor import Governor, lower_priority
+from metabook.memory import MB
+from metabook.supervisor import BookBudget, Supervisor
+
+BACKGROUND = Config(
+    BACKGROUND=True, BACKGROUND_CPU=0.25, BACKGROUND_READ_RATE=10.0, BOOK_TIMEOUT=0
+)
+
+
+def _no_sleep(monkeypatch) -> list[float]:  # type: ignore
+    slept: list[float] = []
+    monkeypatch.setattr(governor_module.time, "sleep", slept.append)
+    monkeypatch.setattr(governor_module.os, "getloadavg", lambda: (0.0, 0.0, 0.0))
+    return slept
+
+
+def test_cpu_and_read_caps(monkeypatch) -> None:  # type: ignore
+    slept = _no_sleep(monkeypatch)
+    governor = Governor()
+    with use_config(BACKGROUND):
+        assert governor.wait() == 0.0
+        governor.record(wall=2.0, cpu=1.0, read=0)
+        assert governor.wait() == 3.0
+        # a quarter of a core: one second on CPU is followed by three of rest
+        assert slept == [3.0]
+        slept.clear()
+        governor.charge(20 * MB)
+        governor.wait()
+        assert len(slept) == 1 and 1.9 < slept[0] <= 2.0
+    assert governor.waited["cpu"] == 3.0
+    assert "giving up 71% of its throughput" in governor.report()
+    with use_config(Config(BACKGROUND=False)):
+        governor.record(wall=1.0, cpu=1.0, read=MB)
+        assert governor.wait() == 0.0
+    assert governor.busy == 2.0
+
+
+def test_pauses_while_the_host_is_busy(monkeypatch) -> None:  # type: ignore
+    slept = _no_sleep(monkeypatch)
+    loads = iter([9.0, 9.0, 1.0])
+    monkeypatch.setattr(governor_module.os, "getloadavg", lambda: (next(loads), 0, 0))
+    governor = Governor()
+    with use_config(BACKGROUND.copy(BACKGROUND_MAX_LOAD=4.0, BACKGROUND_POLL=5.0)):
+        governor.wait()
+    assert slept == [5.0, 5.0]
+    assert governor.waited["load"] == 10.0
+
+
+def test_waiting_extends_the_book_deadline(monkeypatch) -> None:  # type: ignore
+    _no_sleep(monkeypatch)
+    monkeypatch.setattr(governor_module.governor, "_read_until", 0.0)
+    budget = BookBudget()
+    deadline = budget.deadline
+    with use_config(BACKGROUND):
+        governor_module.governor.charge(100 * MB)
+        Supervisor().call(budget, len, [])
+    # reading 100MB at 10MB/s takes ten seconds the book is not charged for
+    assert budget.deadline - deadline > 9.9
+
+
+def test_lower_priority() -> None:
+    # nice values and I/O priorities belong to the thread on Linux
+    changes: list[str] = []
+    nice: list[int] = []
+
+    def run() -> None:
+        with use_config(Config(BACKGROUND_NICE=19)):
+            changes.extend(lower_priority())
+        nice.append(os.getpriority(os.PRIO_PROCESS, 0))
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    assert changes and changes[0] == "nice 19"
+    assert nice == [19]
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Tests for the ISBN candidate tokenizer"""
+
+# Core Library modules
+import random
+import time
+
+# First party modules
+from metabook.isbn import (
+    find_isbns,
+    isbn10_valid,
+    isbn13_valid,
+    iter_candidates,
+)
+
+COPYRIGHT_PAGE = """
+Library of Congress Control Number: 2014954664
+ISBN: 978-1-119-01792-9
+ISBN: 978-1-119-01793-6 (ePDF); ISBN: 978-1-119-01794-3 (ePub)
+ISBN-13 (pbk): 978-1-4302-6451-4
+ISBN-13 (electronic): 978-1-4302-6452-1
+Print ISBN 0-8044-2957-X
+B3 2PB, UK.
+9781838826581
+"""
+
+
+def test_labels_of_a_copyright_page() -> None:
+    assert [(c.digits, c.label) for c in iter_candidates(COPYRIGHT_PAGE)] == [
+        ("9781119017929", "ISBN"),
+        ("9781119017936", "eISBN"),
+        ("9781119017943", "eISBN"),
+        ("9781430264514", "print"),
+        ("9781430264521", "eISBN"),
+        ("080442957X", "print"),
+        ("9781838826581", ""),
+    ]
+    assert find_isbns(COPYRIGHT_PAGE, labelled=True)[-1] == "9780804429573"
+    assert find_isbns(COPYRIGHT_PAGE)[-1] == "9781838826581"
+
+
+def test_numbers_that_are_not_isbns() -> None:
+    # an unlabelled ISBN-10, a phone number, too many digits
+    assert find_isbns("0-8044-2957-X, call 0123456789, 97811190179290") == []
+    # an ISBN-13 among other numbers needs a valid check digit
+    assert find_isbns("2015 978 1 4302 6451 4 12") == ["9781430264514"]
+    assert find_isbns("2015 978 1 4302 6451 5 12") == []
+
+
+def _isbn13(rng: random.Random) -> str:
+    body = rng.choice(("978", "979")) + "".join(rng.choices("0123456789", k=9))
+    check = -sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(body)) % 10
+    return body + str(check)
+
+
+def test_fuzz_planted_isbns_are_found() -> None:
+    rng = random.Random(48)
+    noise = "0123456789 -xX()ISBNeisbnpbk.:;,\n"
+    for _ in range(300):
+        parts, planted = [], []
+        for _ in range(rng.randint(1, 4)):
+            parts.append("".join(rng.choices(noise, k=rng.randint(0, 60))))
+            isbn = _isbn13(rng)
+            label = rng.choice(("", "ISBN ", "eISBN: ", "ISBN-13 (pbk): "))
+            split = rng.randint(3, 12)
+            parts.append(f"; {label}{isbn[:split]}-{isbn[split:]};")
+            planted.append(isbn)
+        text = "".join(parts)
+        candidates = list(iter_candidates(text))
+        found = [c.digits for c in candidates]
+        assert all(isbn in found for isbn in planted), text
+        for candidate in candidates:
+            assert candidate.label in ("", "ISBN", "eISBN", "print")
+            following = text[candidate.start : candidate.start + 30]
+            assert (
+                following.replace(" ", "")
+                .replace("-", "")
+                .upper()
+                .startswith(candidate.digits)
+            )
+            if len(candidate.digits) == 10:
+                assert candidate.label and isbn10_valid(candidate.digits)
+            else:
+                assert candidate.digits[:3] in ("978", "979")
+
+
+def test_time_is_linear_on_pathological_text() -> None:
+    def seconds(text: str) -> float:
+        started = time.perf_counter()
+        find_isbns(text)
+        return time.perf_counter() - started
+
+    for unit in ("ISBN see also ", "978 1-", "ISBN 1 2 3 4 5 6 7 8 9 "):
+        small, large = seconds(unit * 2000), seconds(unit * 16000)
+        # quadratic time would make the large text 64 times slower
+        assert large < 24 * small + 0.05, unit
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Tests for the profiles of the pages publishers print the ISBN on"""
+
+# Core Library modules
+from pathlib import Path
+
+# First party modules
+from metabook.config import Config, use_config
+from metabook.locations import PageProfiles, probe_order
+from metabook.metabook import locate_isbn_in_pdf
+from metabook.supervisor import page_budget
+
+# Local modules
+from .conftest import build_pdf
+
+
+def test_probe_order() -> None:
+    assert probe_order(5) == [0, 1, 2, 3, 4]
+    assert probe_order(5, [3, 9, 1, 3]) == [3, 1, 0, 2, 4]
+
+
+def test_profiles_are_learned_and_saved(tmp_path: Path) -> None:
+    profiles = PageProfiles(tmp_path / "pages.json")
+    packt = Path("intake/Packt/python_testing.pdf")
+    assert profiles.predict(packt) == "Packt"
+    assert profiles.predict(Path("intake/OReilly_Fluent_Python.pdf")) == "O'Reilly"
+    assert profiles.predict(Path("intake/book.pdf")) is None
+    for page in (3, 3, 2):
+        profiles.learn("Packt", page)
+    profiles.learn("None", 5)
+    profiles.learn("Wiley", None)
+    assert profiles.order(packt) == [3, 2]
+    # too few books of this publisher, so all publishers are used
+    profiles.learn("Wiley", 0)
+    assert profiles.order(Path("Wiley - Testing.pdf")) == [3, 0, 2]
+    assert profiles.order(Path("book.pdf")) == [3, 0, 2]
+    profiles.save()
+    assert PageProfiles(tmp_path / "pages.json").order(packt) == [3, 2]
+    with use_config(Config(PAGE_PROFILES=False)):
+        assert profiles.order(packt) == []
+
+
+def test_profiled_pages_are_searched_first(tmp_path: Path) -> None:
+    book = tmp_path / "Packt" / "book.pdf"
+    book.parent.mkdir()
+    pages = [f"page {n}" for n in range(12)]
+    pages[4] = "Copyright\nISBN 978-1-83882-658-1"
+    book.write_bytes(build_pdf(pages))
+    profiles = PageProfiles()
+    for _ in range(3):
+        profiles.learn("Packt", 4)
+    try:
+        with use_config(Config(FAST_SCAN=False)):
+            page_budget.reset(0)
+            assert locate_isbn_in_pdf(book) == (["9781838826581"], 4)
+            assert page_budget.used == 5
+            page_budget.reset(0)
+            located = locate_isbn_in_pdf(book, order=profiles.order(book))
+            assert located == (["9781838826581"], 4)
+            assert page_budget.used == 1
+        assert locate_isbn_in_pdf(book, order=[4]) == (["9781838826581"], 4)
+    finally:
+        page_budget.reset(0)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Tests for the Prometheus metrics"""
+
+# Core Library modules
+import urllib.request
+from pathlib import Path
+
+# First party modules
+from metabook import metrics
+from metabook.api import MetaBook
+from metabook.cache import MetadataCache
+
+META = {
+    "TITLE": "Python Testing",
+    "SUBTITLE": "None",
+    "AUTHORS": ["A. Writer"],
+    "DATE": "2021",
+    "PUBLISHER": "Packt",
+    "ISBN": "9781838826581",
+}
+
+
+def test_render_exposition_format() -> None:
+    registry = metrics.Registry()
+    books = registry.metric("counter", "t_books_total", "Books.", ("status",))
+    latency = registry.metric("histogram", "t_seconds", "Latency.")
+    books.labels("dryrun").inc(2)
+    books.labels('odd "one"').inc()
+    latency.observe(0.02)
+    latency.observe(50)
+    text = registry.render()
+    assert "# TYPE t_books_total counter\n" in text
+    assert 't_books_total{status="dryrun"} 2\n' in text
+    assert 't_books_total{status="odd \\"one\\""} 1\n' in text
+    assert 't_seconds_bucket{le="0.01"} 0\n' in text
+    assert 't_seconds_bucket{le="0.025"} 1\n' in text
+    assert 't_seconds_bucket{le="+Inf"} 2\n' in text
+    assert "t_seconds_count 2\n" in text
+    assert books.total() == 3
+
+
+def test_run_metrics_are_exported(make_pdf, tmp_path: Path) -> None:  # type: ignore
+    books = [make_pdf(["ISBN 978-1-83882-658-1"], name=f"{n}.pdf") for n in range(3)]
+    cache = MetadataCache()
+    cache.put(META["ISBN"], META)
+    dryruns = metrics.BOOKS.labels("dryrun").value
+    exporter = metrics.MetricsExporter(tmp_path / "metabook.prom", port=0)
+    exporter.start()
+    try:
+        with MetaBook(cache=cache, DRYRUN=True, BOOK_TIMEOUT=0) as metabook:
+            assert len(list(metabook.process_many(books))) == 3
+        port = exporter.server.server_address[1]  # type: ignore
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            served = response.read().decode()
+    finally:
+        exporter.stop()
+    assert metrics.BOOKS.labels("dryrun").value == dryruns + 3
+    assert metrics.CACHE_HIT_RATIO.labels().value > 0
+    assert 'metabook_stage_seconds_count{stage="isbn"}' in served
+    assert "metabook_books_per_second" in served
+    assert (tmp_path / "metabook.prom").read_text().startswith("# HELP")
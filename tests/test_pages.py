@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Tests for the parallel search of the pages of one book"""
+
+# Core Library modules
+import re
+from functools import partial
+from pathlib import Path
+
+# First party modules
+from metabook.config import Config, use_config
+from metabook.metabook import find_isbn_in_pdf, publisher_find
+from metabook.pages import (
+    find_pattern,
+    publisher_in_text,
+    search_pages,
+    stop_page_workers,
+    use_page_workers,
+)
+from metabook.supervisor import page_budget
+
+# Local modules
+from .conftest import build_pdf
+
+ISBN = re.compile(r"ISBN (\d{13})")
+PARALLEL = Config(
+    PAGE_WORKERS=3, PAGE_WORKERS_MIN_SIZE=0, FAST_SCAN=False, SEARCH_PAGES_PUB=30
+)
+
+
+def _book(tmp_path: Path) -> Path:
+    pages = [f"chapter {n}" for n in range(30)]
+    pages[17] = "ISBN 9781680508604"
+    pages[25] = "ISBN 9781838826581\nNo Starch Press"
+    book = tmp_path / "book.pdf"
+    book.write_bytes(build_pdf(pages))
+    return book
+
+
+def test_first_matching_page_wins(tmp_path: Path) -> None:
+    book = _book(tmp_path)
+    try:
+        with use_config(PARALLEL):
+            matches, used, page = search_pages(
+                book, range(30), partial(find_pattern, ISBN)
+            )
+            assert (matches, page) == (["9781680508604"], 17)
+            # workers stop after the match instead of reading every page
+            assert 18 <= used < 30
+            matches, used, _ = search_pages(
+                book, range(17), partial(find_pattern, ISBN)
+            )
+            assert (matches, used) == ([], 17)
+            # pages searched out of order still report the first in the order
+            matches, _, page = search_pages(
+                book, [25, *range(25)], partial(find_pattern, ISBN)
+            )
+            assert (matches, page) == (["9781838826581"], 25)
+            matches, _, _ = search_pages(
+                book, range(30), publisher_in_text, engine="pdfplumber"
+            )
+            assert matches == ["No Starch Press"]
+    finally:
+        stop_page_workers()
+
+
+def test_extraction_uses_page_workers(tmp_path: Path) -> None:
+    book = _book(tmp_path)
+    assert not use_page_workers(book)
+    try:
+        with use_config(PARALLEL):
+            assert use_page_workers(book)
+            with use_config(PARALLEL.copy(BACKGROUND=True)):
+                assert not use_page_workers(book)
+            page_budget.reset(0)
+            assert find_isbn_in_pdf(book) == ["9781680508604"]
+            assert page_budget.used >= 18
+            assert publisher_find(book) == "No Starch Press"
+            page_budget.reset(10)
+            assert find_isbn_in_pdf(book) == []
+            assert page_budget.used == 10
+    finally:
+        page_budget.reset(0)
+        stop_page_workers()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Tests for the scan, resolve and apply phases"""
+
+# Core Library modules
+import shutil
+from pathlib import Path
+
+# Third party modules
+import pytest
+
+# First party modules
+from metabook.cache import MetadataCache
+from metabook.config import config
+from metabook.phases import PhaseFile, apply, resolve, scan
+
+# Local modules
+from .conftest import build_pdf
+
+META = {
+    "TITLE": "Python Testing",
+    "SUBTITLE": "None",
+    "AUTHORS": ["A. Writer"],
+    "DATE": "2021",
+    "PUBLISHER": "Packt",
+    "ISBN": "9781838826581",
+}
+
+
+@pytest.fixture()
+def data(tmp_path: Path, monkeypatch) -> Path:  # type: ignore
+    data = tmp_path / "data"
+    cache = MetadataCache(data / "cache.json")
+    cache.put(META["ISBN"], META)
+    cache.save()
+    for name, value in {
+        "BOOK_TIMEOUT": 0,
+        "CATALOG_FILE": data / "catalog.sqlite",
+        "COSTS_FILE": data / "costs.json",
+        "METADATA_CACHE_FILE": data / "cache.json",
+        "PAGE_PROFILES_FILE": data / "pages.json",
+        "PREFIX_INDEX_FILE": data / "prefixes.json",
+        "QUARANTINE_FILE": data / "quarantine.json",
+        "RATE_LIMIT_FILE": data / "ratelimit.json",
+    }.items():
+        monkeypatch.setattr(config, name, value)
+    return data
+
+
+def test_phases_run_apart(data: Path, tmp_path: Path) -> None:
+    scanned = tmp_path / "scanned"
+    (scanned / "sub").mkdir(parents=True)
+    (scanned / "sub" / "book.pdf").write_bytes(
+        build_pdf(["Copyright", "ISBN 978-1-83882-658-1"])
+    )
+    (scanned / "blank.pdf").write_bytes(build_pdf(["no number here"]))
+    (scanned / "changed.pdf").write_bytes(build_pdf(["ISBN 978-1-83882-658-1"]))
+
+    scan([str(scanned), "--recurse", "--output", str(tmp_path / "scan.jsonl")])
+    records = {r["path"]: r for r in PhaseFile(tmp_path / "scan.jsonl").read()}
+    assert records["sub/book.pdf"]["isbns"] == [META["ISBN"]]
+    assert records["sub/book.pdf"]["page"] == 1
+    assert len(records["sub/book.pdf"]["sha256"]) == 64
+    assert records["blank.pdf"]["status"] == "no_isbn"
+
+    resolve([str(tmp_path / "scan.jsonl"), "-o", str(tmp_path / "resolved.jsonl")])
+    resolved = PhaseFile(tmp_path / "resolved.jsonl")
+    records = {r["path"]: r for r in resolved.read()}
+    assert records["sub/book.pdf"]["meta"] == META
+    assert resolved.folder == scanned.resolve()
+
+    # the books are applied where the folder is found on another machine
+    moved = tmp_path / "moved"
+    shutil.move(scanned, moved)
+    (moved / "changed.pdf").write_bytes(build_pdf(["ISBN 978-1-83882-658-1", "new"]))
+    apply([str(tmp_path / "resolved.jsonl"), "--folder", str(moved)])
+    renamed = [p.name for p in (moved / "sub").iterdir()]
+    assert renamed == ["[Packt] - Python Testing [2021] [9781838826581].pdf"]
+    assert (moved / "changed.pdf").exists()
+    assert (moved / "blank.pdf").exists()
+    assert (data / "pages.json").read_text() == '{"Packt": {"1": 1}}'
+
+
+def test_other_files_are_rejected(tmp_path: Path) -> None:
+    (tmp_path / "other.jsonl").write_text('{"folder": "."}\n')
+    with pytest.raises(ValueError):
+        list(PhaseFile(tmp_path / "other.jsonl").read())
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Tests for the staged processing pipeline"""
+
+# Core Library modules
+import time
+
+# Third party modules
+import pytest
+
+# First party modules
+from metabook.pipeline import Pipeline, Stage
+
+
+def _slow(item: int) -> int:
+    time.sleep(0.002)
+    return item
+
+
+def test_pipeline_processes_every_item_with_bounded_queues() -> None:
+    stages = [
+        Stage("double", lambda x: x * 2, workers=3, maxsize=4),
+        Stage("slow", _slow, workers=2, maxsize=4),
+        Stage("inc", lambda x: x + 1, workers=1, maxsize=4),
+    ]
+    pipeline = Pipeline(stages, maxsize=4)
+    results = sorted(pipeline.run(range(200)))
+    assert results == [x * 2 + 1 for x in range(200)]
+    stats = pipeline.stats()
+    assert [s["processed"] for s in stats] == [200, 200, 200]
+    # the slow stage backs up its queue but never beyond its capacity
+    assert 0 < stats[1]["depth_max"] <= 4
+
+
+def test_pipeline_reraises_stage_errors() -> None:
+    def fail(item: int) -> int:
+        if item == 5:
+            raise ValueError("boom")
+        return item
+
+    pipeline = Pipeline([Stage("fail", fail, workers=2)])
+    with pytest.raises(ValueError, match="boom"):
+        list(pipeline.run(range(50)))
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Tests for the read-ahead of upcoming books"""
+
+# Core Library modules
+import contextvars
+import os
+import threading
+from pathlib import Path
+
+# Third party modules
+import pytest
+
+# First party modules
+import metabook.metabook as metabook_module
+from metabook.api import MetaBook
+from metabook.cache import MetadataCache
+from metabook.config import Config, use_config
+from metabook.metrics import EXTRACT_SECONDS
+from metabook.pipeline import Pipeline, Stage
+from metabook.prefetch import Prefetcher, warm_ranges
+
+# Local modules
+from .conftest import build_pdf
+
+
+def test_warm_ranges() -> None:
+    with use_config(Config(PREFETCH_HEAD=100, PREFETCH_TAIL=10)):
+        assert warm_ranges(0) == []
+        assert warm_ranges(50) == [(0, 50)]
+        assert warm_ranges(105) == [(0, 100), (100, 5)]
+        assert warm_ranges(1000) == [(0, 100), (990, 10)]
+
+
+@pytest.mark.parametrize("fadvise", [True, False])
+def test_read_ahead_is_bounded(monkeypatch, tmp_path: Path, fadvise: bool) -> None:  # type: ignore
+    if not fadvise:
+        monkeypatch.delattr(os, "posix_fadvise", raising=False)
+    books = []
+    for number in range(3):
+        books.append(tmp_path / f"{number}.pdf")
+        books[-1].write_bytes(b"x" * 1000)
+    prefetcher = Prefetcher()
+    with use_config(Config(PREFETCH_AHEAD=2, PREFETCH_HEAD=100, PREFETCH_TAIL=10)):
+        assert prefetcher.prefetch(books[0]) == 110
+        assert prefetcher.prefetch(books[1]) == 110
+        third = threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(prefetcher.prefetch, books[2]),
+        )
+        third.start()
+        third.join(0.2)
+        assert third.is_alive()
+        prefetcher.release(books[0])
+        third.join(5)
+    assert not third.is_alive()
+    assert (prefetcher.books, prefetcher.bytes) == (3, 330)
+    assert prefetcher.waited > 0.1
+
+
+def test_pipeline_failure_ends_the_wait(tmp_path: Path) -> None:
+    books = []
+    for number in range(4):
+        books.append(tmp_path / f"{number}.pdf")
+        books[-1].write_bytes(b"x" * 1000)
+    prefetcher = Prefetcher()
+
+    def prefetch(book: Path) -> Path:
+        prefetcher.prefetch(book)
+        return book
+
+    def fail(book: Path) -> Path:
+        raise ValueError(book.name)
+
+    stages = [
+        Stage("prefetch", prefetch, abort=prefetcher.abort),
+        Stage("isbn", fail),
+    ]
+    errors = []
+
+    def run() -> None:
+        try:
+            list(Pipeline(stages).run(iter(books)))
+        except ValueError as e:
+            errors.append(e)
+
+    with use_config(Config(PREFETCH_AHEAD=1)):
+        thread = threading.Thread(
+            target=contextvars.copy_context().run, args=(run,), daemon=True
+        )
+        thread.start()
+        thread.join(10)
+    assert not thread.is_alive()
+    assert [str(e) for e in errors] == ["0.pdf"]
+
+
+def test_extraction_time_is_split(tmp_path: Path, monkeypatch) -> None:  # type: ignore
+    book = tmp_path / "book.pdf"
+    book.write_bytes(build_pdf(["ISBN: 978-1-68050-860-4"]))
+    meta = {
+        "TITLE": "Python Testing with pytest",
+        "SUBTITLE": "None",
+        "AUTHORS": ["Brian Okken"],
+        "DATE": "2022",
+        "PUBLISHER": "The Pragmatic Programmers",
+        "ISBN": "9781680508604",
+    }
+    monkeypatch.setattr(
+        metabook_module, "fetch_book_metadata", lambda *args, **kwargs: meta
+    )
+    cpu = EXTRACT_SECONDS.labels("cpu").value
+    settings = {"RATE_LIMIT_FILE": tmp_path / "ratelimit.json"}
+    with MetaBook(
+        cache=MetadataCache(), DRYRUN=True, BOOK_TIMEOUT=0, **settings
+    ) as metabook:
+        assert metabook.process(book).isbns == ["9781680508604"]
+        assert EXTRACT_SECONDS.labels("cpu").value > cpu
+        assert metabook._run.prefetcher.books == 1
+        assert "extraction:" in metabook._run.prefetcher.report()
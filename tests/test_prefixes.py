@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Tests for the ISBN prefix publisher index"""
+
+# Core Library modules
+from pathlib import Path
+
+# First party modules
+import metabook.metabook as metabook_module
+from metabook.api import MetaBook
+from metabook.cache import MetadataCache
+from metabook.prefixes import PrefixIndex, registrant_prefix
+
+
+def test_seeded_and_learned_prefixes(tmp_path: Path) -> None:
+    index = PrefixIndex(tmp_path / "prefixes.json")
+    assert index.resolve("9781838826581") == "Packt"
+    assert index.resolve("9781491950357") == "O'Reilly"
+    assert index.resolve("9780000000002") is None
+
+    for isbn in ("9781699901011", "9781699901028", "9781699901035"):
+        index.learn(isbn, "Orange")
+    for isbn in ("9781699910013", "9781699910020", "9781699910037"):
+        index.learn(isbn, "Orange")
+    index.learn("9781699910044", "BPB")
+    assert index.resolve("9781699901042") == "Orange"
+    # the registrant 978-1-69991 is shared 3:1, below the confidence threshold
+    assert index.resolve("9781699910051") is None
+    index.save()
+
+    reloaded = PrefixIndex(tmp_path / "prefixes.json")
+    assert reloaded.resolve("9781699901042") == "Orange"
+    assert (reloaded.hits, reloaded.misses) == (1, 0)
+
+
+def test_learning_stays_within_the_registrant() -> None:
+    assert registrant_prefix("9781484242216") == "97814842"
+    assert registrant_prefix("9780596007126") == "9780596"
+    assert registrant_prefix("9791032300824") is None
+
+    index = PrefixIndex()
+    for isbn in ("9781491950357", "9781492040347", "9781491954249"):
+        index.learn(isbn, "O'Reilly")
+    for isbn in ("9781484242216", "9781484254042", "9781484265611"):
+        index.learn(isbn, "Apress")
+    # Springer's 978-1-4939 and University of Toronto Press' 978-1-4871
+    assert index.resolve("9781493937124") is None
+    assert index.resolve("9781487100002") is None
+    assert index.resolve("9781484200001") == "Apress"
+
+
+def test_prefix_skips_publisher_scan(make_pdf, monkeypatch) -> None:  # type: ignore
+    book = make_pdf(["ISBN 978-1-83882-658-1"])
+    cache = MetadataCache()
+    cache.put(
+        "9781838826581",
+        {
+            "TITLE": "Python Testing",
+            "SUBTITLE": "None",
+            "AUTHORS": ["A. Writer"],
+            "DATE": "2021",
+            "PUBLISHER": "None",
+            "ISBN": "9781838826581",
+        },
+    )
+
+    def publisher_find(book):  # type: ignore
+        raise AssertionError("the book should not be searched")
+
+    monkeypatch.setattr(metabook_module, "publisher_find", publisher_find)
+    with MetaBook(cache=cache, DRYRUN=True, BOOK_TIMEOUT=0) as metabook:
+        result = metabook.process(book)
+    assert result.status == "dryrun"
+    assert result.meta["PUBLISHER"] == "Packt"
+    assert result.new_name == "[Packt] - Python Testing [2021] [9781838826581]"
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Tests for the pre-flight classifier and the quarantine list"""
+
+# Core Library modules
+import io
+from pathlib import Path
+
+# Third party modules
+from PyPDF2 import PdfReader, PdfWriter
+
+# First party modules
+from metabook.api import MetaBook
+from metabook.cache import MetadataCache
+from metabook.preflight import DECRYPT, PROCESS, SKIP, Quarantine, classify
+
+# Local modules
+from .conftest import build_pdf
+
+META = {
+    "TITLE": "Python Testing",
+    "SUBTITLE": "None",
+    "AUTHORS": ["A. Writer"],
+    "DATE": "2021",
+    "PUBLISHER": "Packt",
+    "ISBN": "9781838826581",
+}
+
+
+def _encrypted(password: str) -> bytes:
+    writer = PdfWriter()
+    for page in PdfReader(io.BytesIO(build_pdf(["ISBN 978-1-83882-658-1"]))).pages:
+        writer.add_page(page)
+    writer.encrypt(password, "owner")
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def test_classify(tmp_path: Path) -> None:
+    pdf = build_pdf(["ISBN 978-1-83882-658-1"])
+    cases = {
+        "good.pdf": (pdf, PROCESS),
+        "junk_header.pdf": (b"\0" * 100 + pdf, PROCESS),
+        "empty.pdf": (b"", SKIP),
+        "page.pdf": (b"<html>not a book</html>", SKIP),
+        "truncated.pdf": (pdf[: len(pdf) // 2], SKIP),
+        "bad_xref.pdf": (pdf.replace(b"startxref\n", b"startxref\n1"), PROCESS),
+        "encrypted.pdf": (_encrypted(""), DECRYPT),
+    }
+    for name, (data, verdict) in cases.items():
+        (tmp_path / name).write_bytes(data)
+        assert classify(tmp_path / name)[0] == verdict, name
+    assert classify(tmp_path / "missing.pdf")[0] == SKIP
+
+
+def test_startxref_off_by_a_few_bytes_is_processed(tmp_path: Path) -> None:
+    pdf = build_pdf(["ISBN 978-1-83882-658-1"])
+    start = pdf.rindex(b"startxref") + len(b"startxref")
+    offset = int(pdf[start:].split()[0])
+    book = tmp_path / "shifted.pdf"
+    book.write_bytes(pdf[:start] + b"\n%d\n%%%%EOF\n" % (offset + 7))
+    verdict, reason = classify(book)
+    assert verdict == PROCESS
+    assert "left to the parser" in reason
+    assert "978-1-83882-658-1" in PdfReader(book).pages[0].extract_text()
+
+
+def test_quarantine_persists_until_file_changes(tmp_path: Path) -> None:
+    book = tmp_path / "bad.pdf"
+    book.write_bytes(b"not a pdf")
+    quarantine = Quarantine(tmp_path / "quarantine.json")
+    quarantine.add(book, "not a PDF")
+    quarantine.save()
+    assert Quarantine(tmp_path / "quarantine.json").get(book) == "not a PDF"
+    book.write_bytes(build_pdf(["repaired"]))
+    assert Quarantine(tmp_path / "quarantine.json").get(book) is None
+
+
+def test_books_are_routed(tmp_path: Path) -> None:
+    (tmp_path / "open.pdf").write_bytes(_encrypted(""))
+    (tmp_path / "locked.pdf").write_bytes(_encrypted("secret"))
+    (tmp_path / "bad.pdf").write_bytes(b"<html></html>")
+    cache = MetadataCache()
+    cache.put(META["ISBN"], META)
+    quarantine = Quarantine()
+    with MetaBook(cache=cache, DRYRUN=True, BOOK_TIMEOUT=0) as metabook:
+        metabook._run.quarantine = quarantine
+        results = {
+            job.book.name: job
+            for job in metabook.process_many(sorted(tmp_path.iterdir()))
+        }
+    assert results["open.pdf"].status == "dryrun"
+    assert results["open.pdf"].encrypted
+    assert results["locked.pdf"].status == "error"
+    assert (results["bad.pdf"].status, results["bad.pdf"].error) == (
+        "quarantined",
+        "not a PDF",
+    )
+    assert quarantine.get(tmp_path / "locked.pdf") == "encrypted with a password"
+    assert quarantine.get(tmp_path / "bad.pdf") == "not a PDF"
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Tests for the shared API rate limiter"""
+
+# Core Library modules
+import multiprocessing
+import time
+from pathlib import Path
+
+# Third party modules
+import pytest
+
+# First party modules
+from metabook.config import config
+from metabook.ratelimit import RateLimiter
+
+
+@pytest.fixture()
+def limits(tmp_path: Path, monkeypatch):  # type: ignore
+    monkeypatch.setattr(config, "RATE_LIMIT_FILE", tmp_path / "ratelimit.json")
+    monkeypatch.setattr(config, "API_RATE", 20.0)
+    monkeypatch.setattr(config, "API_BURST", 1)
+    monkeypatch.setattr(config, "API_DAILY_QUOTA", 0)
+    return tmp_path
+
+
+def _acquire(path: Path, count: int) -> None:
+    config.RATE_LIMIT_FILE = path
+    config.API_RATE = 20.0
+    config.API_BURST = 1
+    config.API_DAILY_QUOTA = 0
+    limiter = RateLimiter()
+    for _ in range(count):
+        limiter.acquire()
+
+
+def test_bucket_is_shared_between_processes(limits) -> None:  # type: ignore
+    started = time.monotonic()
+    workers = [
+        multiprocessing.Process(target=_acquire, args=(config.RATE_LIMIT_FILE, 5))
+        for _ in range(3)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    # 15 tokens with a burst of 1 at 20/s cannot be handed out in under 0.7s
+    assert time.monotonic() - started >= 0.65
+    assert RateLimiter().usage() == 15
+
+
+def test_backoff_blocks_and_returns_quota(limits) -> None:  # type: ignore
+    limiter = RateLimiter()
+    limiter.acquire()
+    limiter.backoff(0.3)
+    assert limiter.usage() == 0
+    assert limiter.acquire() >= 0.25
+
+
+def test_daily_quota_is_persisted(limits, monkeypatch) -> None:  # type: ignore
+    monkeypatch.setattr(config, "API_RATE", 1000.0)
+    monkeypatch.setattr(config, "API_BURST", 10)
+    monkeypatch.setattr(config, "API_DAILY_QUOTA", 3)
+    for _ in range(3):
+        RateLimiter().acquire()
+    assert RateLimiter().usage() == 3
+    sleeps = []
+    monkeypatch.setattr("metabook.ratelimit.time.sleep", sleeps.append)
+    monkeypatch.setattr(config, "API_DAILY_QUOTA", 4)
+    RateLimiter().acquire()
+    assert sleeps == []
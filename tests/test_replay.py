@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Tests for API recording and the replaying stub"""
+
+# Core Library modules
+import threading
+from pathlib import Path
+
+# Third party modules
+import pytest
+import requests
+
+# First party modules
+from metabook.config import config
+from metabook.metabook import fetch_book_metadata
+from metabook.replay import Cassette, RecordingAdapter, StubAPI
+
+VOLUME = {
+    "kind": "books#volumes",
+    "totalItems": 1,
+    "items": [
+        {
+            "id": "x",
+            "volumeInfo": {
+                "title": "Python Testing",
+                "authors": ["A. Writer"],
+                "publisher": "Packt Publishing Ltd",
+                "publishedDate": "2021-06-11",
+                "pageCount": 300,
+                "imageLinks": {"thumbnail": "http://example.com/x.png"},
+            },
+        }
+    ],
+}
+
+
+@pytest.fixture()
+def stub_api(tmp_path: Path, monkeypatch):  # type: ignore
+    monkeypatch.setattr(config, "RATE_LIMIT_FILE", tmp_path / "ratelimit.json")
+    monkeypatch.setattr(config, "API_RATE", 1000.0)
+    monkeypatch.setattr(config, "API_BURST", 100)
+    monkeypatch.setattr(config, "API_DAILY_QUOTA", 0)
+    cassette = Cassette(tmp_path / "source.json.gz")
+    cassette.record("isbn:9781838826581", 200, VOLUME, 0.25)
+    api = StubAPI(cassette, latency=0.0)
+    server = api.serve()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    monkeypatch.setattr(config, "API_URL", f"http://{host}:{port}/books/v1/volumes")
+    yield api
+    server.shutdown()
+    server.server_close()
+
+
+def test_record_and_replay(stub_api, tmp_path: Path) -> None:  # type: ignore
+    stub_api.cassette.save()
+    assert Cassette(tmp_path / "source.json.gz").get("isbn:9781838826581") == {
+        "status": 200,
+        "body": {
+            "totalItems": 1,
+            "items": [
+                {
+                    "volumeInfo": {
+                        "title": "Python Testing",
+                        "authors": ["A. Writer"],
+                        "publishedDate": "2021-06-11",
+                        "publisher": "Packt Publishing Ltd",
+                    }
+                }
+            ],
+        },
+        "elapsed": 0.25,
+    }
+
+    recorded = Cassette(tmp_path / "recorded.json")
+    with requests.Session() as session:
+        session.mount("http://", RecordingAdapter(recorded))
+        meta = fetch_book_metadata("9781838826581", session, key="secret")
+        assert fetch_book_metadata("9780000000002", session, key="secret") == {}
+    recorded.save()
+    assert meta["TITLE"] == "Python Testing"
+    assert meta["PUBLISHER"] == "Packt"
+    assert set(Cassette(tmp_path / "recorded.json").entries) == {
+        "isbn:9781838826581",
+        "isbn:9780000000002",
+    }
+    assert "secret" not in (tmp_path / "recorded.json").read_text()
+
+
+def test_stub_bursts_and_errors(stub_api, monkeypatch) -> None:  # type: ignore
+    stub_api.burst_every = 4
+    stub_api.burst_length = 2
+    stub_api.retry_after = 0
+    with requests.Session() as session:
+        results = [fetch_book_metadata("9781838826581", session) for _ in range(3)]
+    assert all(meta["TITLE"] == "Python Testing" for meta in results)
+    # two 429 bursts were retried: 429, 429, 200, 200, 429, 429, 200
+    assert stub_api.statuses == {429: 4, 200: 3}
+
+    stub_api.burst_every = 0
+    stub_api.error_rate = 1.0
+    with requests.Session() as session:
+        assert fetch_book_metadata("9781838826581", session) == {}
+    assert stub_api.statuses[503] == 1
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""Tests for the publisher name resolver"""
+
+# Core Library modules
+import json
+from pathlib import Path
+
+# First party modules
+from metabook.resolver import PublisherResolver, normalize_publisher
+
+
+def test_normalize_publisher() -> None:
+    assert normalize_publisher('"O\'Reilly Media, Inc."') == "oreilly"
+    assert normalize_publisher("Packt Publishing Limited") == "packt"
+    assert normalize_publisher("Chapman & Hall/CRC") == "chapman and hall crc"
+    assert normalize_publisher("The Pragmatic Programmers") == "pragmatic programmers"
+    assert normalize_publisher("Press") == "press"
+
+
+def test_resolve_variants_and_report_unmatched(tmp_path: Path) -> None:
+    resolver = PublisherResolver()
+    assert resolver.resolve("Packt Publishing Limited") == "Packt"
+    assert resolver.resolve("O’Reilly Media, Inc") == "O'Reilly"
+    assert resolver.resolve("MANNING PUBLICATIONS CO.") == "Manning"
+    assert resolver.resolve("John Wiley and Sons, Inc.") == "Wiley"
+    # not indexed, but close to "John Wiley & Sons"
+    assert resolver.resolve("Wiley & Sons") == "Wiley"
+    assert resolver.resolve("None") == "None"
+    assert resolver.resolve("Apress") == "Apress"
+    assert resolver.resolve("Apress") == "Apress"
+
+    report = tmp_path / "unmatched.json"
+    report.write_text(json.dumps({"Routledge": 1}))
+    resolver.save(report)
+    assert json.loads(report.read_text()) == {"Apress": 2, "Routledge": 1}
+    assert not resolver.unmatched
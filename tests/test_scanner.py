@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""Tests for the raw content-stream ISBN scanner"""
+
+# First party modules
+from metabook import scanner
+
+
+def test_iter_text_operands_tj_and_tj_array() -> None:
+    data = b"BT /F1 12 Tf (ISBN: 978-1-) Tj [(78)-20(3)-300(55)] TJ ET"
+    text = "".join(scanner.iter_text_operands(data))
+    assert "ISBN: 978-1-783 55" in text
+
+
+def test_iter_text_operands_escapes_and_hex() -> None:
+    data = rb"BT (a\(b\)c\101) Tj T* <393738> Tj ET"
+    assert list(scanner.iter_text_operands(data)) == ["a(b)cA", "\n", "978", "\n"]
+
+
+def test_iter_text_operands_skips_inline_images() -> None:
+    data = b"BI /W 1 /H 1 ID \x00(978)Tj EI BT (ok) Tj ET"
+    assert "".join(scanner.iter_text_operands(data)).strip() == "ok"
+
+
+def test_scan_isbn_finds_copyright_page(make_pdf) -> None:  # type: ignore
+    book = make_pdf(["Title page", "Copyright\nISBN 978-1-83882-658-1\nPackt"])
+    assert scanner.scan_isbn(book) == ["9781838826581"]
+
+
+def test_locate_isbn_prefers_labelled_valid_isbns(make_pdf) -> None:  # type: ignore
+    book = make_pdf(
+        [
+            "Also by the author 9781838826582 and 9780596007126",
+            "Copyright\nISBN 978-1-4302-6451-4",
+        ]
+    )
+    assert scanner.locate_isbn(book) == (["9781430264514"], 1)
+    # without a label the first valid one is taken, the wrong check digit never
+    book = make_pdf(["Also by the author 9781838826582 and 9780596007126"])
+    assert scanner.locate_isbn(book) == (["9780596007126"], 0)
+
+
+def test_scan_isbn_uncompressed_and_missing(make_pdf) -> None:  # type: ignore
+    book = make_pdf(["No identifiers here"], compress=False)
+    assert scanner.scan_isbn(book) == []
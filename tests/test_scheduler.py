@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Tests for the cost-aware scheduling of books"""
+
+# Core Library modules
+from pathlib import Path
+
+# Third party modules
+import pytest
+
+# First party modules
+from metabook.api import MetaBook
+from metabook.cache import MetadataCache
+from metabook.scheduler import DEFAULT_RATES, CostModel, page_count, schedule
+
+# Local modules
+from .conftest import build_pdf
+
+
+def test_page_count(tmp_path: Path) -> None:
+    book = tmp_path / "book.pdf"
+    book.write_bytes(build_pdf(["one", "two", "three"]))
+    assert page_count(book) == 3
+    book.write_bytes(b"%PDF-1.5\n1 0 obj << /Linearized 1 /L 9999 /N 42 >>\n")
+    assert page_count(book) == 42
+    book.write_bytes(b"%PDF-1.5\n" + b"x" * 10000)
+    assert page_count(book) is None
+    assert page_count(tmp_path / "missing.pdf") is None
+
+
+def test_costs_are_learned(tmp_path: Path) -> None:
+    book = tmp_path / "book.pdf"
+    book.write_bytes(build_pdf(["one", "two"]))
+    costs = CostModel(tmp_path / "costs.json")
+    assert costs.estimate(book) == 2 * DEFAULT_RATES["pages"]
+    costs.record(book, 4.0)
+    assert costs.estimate(book) == 4.0
+    assert costs.rates()["pages"] == 2.0
+    costs.save()
+    assert CostModel(tmp_path / "costs.json").estimate(book) == 4.0
+    book.write_bytes(build_pdf(["one", "two", "three"]))
+    # the book changed: its time is forgotten, the learned rate is kept
+    assert CostModel(tmp_path / "costs.json").estimate(book) == 6.0
+
+
+def test_renamed_books_are_timed(tmp_path: Path) -> None:
+    book = tmp_path / "book.pdf"
+    book.write_bytes(build_pdf(["Python Testing", "ISBN: 978-1-68050-860-4"]))
+    cache = MetadataCache()
+    cache.put(
+        "9781680508604",
+        {
+            "TITLE": "Python Testing with pytest",
+            "SUBTITLE": "None",
+            "AUTHORS": ["Brian Okken"],
+            "DATE": "2022",
+            "PUBLISHER": "The Pragmatic Programmers",
+            "ISBN": "9781680508604",
+        },
+    )
+    with MetaBook(cache=cache, BOOK_TIMEOUT=0) as metabook:
+        job = metabook.process(book)
+        costs = metabook._run.costs
+    assert job.status == "renamed"
+    assert not book.exists()
+    assert costs.estimate(job.written) == round(job.seconds, 3) > 0
+
+
+def test_schedule_policies(tmp_path: Path) -> None:
+    books = []
+    for name, pages in (("b.pdf", 2), ("d.pdf", 8), ("[a] c.pdf", 20), ("a.pdf", 4)):
+        books.append(tmp_path / name)
+        books[-1].write_bytes(build_pdf(["page"] * pages))
+    b, d, renamed, a = books
+    costs = CostModel()
+    assert schedule(books, costs, "found") == books
+    assert schedule(books, costs, "largest") == [d, a, b, renamed]
+    assert schedule(books, costs, "smallest") == [renamed, b, a, d]
+    assert schedule(books, costs, "interleave") == [d, renamed, a, b]
+    with pytest.raises(ValueError):
+        schedule(books, costs, "random")
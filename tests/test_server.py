@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Tests for the local HTTP service"""
+
+# Core Library modules
+import http.client
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# Third party modules
+import pytest
+
+# First party modules
+from metabook.cache import MetadataCache
+from metabook.config import config
+from metabook.server import BookRequestHandler, BookService
+
+META = {
+    "TITLE": "Python Testing",
+    "SUBTITLE": "None",
+    "AUTHORS": ["A. Writer"],
+    "DATE": "2021",
+    "PUBLISHER": "Packt",
+    "ISBN": "9781838826581",
+}
+
+
+@pytest.fixture()
+def service_url(tmp_path: Path, monkeypatch):  # type: ignore
+    cache = MetadataCache(tmp_path / "cache.json")
+    cache.put(META["ISBN"], META)
+    cache.save()
+    monkeypatch.setattr(config, "METADATA_CACHE_FILE", tmp_path / "cache.json")
+    service = BookService(concurrency=2, root=tmp_path)
+    handler = type("Handler", (BookRequestHandler,), {"service": service})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+def _post(url: str, data: bytes, content_type: str) -> tuple[int, dict]:
+    request = urllib.request.Request(
+        url, data=data, headers={"Content-Type": content_type}, method="POST"
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_upload_and_path_lookups(service_url, make_pdf, tmp_path) -> None:  # type: ignore
+    book = make_pdf(["Copyright", "ISBN 978-1-83882-658-1"])
+    status, result = _post(
+        service_url + "/process", book.read_bytes(), "application/pdf"
+    )
+    assert status == 200
+    assert result["new_name"] == "[Packt] - Python Testing [2021] [9781838826581]"
+
+    body = json.dumps({"path": str(book)}).encode()
+    status, result = _post(service_url + "/process", body, "application/json")
+    assert status == 200
+    assert result["isbns"] == ["9781838826581"]
+    assert book.exists()
+
+    body = json.dumps({"path": "/etc/passwd"}).encode()
+    assert _post(service_url + "/process", body, "application/json")[0] == 403
+
+    with urllib.request.urlopen(service_url + "/stats", timeout=30) as response:
+        stats = json.loads(response.read())
+    assert stats["latency_seconds"]["count"] == 2
+    assert stats["statuses"] == {"dryrun": 2}
+    assert stats["cache_hit_ratio"] == 1.0
+
+
+def test_invalid_content_length(service_url) -> None:  # type: ignore
+    url = urlsplit(service_url)
+    for length in ("ten", "-1"):
+        connection = http.client.HTTPConnection(url.hostname, url.port, timeout=30)
+        connection.putrequest("POST", "/process")
+        connection.putheader("Content-Length", length)
+        connection.endheaders()
+        response = connection.getresponse()
+        assert response.status == 400
+        assert json.loads(response.read()) == {"error": "invalid Content-Length"}
+        connection.close()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Tests for the sidecar metadata mode"""
+
+# Core Library modules
+import json
+from pathlib import Path
+
+# First party modules
+from metabook.api import MetaBook
+from metabook.cache import MetadataCache
+
+META = {
+    "TITLE": "Python Testing",
+    "SUBTITLE": "None",
+    "AUTHORS": ["A. Writer", "B. & C. Writer"],
+    "DATE": "2021",
+    "PUBLISHER": "Packt",
+    "ISBN": "9781838826581",
+}
+NEW_NAME = "[Packt] - Python Testing [2021] [9781838826581]"
+
+
+def _cache() -> MetadataCache:
+    cache = MetadataCache()
+    cache.put(META["ISBN"], META)
+    return cache
+
+
+def test_sidecar_files_leave_the_pdf_untouched(make_pdf, tmp_path: Path) -> None:  # type: ignore
+    book = make_pdf(["ISBN 978-1-83882-658-1"])
+    data = book.read_bytes()
+    with MetaBook(cache=_cache(), SIDECAR="opf", BOOK_TIMEOUT=0) as metabook:
+        result = metabook.process(book)
+    assert result.status == "renamed"
+    renamed = tmp_path / f"{NEW_NAME}.pdf"
+    assert renamed.read_bytes() == data
+    opf = renamed.with_suffix(".opf").read_text()
+    assert '<dc:creator opf:role="aut">B. &amp; C. Writer</dc:creator>' in opf
+    assert 'opf:scheme="ISBN">9781838826581<' in opf
+    assert "SUBTITLE" not in opf and "None" not in opf
+
+
+def test_sidecar_index(make_pdf, tmp_path: Path) -> None:  # type: ignore
+    book = make_pdf(["ISBN 978-1-83882-658-1"])
+    index = tmp_path / "index.jsonl"
+    with MetaBook(
+        cache=_cache(), SIDECAR="index", SIDECAR_INDEX_FILE=index, BOOK_TIMEOUT=0
+    ) as metabook:
+        metabook.process(book)
+    [line] = index.read_text().splitlines()
+    assert json.loads(line) == {
+        "book": str(tmp_path / f"{NEW_NAME}.pdf"),
+        "meta": META,
+    }
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        f"{NEW_NAME}.pdf",
+        "index.jsonl",
+    ]
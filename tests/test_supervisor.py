@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Tests for the supervised extraction worker"""
+
+# Core Library modules
+import time
+
+# Third party modules
+import pytest
+
+# First party modules
+from metabook import memory, supervisor
+from metabook.config import config
+from metabook.metabook import find_isbn_in_pdf
+
+
+def _sleep(seconds: float) -> str:
+    time.sleep(seconds)
+    return "done"
+
+
+def _spend(pages: int) -> int:
+    spent = 0
+    while spent < pages and supervisor.page_budget.spend():
+        spent += 1
+    return spent
+
+
+def _fail() -> None:
+    raise ValueError("bad pdf")
+
+
+@pytest.fixture()
+def worker(monkeypatch):  # type: ignore
+    monkeypatch.setattr(config, "BOOK_TIMEOUT", 1.0)
+    monkeypatch.setattr(config, "PAGE_BUDGET", 10)
+    sup = supervisor.Supervisor()
+    yield sup
+    sup.stop()
+
+
+def test_call_returns_result(worker) -> None:  # type: ignore
+    assert worker.call(supervisor.BookBudget(), _sleep, 0) == "done"
+
+
+def test_timeout_kills_worker_and_recovers(worker) -> None:  # type: ignore
+    started = time.monotonic()
+    with pytest.raises(supervisor.BookTimeout):
+        worker.call(supervisor.BookBudget(), _sleep, 30)
+    assert time.monotonic() - started < 5
+    assert worker.call(supervisor.BookBudget(), _sleep, 0) == "done"
+
+
+def test_page_budget_is_shared_across_calls(worker) -> None:  # type: ignore
+    budget = supervisor.BookBudget()
+    assert worker.call(budget, _spend, 6) == 6
+    assert worker.call(budget, _spend, 6) == 4
+    assert budget.pages_used == 10
+    assert worker.call(supervisor.BookBudget(), _spend, 6) == 6
+
+
+def test_page_budget_in_process(worker, monkeypatch) -> None:  # type: ignore
+    monkeypatch.setattr(config, "BOOK_TIMEOUT", 0)
+    budget = supervisor.BookBudget()
+    assert worker.call(budget, _spend, 8) == 8
+    assert worker.call(budget, _spend, 8) == 2
+
+
+def test_worker_errors_are_reported(worker) -> None:  # type: ignore
+    budget = supervisor.BookBudget()
+    with pytest.raises(supervisor.WorkerError, match="bad pdf"):
+        worker.call(budget, _fail)
+    assert worker.call(budget, _sleep, 0) == "done"
+
+
+def _allocate(megabytes: int) -> None:
+    data = bytearray(megabytes * 1024 * 1024)
+    data[::4096] = b"x" * len(data[::4096])
+    time.sleep(30)
+
+
+def test_rss_limit_kills_worker(worker, monkeypatch) -> None:  # type: ignore
+    monkeypatch.setattr(config, "BOOK_TIMEOUT", 30.0)
+    monkeypatch.setattr(config, "WORKER_RSS_LIMIT", 150 * 1024 * 1024)
+    monkeypatch.setattr(config, "MEMORY_POLL_INTERVAL", 0.05)
+    started = time.monotonic()
+    with pytest.raises(supervisor.WorkerMemoryError, match="memory limit"):
+        worker.call(supervisor.BookBudget(), _allocate, 200)
+    assert time.monotonic() - started < 10
+    assert worker.call(supervisor.BookBudget(), _sleep, 0) == "done"
+
+
+def test_large_books_recycle_worker(worker, monkeypatch, make_pdf) -> None:  # type: ignore
+    monkeypatch.setattr(config, "BOOK_TIMEOUT", 30.0)
+    monkeypatch.setattr(config, "MEMPROFILE", True)
+    monkeypatch.setattr(config, "WORKER_RECYCLE_RSS", 100 * 1024 * 1024)
+    monkeypatch.setattr(supervisor, "memory_profile", memory.MemoryProfile())
+    monkeypatch.setattr(memory, "memory_profile", supervisor.memory_profile)
+    small = make_pdf(["ISBN 978-1-83882-658-1"], name="small.pdf")
+    large = make_pdf(
+        ["contents", "ISBN 978-1-83882-658-1"], name="large.pdf", padding=40 << 20
+    )
+    assert worker.call(supervisor.BookBudget(), find_isbn_in_pdf, small)
+    first = worker._process.pid
+    assert worker.call(supervisor.BookBudget(), find_isbn_in_pdf, large)
+    assert worker.rss > 100 * 1024 * 1024
+    assert worker._process.pid == first
+    assert worker.call(supervisor.BookBudget(), find_isbn_in_pdf, small)
+    assert worker._process.pid != first
+
+    profile = supervisor.memory_profile
+    assert profile.recycles == {"over the recycle RSS": 1}
+    assert profile.functions["find_isbn_in_pdf"]["calls"] == 3
+    assert profile.functions["find_isbn_in_pdf"]["peak_max"] > 40 << 20
+    assert "find_isbn_in_pdf" in profile.report()
+
+
+def test_worker_recycled_after_max_books(worker, monkeypatch) -> None:  # type: ignore
+    monkeypatch.setattr(config, "WORKER_MAX_BOOKS", 2)
+    budget = supervisor.BookBudget()
+    worker.call(budget, _sleep, 0)
+    first = worker._process.pid
+    worker.call(budget, _sleep, 0)
+    worker.call(supervisor.BookBudget(), _sleep, 0)
+    assert worker._process.pid == first
+    worker.call(supervisor.BookBudget(), _sleep, 0)
+    assert worker._process.pid != first
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Compares the ISBN tokenizer with the regular expressions it replaced.
+
+Each case is a synthetic page of text built to make one of the old patterns
+backtrack, scaled to a few sizes so that quadratic growth shows:
+
+    python tools/bench_isbn.py --sizes 1000 4000 16000 --repeat 3
+"""
+
+# Core Library modules
+import argparse
+import re
+import time
+from typing import Callable
+
+# First party modules
+from metabook.isbn import find_isbns
+
+# the patterns find_isbn_in_pdf used before the tokenizer
+PATTERN1 = re.compile(r"(?i)ISBN(?:-13)?\D*(\d(?:\W*\d){12})", re.M)
+PATTERN2 = re.compile(
+    r"(?:ISBN(?:-13)?:? )?(?=[0-9]{13}$|(?=(?:[0-9]+[- ]){4})[- 0-9]"
+    r"{17}$)97[89][- ]?[0-9]{1,5}[- ]?[0-9]+[- ]?[0-9]+[- ]?[0-9]",
+    re.M,
+)
+
+CASES: dict[str, Callable[[int], str]] = {
+    # every "ISBN" makes \D* run to the end of the text
+    "labels without numbers": lambda n: "ISBN see also " * n,
+    # an index page: page numbers and ranges after every entry
+    "index page": lambda n: "".join(
+        f"ISBN, {i} {i + 2}-{i + 5}, 978 {i % 7}\n" for i in range(n)
+    ),
+    # one long line of short digit groups, tried from every 978
+    "digit groups": lambda n: "978 1-" * n,
+    # labels followed by twelve digits, one short of a match
+    "near misses": lambda n: "ISBN 1 2 3 4 5 6 7 8 9 0 1 2. " * n,
+}
+
+
+def measure(find: Callable[[str], list], text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        find(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 4000, 16000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    finders = {
+        "pattern1": PATTERN1.findall,
+        "pattern2": PATTERN2.findall,
+        "tokenizer": find_isbns,
+    }
+    print(f"{'case':<24}{'size':>10}" + "".join(f"{n:>12}" for n in finders))
+    for case, build in CASES.items():
+        for size in args.sizes:
+            text = build(size)
+            times = [measure(find, text, args.repeat) for find in finders.values()]
+            print(
+                f"{case:<24}{len(text):>10}"
+                + "".join(f"{seconds * 1000:>10.1f}ms" for seconds in times)
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Measures the throughput of the metadata lookup path against a local stub.
+
+The lookups run through fetch_book_metadata, including the rate limiter and
+the 429 retries, against a StubAPI replaying a cassette recorded with
+'metabook --record', so results do not depend on the network or the quota.
+
+    python tools/bench_lookup.py data/api.json.gz --threads 8 --latency 0.05 \
+        --burst-every 50 --burst-length 3
+"""
+
+# Core Library modules
+import argparse
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Third party modules
+import requests
+from requests.adapters import HTTPAdapter
+
+# First party modules
+from metabook.config import config
+from metabook.metabook import fetch_book_metadata
+from metabook.metrics import Histogram
+from metabook.replay import Cassette, StubAPI
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("cassette", type=Path)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=1000.0, help="API_RATE")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--burst-every", type=int, default=0)
+    parser.add_argument("--burst-length", type=int, default=1)
+    parser.add_argument("--retry-after", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    cassette = Cassette(args.cassette)
+    queries = [q.split(":", 1)[1] for q in cassette.entries if q.startswith("isbn:")]
+    if not queries:
+        parser.error("the cassette holds no ISBN lookups")
+    api = StubAPI(
+        cassette,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        burst_every=args.burst_every,
+        burst_length=args.burst_length,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    server = api.serve()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+
+    config.API_URL = f"http://{host}:{port}/books/v1/volumes"
+    config.API_RATE = args.rate
+    config.API_BURST = max(int(args.rate), 1)
+    config.API_DAILY_QUOTA = 0
+    config.RATE_LIMIT_FILE = Path(tempfile.mkdtemp()) / "ratelimit.json"
+
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_maxsize=args.threads))
+    latency = Histogram()
+    found = 0
+
+    def lookup(number: int) -> None:
+        nonlocal found
+        started = time.perf_counter()
+        if fetch_book_metadata(queries[number % len(queries)], session, "bench"):
+            found += 1
+        latency.observe(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        list(pool.map(lookup, range(args.lookups)))
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    print(f"lookups:      {args.lookups} ({found} with metadata)")
+    print(f"elapsed:      {elapsed:.2f}s")
+    print(f"throughput:   {args.lookups / elapsed:.1f} lookups/s")
+    print(f"latency p50:  <= {latency.quantile(0.5)}s")
+    print(f"latency p99:  <= {latency.quantile(0.99)}s")
+    print(f"API requests: {api.requests} {dict(sorted(api.statuses.items()))}")
+
+
+if __name__ == "__main__":
+    main()